@@ -1,4 +1,5 @@
 import logging
+from functools import wraps
 
 from config import Config
 from flask import Flask
@@ -16,12 +17,29 @@ talisman = Talisman()
 assets = Environment()
 
 
+class FluxUI(Flask):
+    def async_to_sync(self, func):
+        """Run async views in the worker's long-lived event loop, where they share its pooled Flux API client."""
+        from app.integrations.flux_api_async import run
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return run(func(*args, **kwargs))
+
+        return wrapper
+
+
 def create_app(config_class=Config):
-    app = Flask(__name__)
+    app = FluxUI(__name__)
     app.config.from_object(config_class)
     app.jinja_env.trim_blocks = True
     app.jinja_env.lstrip_blocks = True
 
+    # Registered first, so that requests turned away by the rate limiter are measured too
+    from app import metrics
+
+    metrics.init_app(app)
+
     assets.init_app(app)
     csrf.init_app(app)
     limiter.init_app(app)
@@ -63,6 +81,25 @@ def create_app(config_class=Config):
     app.register_blueprint(project, url_prefix="/organisations")
     app.register_blueprint(role, url_prefix="/organisations")
 
+    # Register template helpers
+    from app import entity_urls, pagination
+
+    entity_urls.init_app(app)
+    pagination.init_app(app)
+
+    # Register Flux API request hooks
+    from app.integrations import deadline, degraded, identity_map, instrumentation
+
+    deadline.init_app(app)
+    degraded.init_app(app)
+    identity_map.init_app(app)
+    instrumentation.init_app(app)
+
+    # Profile requests on demand
+    from app import profiling
+
+    profiling.init_app(app)
+
     stream_handler = logging.StreamHandler()
     stream_handler.setLevel(logging.INFO)
     app.logger.addHandler(stream_handler)
@@ -4,20 +4,27 @@ from io import StringIO
 from app import csrf
 from app.grade import grade
 from app.grade.forms import GradeForm
-from app.integrations.flux_api import Grade, Organisation
-from flask import Response, flash, redirect, render_template, request, url_for
+from app.integrations import flux_api
+from app.integrations.fan_out import gather
+from app.integrations.flux_api_async import Grade, Organisation
+from app.integrations.instrumentation import call_budget
+from app.integrations.pagination import iter_pages
+from app.pagination import EXPORT_PAGE_SIZE, get_page_args
+from flask import Response, flash, redirect, render_template, request, stream_with_context, url_for
 
 
 @grade.route("/<uuid:organisation_id>/grades", methods=["GET", "POST"])
-def list(organisation_id):
+@call_budget(2)
+async def list(organisation_id):
     """Get a list of Grades in an Organisation."""
+    page, per_page = get_page_args()
     name_query = request.args.get("name", type=str)
-    organisation = Organisation().get(organisation_id)
+    filters = {"name": name_query} if name_query else {}
 
-    if name_query:
-        grades = Grade().list(organisation_id=organisation_id, name=name_query)
-    else:
-        grades = Grade().list(organisation_id=organisation_id)
+    organisation, grades = await gather(
+        Organisation().get(organisation_id),
+        Grade().list_page(organisation_id=organisation_id, page=page, per_page=per_page, **filters),
+    )
 
     return render_template(
         "grade/list_grades.html",
@@ -28,13 +35,14 @@ def list(organisation_id):
 
 
 @grade.route("/<uuid:organisation_id>/grades/new", methods=["GET", "POST"])
-def create(organisation_id):
+@call_budget(2)
+async def create(organisation_id):
     """Create a new Grade in an Organisation."""
     form = GradeForm()
-    organisation = Organisation().get(organisation_id)
+    organisation = await Organisation().get(organisation_id)
 
     if form.validate_on_submit():
-        new_grade = Grade().create(organisation_id=organisation_id, name=form.name.data)
+        new_grade = await Grade().create(organisation_id=organisation_id, name=form.name.data)
         flash(
             "<a href='{}' class='alert-link'>{}</a> has been created.".format(
                 url_for(
@@ -57,9 +65,10 @@ def create(organisation_id):
 
 
 @grade.route("/<uuid:organisation_id>/grades/<uuid:grade_id>", methods=["GET"])
-def view(organisation_id, grade_id):
+@call_budget(1)
+async def view(organisation_id, grade_id):
     """View a specific Grade in an Organisation."""
-    grade = Grade().get(organisation_id=organisation_id, grade_id=grade_id)
+    grade = await Grade().get(organisation_id=organisation_id, grade_id=grade_id)
 
     return render_template(
         "grade/view_grade.html",
@@ -72,13 +81,14 @@ def view(organisation_id, grade_id):
     "/<uuid:organisation_id>/grades/<uuid:grade_id>/edit",
     methods=["GET", "POST"],
 )
-def edit(organisation_id, grade_id):
+@call_budget(2)
+async def edit(organisation_id, grade_id):
     """Edit a specific Grade in an Organisation."""
-    grade = Grade().get(organisation_id=organisation_id, grade_id=grade_id)
+    grade = await Grade().get(organisation_id=organisation_id, grade_id=grade_id)
     form = GradeForm()
 
     if form.validate_on_submit():
-        changed_grade = Grade().edit(organisation_id=organisation_id, grade_id=grade_id, name=form.name.data)
+        changed_grade = await Grade().edit(organisation_id=organisation_id, grade_id=grade_id, name=form.name.data)
         flash(
             "Your changes to <a href='{}' class='alert-link'>{}</a> have been saved.".format(
                 url_for(
@@ -107,9 +117,10 @@ def edit(organisation_id, grade_id):
     methods=["GET", "POST"],
 )
 @csrf.exempt
-def delete(organisation_id, grade_id):
+@call_budget(2)
+async def delete(organisation_id, grade_id):
     """Delete a specific Grade in an Organisation."""
-    grade = Grade().get(organisation_id=organisation_id, grade_id=grade_id)
+    grade = await Grade().get(organisation_id=organisation_id, grade_id=grade_id)
 
     if request.method == "GET":
         return render_template(
@@ -118,15 +129,16 @@ def delete(organisation_id, grade_id):
             grade=grade,
         )
     elif request.method == "POST":
-        Grade().delete(organisation_id=organisation_id, grade_id=grade_id)
+        await Grade().delete(organisation_id=organisation_id, grade_id=grade_id)
         flash(f"{grade['name']} has been deleted.", "success")
         return redirect(url_for("grade.list", organisation_id=organisation_id))
 
 
 @grade.route("/<uuid:organisation_id>/grades/download", methods=["GET"])
+@call_budget(1)
 def download(organisation_id):
     """Download a list of Grades in an Organisation in CSV format."""
-    grades = Grade().list(organisation_id=organisation_id)
+    grades = iter_pages(flux_api.Grade().list_page, per_page=EXPORT_PAGE_SIZE, organisation_id=organisation_id)
 
     def generate():
         data = StringIO()
@@ -145,6 +157,6 @@ def download(organisation_id):
             data.seek(0)
             data.truncate(0)
 
-    response = Response(generate(), mimetype="text/csv")
+    response = Response(stream_with_context(generate()), mimetype="text/csv")
     response.headers.set("Content-Disposition", "attachment", filename="grades.csv")
     return response
@@ -0,0 +1,381 @@
+import asyncio
+import itertools
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import wraps
+
+import redis
+from app.integrations.degraded import get_degraded_mode
+from app.integrations.identity_map import clear_identity_map
+from app.metrics import record_cache_lookup
+from app.integrations.models import MODELS, Entity, build
+from app.integrations.utils import MISSING, bind_arguments
+from flask import current_app
+
+# Namespaces holding data that isn't scoped to a single organisation
+GLOBAL_NAMESPACES = ("organisations",)
+
+# Namespaces holding an organisation's data, all of which embed the organisation, so change when it does
+ORGANISATION_NAMESPACES = (
+    "organisation",
+    "grades",
+    "locations",
+    "managers",
+    "people",
+    "practices",
+    "programmes",
+    "projects",
+    "roles",
+)
+
+
+def dumps(value):
+    """Serialise a cached value to JSON, preserving datetimes and entities."""
+    return json.dumps(value, default=_encode)
+
+
+def loads(data):
+    """Deserialise a cached value from JSON, restoring datetimes and entities."""
+    return json.loads(data, object_hook=_decode)
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, Entity):
+        return {"__entity__": type(value).__name__, **value.to_dict()}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _decode(value):
+    if "__datetime__" in value:
+        return datetime.fromisoformat(value["__datetime__"])
+    if "__entity__" in value:
+        return build(MODELS[value.pop("__entity__")], value)
+    return value
+
+
+class MemoryCache:
+    """Thread-safe in-process cache with per-key expiry, used when Redis is not configured.
+
+    When full, expired entries are evicted first, then the oldest entries that have an expiry.
+    """
+
+    remote = False
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value, expires = self._items.get(key, (MISSING, None))
+            if expires is not None and expires < time.monotonic():
+                del self._items[key]
+                return MISSING
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            if len(self._items) >= self.max_entries:
+                self._evict()
+            self._items[key] = (value, time.monotonic() + ttl if ttl else None)
+
+    def delete(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def _evict(self):
+        now = time.monotonic()
+        for key in [key for key, (_, expires) in self._items.items() if expires is not None and expires < now]:
+            del self._items[key]
+        expiring = (key for key, (_, expires) in self._items.items() if expires is not None)
+        for key in list(itertools.islice(expiring, len(self._items) - self.max_entries + 1)):
+            del self._items[key]
+
+
+class RedisCache:
+    """Cache shared by every worker, stored in Redis as JSON.
+
+    Redis errors are logged and treated as cache misses, so an unavailable Redis slows pages down rather than
+    breaking them. Every call is a round trip to Redis, see ``off_loop``.
+    """
+
+    remote = True
+
+    def __init__(self, url):
+        self._redis = redis.Redis.from_url(url)
+
+    def get(self, key):
+        try:
+            data = self._redis.get(key)
+        except redis.exceptions.RedisError as error:
+            current_app.logger.warning(f"Cache get failed: {error}")
+            return MISSING
+        return MISSING if data is None else loads(data)
+
+    def set(self, key, value, ttl=None):
+        try:
+            self._redis.set(key, dumps(value), ex=ttl)
+        except redis.exceptions.RedisError as error:
+            current_app.logger.warning(f"Cache set failed: {error}")
+
+    def delete(self, key):
+        try:
+            self._redis.delete(key)
+        except redis.exceptions.RedisError as error:
+            current_app.logger.warning(f"Cache delete failed: {error}")
+
+
+def get_cache():
+    """Get the cache for the current app, or None if caching is disabled."""
+    if not current_app.config["FLUX_API_CACHE_TTL"]:
+        return None
+    if "flux_api_cache" not in current_app.extensions:
+        if current_app.config["REDIS_URL"]:
+            current_app.extensions["flux_api_cache"] = RedisCache(current_app.config["REDIS_URL"])
+        else:
+            current_app.extensions["flux_api_cache"] = MemoryCache()
+    return current_app.extensions["flux_api_cache"]
+
+
+async def off_loop(cache, func, *args):
+    """Call func, which uses cache, from a coroutine. If the cache is remote, func is called in a thread, in the
+    current context, so that its round trips to Redis don't hold up everything else running in the event loop."""
+    if cache is not None and cache.remote:
+        return await asyncio.to_thread(func, *args)
+    return func(*args)
+
+
+def generation_key(namespace, organisation_id):
+    if namespace in GLOBAL_NAMESPACES:
+        organisation_id = None
+    return f"flux-api:{organisation_id or '*'}:{namespace}"
+
+
+def generation(cache, namespace, organisation_id):
+    """Get the current generation of a namespace, which changes every time the namespace is invalidated."""
+    token = cache.get(generation_key(namespace, organisation_id))
+    return "0" if token is MISSING else token
+
+
+def invalidate(namespace, organisation_id=None):
+    """Invalidate every cached result in a namespace for an organisation.
+
+    Rather than finding and deleting each key, the namespace moves on to a new generation, so old entries are no
+    longer reachable and simply expire.
+    """
+    cache = get_cache()
+    if cache is not None:
+        cache.set(generation_key(namespace, organisation_id), uuid.uuid4().hex)
+
+
+def cache_key(cache, namespace, method, arguments):
+    organisation_id = arguments.get("organisation_id")
+    return "{}:{}:{}:{}".format(
+        generation_key(namespace, organisation_id),
+        generation(cache, namespace, organisation_id),
+        method.__qualname__,
+        json.dumps(arguments, sort_keys=True, default=str),
+    )
+
+
+class Refresher:
+    """Refreshes cached results in the background, so that callers can be served the stale result meanwhile.
+
+    Each key is only refreshed by one thread in the worker at a time. Counts the stale results served, the results
+    refreshed early before going stale, and the refreshes that failed.
+    """
+
+    def __init__(self, workers):
+        self.stale = 0
+        self.early = 0
+        self.failed = 0
+        self._pending = set()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="flux-api-refresh")
+        self._lock = threading.Lock()
+
+    def refresh(self, key, fetch, stale):
+        """Call fetch in the background with an app context, unless key is already being refreshed."""
+        with self._lock:
+            if stale:
+                self.stale += 1
+            if key in self._pending:
+                return
+            if not stale:
+                self.early += 1
+            self._pending.add(key)
+        self._executor.submit(self._run, current_app._get_current_object(), key, fetch)
+
+    def _run(self, app, key, fetch):
+        try:
+            with app.app_context():
+                fetch()
+        except Exception as error:
+            app.logger.warning(f"Cache refresh failed: {error!r}")
+            with self._lock:
+                self.failed += 1
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    def snapshot(self):
+        with self._lock:
+            return {"stale": self.stale, "early": self.early, "failed": self.failed, "refreshing": len(self._pending)}
+
+
+def get_refresher():
+    """Get the background refresher for the current app's cache."""
+    if "flux_api_refresher" not in current_app.extensions:
+        current_app.extensions["flux_api_refresher"] = Refresher(current_app.config["FLUX_API_REFRESH_WORKERS"])
+    return current_app.extensions["flux_api_refresher"]
+
+
+def grace_period(resource):
+    """Get how many seconds past expiry a resource's cached results may be served while they are refreshed."""
+    if resource.stale_while_revalidate is not None:
+        return resource.stale_while_revalidate
+    return current_app.config["FLUX_API_STALE_WHILE_REVALIDATE"]
+
+
+def store(cache, key, result, delta, grace):
+    """Cache a result that took delta seconds to fetch, keeping it for grace seconds after it goes stale.
+
+    Nothing is cached while the Flux API is unavailable, as the result may be its last known one.
+    """
+    if get_degraded_mode().active:
+        return result
+    ttl = current_app.config["FLUX_API_CACHE_TTL"]
+    cache.set(key, {"value": result, "fresh_until": time.time() + ttl, "delta": delta}, ttl + grace)
+    return result
+
+
+def fresh(entry):
+    """Whether a cached entry can be served without being refreshed.
+
+    An entry is refreshed once it is stale, and may be refreshed early at random shortly before, more likely the
+    closer it is to going stale and the longer it took to fetch, so that popular keys don't all expire at once.
+    """
+    jitter = -math.log(1 - random.random())  # nosec: jitter, not security sensitive
+    early = entry["delta"] * current_app.config["FLUX_API_CACHE_EARLY_REFRESH"] * jitter
+    return time.time() + early < entry["fresh_until"]
+
+
+def look_up(cache, namespace, method, arguments):
+    """Get the cache key for a call of a resource method, and its cached entry, or MISSING if there isn't one."""
+    key = cache_key(cache, namespace, method, arguments)
+    entry = cache.get(key)
+    hit = isinstance(entry, dict) and "fresh_until" in entry
+    record_cache_lookup(namespace, hit)
+    return key, entry if hit else MISSING
+
+
+def fetch(cache, key, method, resource, args, kwargs, grace):
+    start = time.perf_counter()
+    return store(cache, key, method(resource, *args, **kwargs), time.perf_counter() - start, grace)
+
+
+async def fetch_async(cache, key, method, resource, args, kwargs, grace):
+    start = time.perf_counter()
+    result = await method(resource, *args, **kwargs)
+    return await off_loop(cache, store, cache, key, result, time.perf_counter() - start, grace)
+
+
+def serve(key, entry, refresh):
+    """Serve a cached entry, refreshing it in the background if it isn't fresh."""
+    if not fresh(entry):
+        get_refresher().refresh(key, refresh, time.time() >= entry["fresh_until"])
+    return entry["value"]
+
+
+def cached(namespace):
+    """Cache the results of a resource method for FLUX_API_CACHE_TTL seconds.
+
+    Results are keyed by the organisation and all of the method's arguments, within a namespace that
+    ``invalidates`` can clear. Methods are cached for both the plain and async clients, whose resources share them,
+    see ``FluxAPI.asynchronous``.
+
+    Once a result goes stale, it is still served for the resource's ``stale_while_revalidate`` grace period while it
+    is refreshed in the background, so that only a caller finding nothing cached waits for upstream.
+    """
+
+    def decorator(method):
+        def refresh_async(cache, key, resource_class, args, kwargs, grace):
+            # Imported here, as the async client imports this module
+            from app.integrations.flux_api_async import closing_client
+
+            asyncio.run(
+                closing_client(
+                    lambda: fetch_async(cache, key, method, resource_class(), args, kwargs, grace),
+                )()
+            )
+
+        async def async_wrapper(self, *args, **kwargs):
+            cache = get_cache()
+            if cache is None:
+                return await method(self, *args, **kwargs)
+
+            arguments = bind_arguments(method, self, args, kwargs)
+            key, entry = await off_loop(cache, look_up, cache, namespace, method, arguments)
+            grace = grace_period(self)
+            if entry is MISSING:
+                return await fetch_async(cache, key, method, self, args, kwargs, grace)
+            return serve(key, entry, lambda: refresh_async(cache, key, type(self), args, kwargs, grace))
+
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self.asynchronous:
+                return async_wrapper(self, *args, **kwargs)
+
+            cache = get_cache()
+            if cache is None:
+                return method(self, *args, **kwargs)
+
+            key, entry = look_up(cache, namespace, method, bind_arguments(method, self, args, kwargs))
+            grace = grace_period(self)
+            if entry is MISSING:
+                return fetch(cache, key, method, self, args, kwargs, grace)
+            return serve(key, entry, lambda: fetch(cache, key, method, type(self)(), args, kwargs, grace))
+
+        return wrapper
+
+    return decorator
+
+
+def invalidates(*namespaces):
+    """Invalidate the given cache namespaces for the organisation once a resource method succeeds.
+
+    Everything fetched so far in the current request is forgotten too, as the write may have changed any of it.
+    """
+
+    def invalidate_all(method, self, args, kwargs):
+        organisation_id = bind_arguments(method, self, args, kwargs).get("organisation_id")
+        for namespace in namespaces:
+            invalidate(namespace, organisation_id)
+        clear_identity_map()
+
+    def decorator(method):
+        async def async_wrapper(self, *args, **kwargs):
+            result = await method(self, *args, **kwargs)
+            await off_loop(get_cache(), invalidate_all, method, self, args, kwargs)
+            return result
+
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self.asynchronous:
+                return async_wrapper(self, *args, **kwargs)
+
+            result = method(self, *args, **kwargs)
+            invalidate_all(method, self, args, kwargs)
+            return result
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,153 @@
+import re
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+from flask import current_app
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+# The permit ``allow`` gives calls made while a breaker is closed
+CALL = object()
+
+_id_pattern = re.compile(r"/[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}(?=/|$)", re.IGNORECASE)
+
+
+def endpoint(method, url):
+    """Name the endpoint a request is for, such as ``GET /v1/organisations/{id}/grades``."""
+    return f"{method} {_id_pattern.sub('/{id}', urlsplit(url).path)}"
+
+
+class CircuitBreaker:
+    """Tracks the outcome of recent calls to one Flux API endpoint, and stops calling it while it is failing.
+
+    A call fails if upstream can't be reached, replies with a server error, or takes longer than ``slow_call``
+    seconds. Once at least ``min_calls`` of the last ``window`` calls have been made and the proportion that failed
+    reaches ``failure_rate``, the breaker opens and calls fail fast. After ``reset_timeout`` seconds it half-opens
+    and lets a single probe call through: if that succeeds the breaker closes again, otherwise it reopens. Only the
+    probe's own outcome can close or reopen the breaker, not that of a call let through before it opened.
+    """
+
+    def __init__(self, window, min_calls, failure_rate, slow_call, reset_timeout):
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call = slow_call
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.opened_at = None
+        self.rejected = 0
+        self._outcomes = deque(maxlen=window)
+        self._latencies = deque(maxlen=window)
+        self._probe = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Get a permit to make a call now, or None if the call must fail fast. In the half-open state only the first
+        caller gets one, the probe's, which is a new object each time. Pass the permit on with the call's outcome."""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._probe = None
+            if self.state == CLOSED:
+                return CALL
+            if self.state == HALF_OPEN and self._probe is None:
+                self._probe = object()
+                return self._probe
+            self.rejected += 1
+            return None
+
+    def release(self, permit):
+        """End a call that ``allow`` gave a permit. If it was the half-open probe and no outcome was recorded for it,
+        such as when it failed with an unexpected error, the next caller is let through to probe instead."""
+        with self._lock:
+            if permit is self._probe:
+                self._probe = None
+
+    def record(self, status_code, latency, permit):
+        """Record the outcome of a call that got a response."""
+        self._record(status_code < 500 and latency <= self.slow_call, latency, permit)
+
+    def record_failure(self, latency, permit):
+        """Record a call that timed out or couldn't connect."""
+        self._record(False, latency, permit)
+
+    def _record(self, succeeded, latency, permit):
+        with self._lock:
+            self._outcomes.append(succeeded)
+            self._latencies.append(latency)
+            if self.state == HALF_OPEN:
+                if permit is not self._probe:
+                    return
+                self._probe = None
+                if succeeded:
+                    self.state = CLOSED
+                    self.opened_at = None
+                    self._outcomes.clear()
+                else:
+                    self._open()
+            elif self.state == CLOSED and len(self._outcomes) >= self.min_calls:
+                if self._outcomes.count(False) / len(self._outcomes) >= self.failure_rate:
+                    self._open()
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+
+    def snapshot(self):
+        """The breaker's state and recent failure rate and latency, for the metrics endpoint."""
+        with self._lock:
+            calls = len(self._outcomes)
+            return {
+                "state": self.state,
+                "calls": calls,
+                "failure_rate": round(self._outcomes.count(False) / calls, 3) if calls else 0.0,
+                "mean_latency": round(sum(self._latencies) / len(self._latencies), 4) if self._latencies else 0.0,
+                "rejected": self.rejected,
+            }
+
+
+class CircuitBreakers:
+    """A circuit breaker for each Flux API endpoint, created on first use."""
+
+    def __init__(self, config):
+        self.config = config
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(name)
+                if breaker is None:
+                    breaker = self._breakers[name] = CircuitBreaker(
+                        window=self.config["FLUX_API_BREAKER_WINDOW"],
+                        min_calls=self.config["FLUX_API_BREAKER_MIN_CALLS"],
+                        failure_rate=self.config["FLUX_API_BREAKER_FAILURE_RATE"],
+                        slow_call=self.config["FLUX_API_BREAKER_SLOW_CALL"],
+                        reset_timeout=self.config["FLUX_API_BREAKER_RESET_TIMEOUT"],
+                    )
+        return breaker
+
+    def snapshot(self):
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {name: breaker.snapshot() for name, breaker in sorted(breakers.items())}
+
+
+def get_circuit_breakers():
+    """Get the circuit breakers for the current app, or None if circuit breaking is disabled."""
+    if not current_app.config["FLUX_API_BREAKER_WINDOW"]:
+        return None
+    if "flux_api_breakers" not in current_app.extensions:
+        current_app.extensions["flux_api_breakers"] = CircuitBreakers(current_app.config)
+    return current_app.extensions["flux_api_breakers"]
+
+
+def get_circuit_breaker(method, url):
+    """Get the circuit breaker for the endpoint a request is for, or None if circuit breaking is disabled."""
+    breakers = get_circuit_breakers()
+    return breakers.get(endpoint(method, url)) if breakers else None
@@ -0,0 +1,81 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+
+class Revalidated:
+    """Stands in for a 304 Not Modified response, carrying the result decoded from the response it revalidated."""
+
+    status_code = 200
+
+    def __init__(self, result):
+        self.result = result
+
+
+class Validated:
+    """The validators and decoded result of an earlier response, and when it was received."""
+
+    def __init__(self, etag, last_modified, result, size):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.result = result
+        self.size = size
+        self.fetched_at = time.time()
+
+    @property
+    def headers(self):
+        """Request headers that ask upstream to reply 304 Not Modified if the response hasn't changed."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ValidatorCache:
+    """Validated responses keyed by URL, evicting the least recently used once max_entries is reached.
+
+    Responses are kept whether or not they had validators, as the last known result for their URL.
+
+    Counts how many responses were revalidated rather than downloaded, and how many body bytes that saved.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.revalidated = 0
+        self.bytes_saved = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        with self._lock:
+            validated = self._entries.get(url)
+            if validated is not None:
+                self._entries.move_to_end(url)
+            return validated
+
+    def set(self, url, validated):
+        with self._lock:
+            self._entries[url] = validated
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record_revalidation(self, validated):
+        with self._lock:
+            self.revalidated += 1
+            self.bytes_saved += validated.size
+
+
+def get_validator_cache():
+    """Get the validator cache for the current app, or None if conditional requests are disabled."""
+    if not current_app.config["FLUX_API_VALIDATOR_CACHE_SIZE"]:
+        return None
+    if "flux_api_validators" not in current_app.extensions:
+        current_app.extensions["flux_api_validators"] = ValidatorCache(
+            current_app.config["FLUX_API_VALIDATOR_CACHE_SIZE"]
+        )
+    return current_app.extensions["flux_api_validators"]
@@ -0,0 +1,49 @@
+import time
+
+from flask import current_app, g
+from werkzeug.exceptions import RequestTimeout
+
+
+class Deadline:
+    """The time by which all of the Flux API calls for the current request must have finished."""
+
+    def __init__(self, budget):
+        self.expires = time.monotonic() + budget
+
+    def remaining(self):
+        """Get the number of seconds left before the deadline, which is negative once it has passed."""
+        return self.expires - time.monotonic()
+
+    def timeout(self, connect, read):
+        """Cap connect and read timeouts to the time remaining, raising RequestTimeout if there is none left."""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise RequestTimeout
+        return min(connect, remaining), min(read, remaining)
+
+
+def get_deadline():
+    """Get the deadline for the current request, or None if FLUX_API_DEADLINE is 0.
+
+    The deadline normally starts with the request, but outside of one it starts with the first call that needs it.
+    """
+    if not current_app.config["FLUX_API_DEADLINE"]:
+        return None
+    return g.setdefault("flux_api_deadline", Deadline(current_app.config["FLUX_API_DEADLINE"]))
+
+
+def start_deadline():
+    """Start a new deadline for the current request's Flux API calls from now, if FLUX_API_DEADLINE isn't 0."""
+    if current_app.config["FLUX_API_DEADLINE"]:
+        g.flux_api_deadline = Deadline(current_app.config["FLUX_API_DEADLINE"])
+
+
+def get_timeout(connect, read):
+    """Get the connect and read timeouts for a single Flux API call, within the current request's deadline."""
+    deadline = get_deadline()
+    return deadline.timeout(connect, read) if deadline else (connect, read)
+
+
+def init_app(app):
+    """Start the deadline for each request's Flux API calls as the request starts."""
+    app.before_request(start_deadline)
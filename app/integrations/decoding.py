@@ -0,0 +1,109 @@
+import codecs
+import json
+import re
+from datetime import datetime
+
+from app.integrations.models import build, build_all
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# Entity fields holding ISO 8601 timestamps
+TIMESTAMP_FIELDS = ("created_at", "updated_at")
+
+_separator = re.compile(r"[\s,]*")
+
+
+def loads(data):
+    """Deserialise JSON from response bytes, with orjson if it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def parse_timestamp(value):
+    """Parse a Flux API timestamp, such as ``2021-06-30T09:15:00.123456+00:00``.
+
+    ``datetime.fromisoformat`` is many times faster than ``strptime``, but before Python 3.11 it only accepts the
+    exact format ``isoformat`` writes, so anything else falls back to ``strptime``.
+    """
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f%z")
+
+
+def parse_timestamps(entity):
+    for field in TIMESTAMP_FIELDS:
+        value = entity.get(field)
+        if isinstance(value, str):
+            entity[field] = parse_timestamp(value)
+    return entity
+
+
+def decode(data, model=None):
+    """Decode a Flux API response body into an entity or list of entities, parsing their timestamps.
+
+    Entities are built as the given model, or left as dicts without one.
+    """
+    result = loads(data)
+    if isinstance(result, dict):
+        parse_timestamps(result)
+    elif isinstance(result, list):
+        for item in result:
+            if isinstance(item, dict):
+                parse_timestamps(item)
+    return build_all(model, result) if model else result
+
+
+def _entity(item, model):
+    if not isinstance(item, dict):
+        return item
+    parse_timestamps(item)
+    return build(model, item) if model else item
+
+
+def iter_items(chunks, model=None):
+    """Decode the entities in a JSON array one by one from an iterable of byte chunks, parsing their timestamps.
+
+    Entities are built as the given model, or left as dicts without one.
+
+    Only the chunk being read and the item being decoded are held in memory, however long the array is.
+    """
+    text = codecs.getincrementaldecoder("utf-8")()
+    decoder = json.JSONDecoder()
+    buffer = ""
+    started = False
+
+    for chunk in chunks:
+        buffer += text.decode(chunk)
+        position = 0
+        if not started:
+            buffer = buffer.lstrip()
+            if not buffer:
+                continue
+            if buffer[0] != "[":
+                raise ValueError("Expected a JSON array")
+            started = True
+            position = 1
+
+        while True:
+            position = _separator.match(buffer, position).end()
+            if buffer.startswith("]", position):
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                break
+            if end == len(buffer):
+                # A number or literal at the end of the buffer may continue in the next chunk
+                break
+            yield _entity(item, model)
+            position = end
+        buffer = buffer[position:]
+
+    raise ValueError("Unterminated JSON array")
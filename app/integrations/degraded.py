@@ -0,0 +1,92 @@
+import threading
+import time
+from datetime import datetime, timezone
+
+from flask import current_app, flash, g, redirect, request
+from werkzeug.exceptions import InternalServerError, RequestTimeout, ServiceUnavailable
+
+# Errors raised when the Flux API can't be reached, is failing, or its circuit breaker is open
+UNAVAILABLE_ERRORS = (InternalServerError, RequestTimeout, ServiceUnavailable)
+
+# Blueprints whose forms don't write to the Flux API, so stay usable while it is unavailable
+LOCAL_BLUEPRINTS = ("main",)
+
+
+class DegradedMode:
+    """Tracks whether the Flux API is unavailable, so that the UI can be read-only until it recovers.
+
+    The UI is degraded once ``failures`` reads in a row have failed, so that a single slow or failing call doesn't
+    make it read-only. It stays degraded until a call to the Flux API next succeeds, or for ``timeout`` seconds after
+    the last failure if no call is made meanwhile. Counts the responses served from last known data.
+    """
+
+    def __init__(self, timeout, failures):
+        self.timeout = timeout
+        self.failures = failures
+        self.served_stale = 0
+        self._failed = 0
+        self._until = None
+        self._lock = threading.Lock()
+
+    @property
+    def active(self):
+        with self._lock:
+            return self._until is not None and time.monotonic() < self._until
+
+    def failed(self):
+        with self._lock:
+            self._failed += 1
+            if self._failed >= self.failures:
+                self._until = time.monotonic() + self.timeout
+
+    def recovered(self):
+        with self._lock:
+            self._failed = 0
+            self._until = None
+
+    def record_stale(self):
+        with self._lock:
+            self.served_stale += 1
+
+    def snapshot(self):
+        return {"active": self.active, "served_stale": self.served_stale}
+
+
+def get_degraded_mode():
+    """Get the degraded mode state for the current app."""
+    if "flux_api_degraded" not in current_app.extensions:
+        current_app.extensions["flux_api_degraded"] = DegradedMode(
+            current_app.config["FLUX_API_DEGRADED_TIMEOUT"], current_app.config["FLUX_API_DEGRADED_FAILURES"]
+        )
+    return current_app.extensions["flux_api_degraded"]
+
+
+def serve_stale(validated):
+    """Note that the current page shows a last known result rather than one just fetched, and how old it is."""
+    get_degraded_mode().record_stale()
+    stale_since = g.get("flux_api_stale_since")
+    if stale_since is None or validated.fetched_at < stale_since:
+        g.flux_api_stale_since = validated.fetched_at
+
+
+def stale_since():
+    """Get when the oldest last known result shown on the current page was fetched, or None if all are current."""
+    timestamp = g.get("flux_api_stale_since")
+    return datetime.fromtimestamp(timestamp, timezone.utc) if timestamp else None
+
+
+def init_app(app):
+    """Show a banner on pages using last known data, and turn away form submissions while the Flux API is down."""
+
+    @app.before_request
+    def read_only():
+        if request.method == "POST" and request.blueprint not in LOCAL_BLUEPRINTS and get_degraded_mode().active:
+            flash(
+                "The Flux API is currently unavailable, so your changes haven't been saved. Please try again later.",
+                "danger",
+            )
+            return redirect(request.full_path)
+
+    @app.context_processor
+    def degraded_mode():
+        return {"flux_api_degraded": get_degraded_mode().active, "flux_api_stale_since": stale_since()}
@@ -0,0 +1,16 @@
+import asyncio
+
+
+async def gather(*calls):
+    """Await independent async Flux API calls concurrently and return their results in the order given.
+
+    Each call is a coroutine from a resource method of the async client, for example
+    ``await gather(Organisation().get(organisation_id=organisation_id), Grade().list(...))``. If any call raises an
+    exception, such as the NotFound or TooManyRequests raised by the resource classes, the first one in call order is
+    re-raised here, so routes behave just as they would making the calls one by one.
+    """
+    results = await asyncio.gather(*calls, return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return results
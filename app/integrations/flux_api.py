@@ -1,872 +1,666 @@
 import json
-from datetime import datetime
+import os
+import socket
+import threading
+import time
 from urllib.parse import urlencode
 
 import requests
+from app.integrations import decoding, models
+from app.integrations.cache import ORGANISATION_NAMESPACES, cached, invalidates
+from app.integrations.circuit_breaker import get_circuit_breaker
+from app.integrations.conditional import Revalidated, Validated, get_validator_cache
+from app.integrations.deadline import get_timeout
+from app.integrations.degraded import UNAVAILABLE_ERRORS, get_degraded_mode, serve_stale
+from app.integrations.identity_map import mapped
+from app.integrations.instrumentation import record_call
+from app.integrations.pagination import page_args, paginate
+from app.integrations.retry import Retry
+from app.integrations.search_index import get_people_indexes
+from app.integrations.single_flight import get_single_flight
 from flask import current_app
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
 from werkzeug.exceptions import (
     BadRequest,
     Conflict,
     InternalServerError,
     NotFound,
     RequestTimeout,
+    ServiceUnavailable,
     TooManyRequests,
 )
 
+# Bytes read at a time from a streamed response
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+class KeepAliveAdapter(HTTPAdapter):
+    """HTTP adapter that enables TCP keep-alive on pooled sockets, so idle connections survive load balancers."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"] = HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+        super().init_poolmanager(*args, **kwargs)
+
+
+def create_session(config):
+    """Create a new HTTP session with a connection pool sized from the app config."""
+    adapter_class = KeepAliveAdapter if config["FLUX_API_KEEP_ALIVE"] else HTTPAdapter
+    adapter = adapter_class(pool_connections=1, pool_maxsize=config["FLUX_API_POOL_SIZE"])
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if not config["FLUX_API_KEEP_ALIVE"]:
+        session.headers["Connection"] = "close"
+    return session
+
+
+def get_session():
+    """Get the pooled HTTP session for this worker process, creating it on first use.
+
+    The session is shared by every thread in the process. A forked worker gets its own session rather than
+    inheriting sockets from its parent.
+    """
+    global _session, _session_pid
+    if _session is None or _session_pid != os.getpid():
+        with _session_lock:
+            if _session is None or _session_pid != os.getpid():
+                _session = create_session(current_app.config)
+                _session_pid = os.getpid()
+    return _session
+
 
 class FluxAPI:
+    """Base class of the Flux API resources, sending their requests with a pooled requests session.
+
+    Resource methods build a URL and body with ``endpoint`` and ``list_args``, and get the result with ``call`` or
+    ``get_page``. The async client, see ``AsyncFluxAPI``, sends the same requests with httpx and overrides only those
+    two, so every resource is defined once for both clients.
+    """
+
+    # Seconds a stale cached result may still be served while it is refreshed, or None for
+    # FLUX_API_STALE_WHILE_REVALIDATE. Set on a resource class to override it for that resource.
+    stale_while_revalidate = None
+
+    # The model entities are decoded into, or None for dicts
+    model = None
+
+    # The filters a resource's list methods send upstream, each empty if not given, when given any filters at all
+    list_filters = ("name",)
+
+    # Whether the resource's methods return coroutines, as those of the async client do
+    asynchronous = False
+
     def __init__(self):
         self.url = current_app.config["FLUX_API_URL"]
         self.version = current_app.config["FLUX_API_VERSION"]
-        self.timeout = current_app.config["TIMEOUT"]
+        self.timeout = (current_app.config["FLUX_API_CONNECT_TIMEOUT"], current_app.config["TIMEOUT"])
+        self.session = get_session()
+
+    def request(self, method, url, data=None, stream=False):
+        """Send a request to the Flux API, raising RequestTimeout or InternalServerError if it can't be reached.
+
+        A GET for a URL whose earlier response had validators is sent as a conditional request. If upstream replies
+        304 Not Modified, a Revalidated response carrying the earlier decoded result is returned in its place.
+
+        Idempotent requests that fail to get a response, or get a retryable one, are retried as ``Retry`` allows.
+        With stream set, the response body is left to be read as it is iterated over. Otherwise, identical GETs made
+        at the same time share a single request to upstream, see ``SingleFlight``.
+
+        If the Flux API is unavailable, a GET falls back to the last known result for its URL, see ``fall_back``.
+        """
+        single_flight = get_single_flight() if method == "GET" and not stream else None
+        try:
+            if single_flight:
+                response = single_flight.do(f"{method} {url}", lambda: self.send_with_retries(method, url, data))
+            else:
+                response = self.send_with_retries(method, url, data, stream)
+        except UNAVAILABLE_ERRORS:
+            response = self.fall_back(method, url)
+            if response is None:
+                raise
+            return response
+
+        available = self.check_available(method, url, response)
+        if available is not response:
+            response.close()
+        return available
+
+    def send_with_retries(self, method, url, data=None, stream=False):
+        """Send a request, retrying it as ``Retry`` allows."""
+        headers, data, validated = self.prepare(method, url, data)
+        retry = Retry(method)
+
+        while True:
+            try:
+                response = self.send(method, url, data, headers, validated, stream)
+            except (RequestTimeout, InternalServerError):
+                delay = retry.delay()
+                if delay is None:
+                    raise
+            else:
+                delay = retry.delay(response)
+                if delay is None:
+                    return response
+                response.close()
+            time.sleep(delay)
+
+    def send(self, method, url, data, headers, validated, stream=False):
+        """Make a single attempt at a request, unless the endpoint's circuit breaker is open, see ``reject``.
+
+        The attempt's timeouts are capped to the time left before the current request's deadline.
+        """
+        timeout = get_timeout(*self.timeout)
+        breaker = get_circuit_breaker(method, url)
+        permit = breaker.allow() if breaker else None
+        if breaker and not permit:
+            self.reject()
+
+        start = time.perf_counter()
+        try:
+            try:
+                response = self.session.request(method, url, data=data, headers=headers, timeout=timeout, stream=stream)
+            except requests.exceptions.Timeout:
+                self.record(method, url, breaker, permit, start)
+                raise RequestTimeout
+            except requests.exceptions.ConnectionError:
+                self.record(method, url, breaker, permit, start)
+                raise InternalServerError
+
+            size = int(response.headers.get("Content-Length") or 0) if stream else len(response.content)
+            self.record(method, url, breaker, permit, start, response, size)
+        finally:
+            if breaker:
+                breaker.release(permit)
+        return self.received(response, validated)
+
+    def record(self, method, url, breaker, permit, start, response=None, size=0):
+        """Record the outcome and latency of an attempt started at start, with the endpoint's circuit breaker, if any,
+        under the permit it gave the attempt, and for instrumentation, see ``record_call``. Pass the response if one
+        was received."""
+        latency = time.perf_counter() - start
+        status_code = response.status_code if response is not None else None
+        if breaker and response is None:
+            breaker.record_failure(latency, permit)
+        elif breaker:
+            breaker.record(status_code, latency, permit)
+        record_call(method, url, status_code, latency, size)
+
+    def prepare(self, method, url, data=None):
+        """Get the headers and encoded body for a request, and the validated response it revalidates, if any."""
+        headers = {"Accept": "application/json"}
+        if data is not None:
+            headers["Content-Type"] = "application/json"
+            data = json.dumps(data)
+
+        validators = get_validator_cache() if method == "GET" else None
+        validated = validators.get(url) if validators else None
+        if validated:
+            headers.update(validated.headers)
+        return headers, data, validated
+
+    def reject(self):
+        """Fail fast with ServiceUnavailable while the circuit breaker is open, so that a GET falls back at once."""
+        raise ServiceUnavailable
+
+    def fall_back(self, method, url):
+        """Get the last known result of a GET, to serve while the Flux API is unavailable, or None if there isn't one.
+
+        Either way, the failed GET counts towards degrading the UI to read-only until the Flux API recovers, see
+        ``DegradedMode``. A failed write doesn't, as it says nothing about whether pages can still be read.
+        """
+        if method != "GET":
+            return None
+        get_degraded_mode().failed()
+        validators = get_validator_cache()
+        validated = validators.get(url) if validators else None
+        if validated is None:
+            return None
+        serve_stale(validated)
+        return Revalidated(validated.result)
+
+    def check_available(self, method, url, response):
+        """Fall back from a server error response as from a failed request, or note that the Flux API is available."""
+        if response.status_code < 500:
+            get_degraded_mode().recovered()
+            return response
+        return self.fall_back(method, url) or response
+
+    def received(self, response, validated):
+        """Replace a 304 Not Modified response with the earlier result it revalidated."""
+        if response.status_code == 304 and validated:
+            get_validator_cache().record_revalidation(validated)
+            return Revalidated(validated.result)
+        return response
+
+    def decode(self, response, model=None):
+        """Decode a JSON response body into the resource's model, or the given one, see ``decoding.decode``.
+
+        The result of a GET response is kept, as the last known result for its URL. If it had an ETag or
+        Last-Modified validator, the next request for the same URL can be revalidated rather than downloaded and
+        decoded again.
+        """
+        if isinstance(response, Revalidated):
+            return response.result
+
+        content = response.content
+        result = decoding.decode(content, model or self.model)
+
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        validators = get_validator_cache()
+        if validators and response.request.method == "GET":
+            validators.set(str(response.url), Validated(etag, last_modified, result, len(content)))
+        return result
+
+    def endpoint(self, path, args=None):
+        """Get the URL of a path in the Flux API, with a query string of args if there are any."""
+        url = f"{self.url}/{self.version}/{path}"
+        return f"{url}?{urlencode(args)}" if args else url
+
+    def list_args(self, kwargs):
+        """Get the query string arguments for the filters a list method was given, see ``list_filters``."""
+        return {name: kwargs.get(name, "") for name in self.list_filters} if kwargs else {}
+
+    def result(self, response, ok=(200,), errors=(), model=None):
+        """Get the result of a response: its decoded body if its status code is ok, or None for 204 No Content.
+
+        Otherwise, raise the exception among errors for its status code, TooManyRequests if upstream is rate limiting
+        the UI, or InternalServerError.
+        """
+        status_code = response.status_code
+        if status_code in ok:
+            return None if status_code == 204 else self.decode(response, model)
+        for error in (*errors, TooManyRequests):
+            if status_code == error.code:
+                raise error
+        raise InternalServerError
+
+    def call(self, method, url, data=None, ok=(200,), errors=(), model=None):
+        """Send a request to the Flux API and get its result, see ``result``."""
+        return self.result(self.request(method, url, data), ok, errors, model)
+
+    def get_page(self, url, args, page, per_page):
+        """Get a single page of a list of entities, see ``paginate``."""
+        qs = urlencode({**args, **page_args(page, per_page)})
+
+        return paginate(self.call("GET", f"{url}?{qs}", ok=(200, 204)), page, per_page)
+
+    def stream_list(self, url):
+        """GET a list of entities, returning an iterator that decodes them one by one as the response arrives.
+
+        Errors are raised as they are by the list methods, before anything is decoded.
+        """
+        response = self.request("GET", url, stream=True)
+
+        if isinstance(response, Revalidated):
+            return iter(response.result or [])
+        elif response.status_code == 200:
+            return self._iter_items(response)
+
+        response.close()
+        if response.status_code == 204:
+            return iter(())
+        elif response.status_code == 429:
+            raise TooManyRequests
+        else:
+            raise InternalServerError
+
+    def _iter_items(self, response):
+        with response:
+            yield from decoding.iter_items(response.iter_content(STREAM_CHUNK_SIZE), self.model)
 
 
 class Organisation(FluxAPI):
+    model = models.Organisation
+
+    @invalidates("organisations")
     def create(self, name, domain):
         """Create a new Organisation."""
-        url = f"{self.url}/{self.version}/organisations"
-        headers = {"Accept": "application/json", "Content-Type": "application/json"}
+        url = self.endpoint("organisations")
         new_organisation = {"name": name, "domain": domain}
 
-        try:
-            response = requests.post(
-                url,
-                data=json.dumps(new_organisation),
-                headers=headers,
-                timeout=self.timeout,
-            )
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 201:
-                organisation = json.loads(response.text)
-                organisation["created_at"] = datetime.strptime(organisation["created_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                if organisation["updated_at"]:
-                    organisation["updated_at"] = datetime.strptime(organisation["updated_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                return organisation
-            elif response.status_code == 409:
-                raise Conflict
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("POST", url, data=new_organisation, ok=(201,), errors=(Conflict,))
 
+    @mapped("organisation")
+    @cached("organisations")
     def list(self, **kwargs):
         """Get a list of Organisations."""
-        if kwargs:
-            args = {"name": kwargs.get("name", "")}
-            qs = urlencode(args)
-            url = f"{self.url}/{self.version}/organisations?{qs}"
-        else:
-            url = f"{self.url}/{self.version}/organisations"
-        headers = {"Accept": "application/json"}
+        url = self.endpoint("organisations", self.list_args(kwargs))
 
-        try:
-            response = requests.get(url, headers=headers, timeout=self.timeout)
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 200:
-                return json.loads(response.text)
-            elif response.status_code == 204:
-                return None
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("GET", url, ok=(200, 204))
+
+    @mapped("organisation")
+    def list_page(self, page, per_page, **kwargs):
+        """Get a page of a list of Organisations."""
+        url = self.endpoint("organisations")
 
+        return self.get_page(url, self.list_args(kwargs), page, per_page)
+
+    @mapped("organisation")
+    @cached("organisation")
     def get(self, organisation_id):
         """Get a Organisation with a specific ID."""
-        url = f"{self.url}/{self.version}/organisations/{organisation_id}"
-        headers = {"Accept": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}")
 
-        try:
-            response = requests.get(url, headers=headers, timeout=self.timeout)
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 200:
-                organisation = json.loads(response.text)
-                organisation["created_at"] = datetime.strptime(organisation["created_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                if organisation["updated_at"]:
-                    organisation["updated_at"] = datetime.strptime(organisation["updated_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                return organisation
-            elif response.status_code == 404:
-                raise NotFound
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("GET", url, errors=(NotFound,))
 
+    @invalidates("organisations", *ORGANISATION_NAMESPACES)
     def edit(self, organisation_id, name, domain):
         """Edit a Organisation with a specific ID."""
-        url = f"{self.url}/{self.version}/organisations/{organisation_id}"
-        headers = {"Accept": "application/json", "Content-Type": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}")
         changed_organisation = {"name": name, "domain": domain}
 
-        try:
-            response = requests.put(
-                url,
-                data=json.dumps(changed_organisation),
-                headers=headers,
-                timeout=self.timeout,
-            )
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 200:
-                organisation = json.loads(response.text)
-                organisation["created_at"] = datetime.strptime(organisation["created_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                if organisation["updated_at"]:
-                    organisation["updated_at"] = datetime.strptime(organisation["updated_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                return organisation
-            elif response.status_code == 404:
-                raise NotFound
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("PUT", url, data=changed_organisation, errors=(NotFound,))
 
+    @invalidates("organisations", *ORGANISATION_NAMESPACES)
     def delete(self, organisation_id):
         """Delete a Organisation with a specific ID."""
-        url = f"{self.url}/{self.version}/organisations/{organisation_id}"
-        headers = {"Accept": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}")
 
-        try:
-            response = requests.delete(url, headers=headers, timeout=self.timeout)
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 204:
-                return None
-            elif response.status_code == 404:
-                raise NotFound
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("DELETE", url, ok=(204,), errors=(NotFound,))
 
 
 class Programme(FluxAPI):
+    model = models.Programme
+
+    @invalidates("projects", "programmes", "organisation")
     def create(self, name, manager_id, organisation_id):
         """Create a new Programme."""
-        url = f"{self.url}/{self.version}/organisations/{organisation_id}/programmes"
-        headers = {"Accept": "application/json", "Content-Type": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/programmes")
         new_programme = {"name": name}
         if manager_id:
             new_programme["manager_id"] = manager_id
 
-        try:
-            response = requests.post(
-                url,
-                data=json.dumps(new_programme),
-                headers=headers,
-                timeout=self.timeout,
-            )
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 201:
-                organisation = json.loads(response.text)
-                organisation["created_at"] = datetime.strptime(organisation["created_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                if organisation["updated_at"]:
-                    organisation["updated_at"] = datetime.strptime(organisation["updated_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                return organisation
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("POST", url, data=new_programme, ok=(201,))
 
+    @mapped("programme")
+    @cached("programmes")
     def list(self, organisation_id, **kwargs):
         """Get a list of Programmes."""
-        if kwargs:
-            args = {"name": kwargs.get("name", "")}
-            qs = urlencode(args)
-            url = f"{self.url}/{self.version}/organisations/{organisation_id}/programmes?{qs}"
-        else:
-            url = f"{self.url}/{self.version}/organisations/{organisation_id}/programmes"
-        headers = {"Accept": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/programmes", self.list_args(kwargs))
 
-        try:
-            response = requests.get(url, headers=headers, timeout=self.timeout)
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 200:
-                return json.loads(response.text)
-            elif response.status_code == 204:
-                return None
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("GET", url, ok=(200, 204))
 
+    @mapped("programme")
+    def list_page(self, organisation_id, page, per_page, **kwargs):
+        """Get a page of a list of Programmes."""
+        url = self.endpoint(f"organisations/{organisation_id}/programmes")
+
+        return self.get_page(url, self.list_args(kwargs), page, per_page)
+
+    @mapped("programme")
+    @cached("programmes")
     def get(self, programme_id, organisation_id):
         """Get a specific Programme."""
-        url = f"{self.url}/{self.version}/organisations/{organisation_id}/programmes/{programme_id}"
-        headers = {"Accept": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/programmes/{programme_id}")
 
-        try:
-            response = requests.get(url, headers=headers, timeout=self.timeout)
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 200:
-                programme = json.loads(response.text)
-                programme["created_at"] = datetime.strptime(programme["created_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                if programme["updated_at"]:
-                    programme["updated_at"] = datetime.strptime(programme["updated_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                return programme
-            elif response.status_code == 404:
-                raise NotFound
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("GET", url, errors=(NotFound,))
 
+    @invalidates("projects", "programmes", "organisation")
     def edit(self, programme_id, name, manager_id, organisation_id):
         """Edit a Programme with a specific ID."""
-        url = f"{self.url}/{self.version}/organisations/{organisation_id}/programmes/{programme_id}"
-        headers = {"Accept": "application/json", "Content-Type": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/programmes/{programme_id}")
         changed_programme = {"name": name}
         if manager_id:
             changed_programme["manager_id"] = manager_id
 
-        try:
-            response = requests.put(
-                url,
-                data=json.dumps(changed_programme),
-                headers=headers,
-                timeout=self.timeout,
-            )
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 200:
-                programme = json.loads(response.text)
-                programme["created_at"] = datetime.strptime(programme["created_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                if programme["updated_at"]:
-                    programme["updated_at"] = datetime.strptime(programme["updated_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                return programme
-            elif response.status_code == 404:
-                raise NotFound
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("PUT", url, data=changed_programme, errors=(NotFound,))
 
+    @invalidates("projects", "programmes", "organisation")
     def delete(self, programme_id, organisation_id):
         """Delete a Programme with a specific ID."""
-        url = f"{self.url}/{self.version}/organisations/{organisation_id}/programmes/{programme_id}"
-        headers = {"Accept": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/programmes/{programme_id}")
 
-        try:
-            response = requests.delete(url, headers=headers, timeout=self.timeout)
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 204:
-                return None
-            elif response.status_code == 404:
-                raise NotFound
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("DELETE", url, ok=(204,), errors=(NotFound,))
 
 
 class Project(FluxAPI):
+    model = models.Project
+
+    @invalidates("projects", "managers", "programmes", "organisation")
     def create(self, name, manager_id, programme_id, status, organisation_id):
         """Create a new Project."""
-        url = f"{self.url}/{self.version}/organisations/{organisation_id}/projects"
-        headers = {"Accept": "application/json", "Content-Type": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/projects")
         new_project = {"name": name, "programme_id": programme_id, "status": status}
         if manager_id:
             new_project["manager_id"] = manager_id
 
-        try:
-            response = requests.post(
-                url,
-                data=json.dumps(new_project),
-                headers=headers,
-                timeout=self.timeout,
-            )
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 201:
-                organisation = json.loads(response.text)
-                organisation["created_at"] = datetime.strptime(organisation["created_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                if organisation["updated_at"]:
-                    organisation["updated_at"] = datetime.strptime(organisation["updated_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                return organisation
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("POST", url, data=new_project, ok=(201,))
 
+    @mapped("project")
+    @cached("projects")
     def list(self, organisation_id, filters):
         """Get a list of Projects."""
-        if filters:
-            qs = urlencode(filters)
-            url = f"{self.url}/{self.version}/organisations/{organisation_id}/projects?{qs}"
-        else:
-            url = f"{self.url}/{self.version}/organisations/{organisation_id}/projects"
-        headers = {"Accept": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/projects", filters)
 
-        try:
-            response = requests.get(url, headers=headers, timeout=self.timeout)
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 200:
-                return json.loads(response.text)
-            elif response.status_code == 204:
-                return None
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("GET", url, ok=(200, 204))
+
+    @mapped("project")
+    def list_page(self, organisation_id, filters, page, per_page):
+        """Get a page of a list of Projects."""
+        url = self.endpoint(f"organisations/{organisation_id}/projects")
+
+        return self.get_page(url, filters, page, per_page)
+
+    def stream(self, organisation_id, filters):
+        """Iterate over a list of Projects as it is downloaded, for exports too large to hold in memory."""
+        url = self.endpoint(f"organisations/{organisation_id}/projects", filters)
+
+        return self.stream_list(url)
 
+    @mapped("project")
+    @cached("projects")
     def get(self, project_id, organisation_id):
         """Get a specific Project."""
-        url = f"{self.url}/{self.version}/organisations/{organisation_id}/projects/{project_id}"
-        headers = {"Accept": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/projects/{project_id}")
 
-        try:
-            response = requests.get(url, headers=headers, timeout=self.timeout)
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 200:
-                project = json.loads(response.text)
-                project["created_at"] = datetime.strptime(project["created_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                if project["updated_at"]:
-                    project["updated_at"] = datetime.strptime(project["updated_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                return project
-            elif response.status_code == 404:
-                raise NotFound
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("GET", url, errors=(NotFound,))
 
+    @invalidates("projects", "managers", "programmes", "organisation")
     def edit(self, project_id, name, manager_id, programme_id, status, organisation_id):
         """Edit a Project with a specific ID."""
-        url = f"{self.url}/{self.version}/organisations/{organisation_id}/projects/{project_id}"
-        headers = {"Accept": "application/json", "Content-Type": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/projects/{project_id}")
         changed_project = {"name": name, "programme_id": programme_id, "status": status}
         if manager_id:
             changed_project["manager_id"] = manager_id
 
-        try:
-            response = requests.put(
-                url,
-                data=json.dumps(changed_project),
-                headers=headers,
-                timeout=self.timeout,
-            )
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 200:
-                project = json.loads(response.text)
-                project["created_at"] = datetime.strptime(project["created_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                if project["updated_at"]:
-                    project["updated_at"] = datetime.strptime(project["updated_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                return project
-            elif response.status_code == 404:
-                raise NotFound
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("PUT", url, data=changed_project, errors=(NotFound,))
 
+    @invalidates("projects", "managers", "programmes", "organisation")
     def delete(self, project_id, organisation_id):
         """Delete a Project with a specific ID."""
-        url = f"{self.url}/{self.version}/organisations/{organisation_id}/projects/{project_id}"
-        headers = {"Accept": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/projects/{project_id}")
 
-        try:
-            response = requests.delete(url, headers=headers, timeout=self.timeout)
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 204:
-                return None
-            elif response.status_code == 404:
-                raise NotFound
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("DELETE", url, ok=(204,), errors=(NotFound,))
 
+    @mapped("project")
+    @cached("managers")
     def managers(self, organisation_id):
         """Get a list of Project managers"""
-        url = f"{self.url}/{self.version}/organisations/{organisation_id}/projects/managers"
-        headers = {"Accept": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/projects/managers")
 
-        try:
-            response = requests.get(url, headers=headers, timeout=self.timeout)
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 200:
-                return json.loads(response.text)
-            elif response.status_code == 204:
-                return None
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("GET", url, ok=(200, 204), model=models.Person)
 
 
 class Grade(FluxAPI):
+    model = models.Grade
+
+    @invalidates("roles", "people", "grades", "organisation")
     def create(self, name, organisation_id):
         """Create a new Grade."""
-        url = f"{self.url}/{self.version}/organisations/{organisation_id}/grades"
-        headers = {"Accept": "application/json", "Content-Type": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/grades")
         new_grade = {"name": name}
 
-        try:
-            response = requests.post(
-                url,
-                data=json.dumps(new_grade),
-                headers=headers,
-                timeout=self.timeout,
-            )
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 201:
-                organisation = json.loads(response.text)
-                organisation["created_at"] = datetime.strptime(organisation["created_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                if organisation["updated_at"]:
-                    organisation["updated_at"] = datetime.strptime(organisation["updated_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                return organisation
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("POST", url, data=new_grade, ok=(201,))
 
+    @mapped("grade")
+    @cached("grades")
     def list(self, organisation_id, **kwargs):
         """Get a list of Grades."""
-        if kwargs:
-            args = {"name": kwargs.get("name", "")}
-            qs = urlencode(args)
-            url = f"{self.url}/{self.version}/organisations/{organisation_id}/grades?{qs}"
-        else:
-            url = f"{self.url}/{self.version}/organisations/{organisation_id}/grades"
-        headers = {"Accept": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/grades", self.list_args(kwargs))
 
-        try:
-            response = requests.get(url, headers=headers, timeout=self.timeout)
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 200:
-                return json.loads(response.text)
-            elif response.status_code == 204:
-                return None
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("GET", url, ok=(200, 204))
 
+    @mapped("grade")
+    def list_page(self, organisation_id, page, per_page, **kwargs):
+        """Get a page of a list of Grades."""
+        url = self.endpoint(f"organisations/{organisation_id}/grades")
+
+        return self.get_page(url, self.list_args(kwargs), page, per_page)
+
+    @mapped("grade")
+    @cached("grades")
     def get(self, grade_id, organisation_id):
         """Get a specific Grade."""
-        url = f"{self.url}/{self.version}/organisations/{organisation_id}/grades/{grade_id}"
-        headers = {"Accept": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/grades/{grade_id}")
 
-        try:
-            response = requests.get(url, headers=headers, timeout=self.timeout)
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 200:
-                grade = json.loads(response.text)
-                grade["created_at"] = datetime.strptime(grade["created_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                if grade["updated_at"]:
-                    grade["updated_at"] = datetime.strptime(grade["updated_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                return grade
-            elif response.status_code == 404:
-                raise NotFound
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("GET", url, errors=(NotFound,))
 
+    @invalidates("roles", "people", "grades", "organisation")
     def edit(self, grade_id, name, organisation_id):
         """Edit a Grade with a specific ID."""
-        url = f"{self.url}/{self.version}/organisations/{organisation_id}/grades/{grade_id}"
-        headers = {"Accept": "application/json", "Content-Type": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/grades/{grade_id}")
         changed_grade = {"name": name}
 
-        try:
-            response = requests.put(
-                url,
-                data=json.dumps(changed_grade),
-                headers=headers,
-                timeout=self.timeout,
-            )
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 200:
-                grade = json.loads(response.text)
-                grade["created_at"] = datetime.strptime(grade["created_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                if grade["updated_at"]:
-                    grade["updated_at"] = datetime.strptime(grade["updated_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                return grade
-            elif response.status_code == 404:
-                raise NotFound
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("PUT", url, data=changed_grade, errors=(NotFound,))
 
+    @invalidates("roles", "people", "grades", "organisation")
     def delete(self, grade_id, organisation_id):
         """Delete a Grade with a specific ID."""
-        url = f"{self.url}/{self.version}/organisations/{organisation_id}/grades/{grade_id}"
-        headers = {"Accept": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/grades/{grade_id}")
 
-        try:
-            response = requests.delete(url, headers=headers, timeout=self.timeout)
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 204:
-                return None
-            elif response.status_code == 404:
-                raise NotFound
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("DELETE", url, ok=(204,), errors=(NotFound,))
 
 
 class Practice(FluxAPI):
+    model = models.Practice
+
+    @invalidates("roles", "people", "practices", "organisation")
     def create(self, name, head_id, cost_centre, organisation_id):
         """Create a new Practice."""
-        url = f"{self.url}/{self.version}/organisations/{organisation_id}/practices"
-        headers = {"Accept": "application/json", "Content-Type": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/practices")
         new_practice = {"name": name}
         if head_id:
             new_practice["head_id"] = head_id
         if cost_centre:
             new_practice["cost_centre"] = cost_centre
 
-        try:
-            response = requests.post(
-                url,
-                data=json.dumps(new_practice),
-                headers=headers,
-                timeout=self.timeout,
-            )
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 201:
-                organisation = json.loads(response.text)
-                organisation["created_at"] = datetime.strptime(organisation["created_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                if organisation["updated_at"]:
-                    organisation["updated_at"] = datetime.strptime(organisation["updated_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                return organisation
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("POST", url, data=new_practice, ok=(201,))
 
+    @mapped("practice")
+    @cached("practices")
     def list(self, organisation_id, **kwargs):
         """Get a list of Practices."""
-        if kwargs:
-            args = {"name": kwargs.get("name", "")}
-            qs = urlencode(args)
-            url = f"{self.url}/{self.version}/organisations/{organisation_id}/practices?{qs}"
-        else:
-            url = f"{self.url}/{self.version}/organisations/{organisation_id}/practices"
-        headers = {"Accept": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/practices", self.list_args(kwargs))
 
-        try:
-            response = requests.get(url, headers=headers, timeout=self.timeout)
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 200:
-                return json.loads(response.text)
-            elif response.status_code == 204:
-                return None
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("GET", url, ok=(200, 204))
 
+    @mapped("practice")
+    def list_page(self, organisation_id, page, per_page, **kwargs):
+        """Get a page of a list of Practices."""
+        url = self.endpoint(f"organisations/{organisation_id}/practices")
+
+        return self.get_page(url, self.list_args(kwargs), page, per_page)
+
+    @mapped("practice")
+    @cached("practices")
     def get(self, practice_id, organisation_id):
         """Get a specific Practice."""
-        url = f"{self.url}/{self.version}/organisations/{organisation_id}/practices/{practice_id}"
-        headers = {"Accept": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/practices/{practice_id}")
 
-        try:
-            response = requests.get(url, headers=headers, timeout=self.timeout)
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 200:
-                practice = json.loads(response.text)
-                practice["created_at"] = datetime.strptime(practice["created_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                if practice["updated_at"]:
-                    practice["updated_at"] = datetime.strptime(practice["updated_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                return practice
-            elif response.status_code == 404:
-                raise NotFound
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("GET", url, errors=(NotFound,))
 
+    @invalidates("roles", "people", "practices", "organisation")
     def edit(self, practice_id, name, head_id, cost_centre, organisation_id):
         """Edit a Practice with a specific ID."""
-        url = f"{self.url}/{self.version}/organisations/{organisation_id}/practices/{practice_id}"
-        headers = {"Accept": "application/json", "Content-Type": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/practices/{practice_id}")
         changed_practice = {"name": name}
         if head_id:
             changed_practice["head_id"] = head_id
         if cost_centre:
             changed_practice["cost_centre"] = cost_centre
 
-        try:
-            response = requests.put(
-                url,
-                data=json.dumps(changed_practice),
-                headers=headers,
-                timeout=self.timeout,
-            )
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 200:
-                practice = json.loads(response.text)
-                practice["created_at"] = datetime.strptime(practice["created_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                if practice["updated_at"]:
-                    practice["updated_at"] = datetime.strptime(practice["updated_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                return practice
-            elif response.status_code == 404:
-                raise NotFound
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("PUT", url, data=changed_practice, errors=(NotFound,))
 
+    @invalidates("roles", "people", "practices", "organisation")
     def delete(self, practice_id, organisation_id):
         """Delete a Practice with a specific ID."""
-        url = f"{self.url}/{self.version}/organisations/{organisation_id}/practices/{practice_id}"
-        headers = {"Accept": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/practices/{practice_id}")
 
-        try:
-            response = requests.delete(url, headers=headers, timeout=self.timeout)
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 204:
-                return None
-            elif response.status_code == 404:
-                raise NotFound
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("DELETE", url, ok=(204,), errors=(NotFound,))
 
 
 class Role(FluxAPI):
+    model = models.Role
+
+    @invalidates("roles", "people", "grades", "practices", "organisation")
     def create(self, title, grade_id, practice_id, organisation_id):
         """Create a new Role."""
-        url = f"{self.url}/{self.version}/organisations/{organisation_id}/roles"
-        headers = {"Accept": "application/json", "Content-Type": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/roles")
         new_role = {"title": title, "grade_id": grade_id}
         if practice_id:
             new_role["practice_id"] = practice_id
 
-        try:
-            response = requests.post(
-                url,
-                data=json.dumps(new_role),
-                headers=headers,
-                timeout=self.timeout,
-            )
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 201:
-                organisation = json.loads(response.text)
-                organisation["created_at"] = datetime.strptime(organisation["created_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                if organisation["updated_at"]:
-                    organisation["updated_at"] = datetime.strptime(organisation["updated_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                return organisation
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("POST", url, data=new_role, ok=(201,))
 
+    @mapped("role")
+    @cached("roles")
     def list(self, organisation_id, filters):
         """Get a list of Roles."""
-        if filters:
-            qs = urlencode(filters)
-            url = f"{self.url}/{self.version}/organisations/{organisation_id}/roles?{qs}"
-        else:
-            url = f"{self.url}/{self.version}/organisations/{organisation_id}/roles"
-        headers = {"Accept": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/roles", filters)
 
-        try:
-            response = requests.get(url, headers=headers, timeout=self.timeout)
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 200:
-                return json.loads(response.text)
-            elif response.status_code == 204:
-                return None
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("GET", url, ok=(200, 204))
+
+    @mapped("role")
+    def list_page(self, organisation_id, filters, page, per_page):
+        """Get a page of a list of Roles."""
+        url = self.endpoint(f"organisations/{organisation_id}/roles")
+
+        return self.get_page(url, filters, page, per_page)
+
+    def stream(self, organisation_id, filters):
+        """Iterate over a list of Roles as it is downloaded, for exports too large to hold in memory."""
+        url = self.endpoint(f"organisations/{organisation_id}/roles", filters)
+
+        return self.stream_list(url)
 
+    @mapped("role")
+    @cached("roles")
     def get(self, role_id, organisation_id):
         """Get a specific Role."""
-        url = f"{self.url}/{self.version}/organisations/{organisation_id}/roles/{role_id}"
-        headers = {"Accept": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/roles/{role_id}")
 
-        try:
-            response = requests.get(url, headers=headers, timeout=self.timeout)
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 200:
-                role = json.loads(response.text)
-                role["created_at"] = datetime.strptime(role["created_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                if role["updated_at"]:
-                    role["updated_at"] = datetime.strptime(role["updated_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                return role
-            elif response.status_code == 404:
-                raise NotFound
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("GET", url, errors=(NotFound,))
 
+    @invalidates("roles", "people", "grades", "practices", "organisation")
     def edit(self, role_id, title, grade_id, practice_id, organisation_id):
         """Edit a Role with a specific ID."""
-        url = f"{self.url}/{self.version}/organisations/{organisation_id}/roles/{role_id}"
-        headers = {"Accept": "application/json", "Content-Type": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/roles/{role_id}")
         changed_role = {"title": title, "grade_id": grade_id}
         if practice_id:
             changed_role["practice_id"] = practice_id
 
-        try:
-            response = requests.put(
-                url,
-                data=json.dumps(changed_role),
-                headers=headers,
-                timeout=self.timeout,
-            )
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 200:
-                role = json.loads(response.text)
-                role["created_at"] = datetime.strptime(role["created_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                if role["updated_at"]:
-                    role["updated_at"] = datetime.strptime(role["updated_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                return role
-            elif response.status_code == 404:
-                raise NotFound
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("PUT", url, data=changed_role, errors=(NotFound,))
 
+    @invalidates("roles", "people", "grades", "practices", "organisation")
     def delete(self, role_id, organisation_id):
         """Delete a Role with a specific ID."""
-        url = f"{self.url}/{self.version}/organisations/{organisation_id}/roles/{role_id}"
-        headers = {"Accept": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/roles/{role_id}")
 
-        try:
-            response = requests.delete(url, headers=headers, timeout=self.timeout)
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 204:
-                return None
-            elif response.status_code == 404:
-                raise NotFound
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("DELETE", url, ok=(204,), errors=(NotFound,))
 
 
 class Person(FluxAPI):
+    model = models.Person
+    list_filters = ("name", "role_id", "location_id")
+
+    @invalidates("people", "roles", "projects", "locations", "practices", "programmes", "managers", "organisation")
     def create(
         self,
         name,
@@ -878,8 +672,7 @@ class Person(FluxAPI):
         organisation_id,
     ):
         """Create a new Person."""
-        url = f"{self.url}/{self.version}/organisations/{organisation_id}/people"
-        headers = {"Accept": "application/json", "Content-Type": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/people")
         new_person = {
             "name": name,
             "role_id": role_id,
@@ -889,86 +682,49 @@ class Person(FluxAPI):
             "employment": employment,
         }
 
-        try:
-            response = requests.post(
-                url,
-                data=json.dumps(new_person),
-                headers=headers,
-                timeout=self.timeout,
-            )
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 201:
-                organisation = json.loads(response.text)
-                organisation["created_at"] = datetime.strptime(organisation["created_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                if organisation["updated_at"]:
-                    organisation["updated_at"] = datetime.strptime(organisation["updated_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                return organisation
-            elif response.status_code == 429:
-                raise TooManyRequests
-            elif response.status_code == 400:
-                raise BadRequest
-            else:
-                raise InternalServerError
+        return self.call("POST", url, data=new_person, ok=(201,), errors=(BadRequest,))
 
+    @mapped("person")
+    @cached("people")
     def list(self, organisation_id, **kwargs):
         """Get a list of People."""
-        if kwargs:
-            args = {
-                "name": kwargs.get("name", ""),
-                "role_id": kwargs.get("role_id", ""),
-                "location_id": kwargs.get("location_id", ""),
-            }
-            qs = urlencode(args)
-            url = f"{self.url}/{self.version}/organisations/{organisation_id}/people?{qs}"
-        else:
-            url = f"{self.url}/{self.version}/organisations/{organisation_id}/people"
-        headers = {"Accept": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/people", self.list_args(kwargs))
 
-        try:
-            response = requests.get(url, headers=headers, timeout=self.timeout)
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 200:
-                return json.loads(response.text)
-            elif response.status_code == 204:
-                return None
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("GET", url, ok=(200, 204))
+
+    @mapped("person")
+    def list_page(self, organisation_id, page, per_page, **kwargs):
+        """Get a page of a list of People."""
+        url = self.endpoint(f"organisations/{organisation_id}/people")
 
+        return self.get_page(url, self.list_args(kwargs), page, per_page)
+
+    def stream(self, organisation_id, **kwargs):
+        """Iterate over a list of People as it is downloaded, for exports too large to hold in memory."""
+        url = self.endpoint(f"organisations/{organisation_id}/people", self.list_args(kwargs))
+
+        return self.stream_list(url)
+
+    def search(self, organisation_id, **filters):
+        """Search People by any combination of name, role_id, grade_id, practice_id and location_id.
+
+        Searches are answered from an in-memory index of the organisation's whole list of People, which is rebuilt
+        once they have changed, rather than by asking upstream.
+        """
+        indexes = get_people_indexes()
+        index, token = indexes.lookup(organisation_id)
+        if index is None:
+            index = indexes.build(organisation_id, token, self.list(organisation_id=organisation_id))
+        return index.search(**filters)
+
+    @mapped("person")
     def get(self, person_id, organisation_id):
         """Get a specific Person."""
-        url = f"{self.url}/{self.version}/organisations/{organisation_id}/people/{person_id}"
-        headers = {"Accept": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/people/{person_id}")
 
-        try:
-            response = requests.get(url, headers=headers, timeout=self.timeout)
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 200:
-                person = json.loads(response.text)
-                person["created_at"] = datetime.strptime(person["created_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                if person["updated_at"]:
-                    person["updated_at"] = datetime.strptime(person["updated_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                return person
-            elif response.status_code == 404:
-                raise NotFound
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("GET", url, errors=(NotFound,))
 
+    @invalidates("people", "roles", "projects", "locations", "practices", "programmes", "managers", "organisation")
     def edit(
         self,
         person_id,
@@ -981,8 +737,7 @@ class Person(FluxAPI):
         organisation_id,
     ):
         """Edit a Person with a specific ID."""
-        url = f"{self.url}/{self.version}/organisations/{organisation_id}/people/{person_id}"
-        headers = {"Accept": "application/json", "Content-Type": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/people/{person_id}")
         changed_person = {
             "name": name,
             "role_id": role_id,
@@ -992,184 +747,61 @@ class Person(FluxAPI):
             "employment": employment,
         }
 
-        try:
-            response = requests.put(
-                url,
-                data=json.dumps(changed_person),
-                headers=headers,
-                timeout=self.timeout,
-            )
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 200:
-                person = json.loads(response.text)
-                person["created_at"] = datetime.strptime(person["created_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                if person["updated_at"]:
-                    person["updated_at"] = datetime.strptime(person["updated_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                return person
-            elif response.status_code == 404:
-                raise NotFound
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("PUT", url, data=changed_person, errors=(NotFound,))
 
+    @invalidates("people", "roles", "projects", "locations", "practices", "programmes", "managers", "organisation")
     def delete(self, person_id, organisation_id):
         """Delete a Person with a specific ID."""
-        url = f"{self.url}/{self.version}/organisations/{organisation_id}/people/{person_id}"
-        headers = {"Accept": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/people/{person_id}")
 
-        try:
-            response = requests.delete(url, headers=headers, timeout=self.timeout)
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 204:
-                return None
-            elif response.status_code == 404:
-                raise NotFound
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("DELETE", url, ok=(204,), errors=(NotFound,))
 
 
 class Location(FluxAPI):
+    model = models.Location
+
+    @invalidates("people", "locations", "organisation")
     def create(self, name, address, organisation_id):
         """Create a new Location."""
-        url = f"{self.url}/{self.version}/organisations/{organisation_id}/locations"
-        headers = {"Accept": "application/json", "Content-Type": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/locations")
         new_location = {"name": name, "address": address}
 
-        try:
-            response = requests.post(
-                url,
-                data=json.dumps(new_location),
-                headers=headers,
-                timeout=self.timeout,
-            )
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 201:
-                location = json.loads(response.text)
-                location["created_at"] = datetime.strptime(location["created_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                if location["updated_at"]:
-                    location["updated_at"] = datetime.strptime(location["updated_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                return location
-            elif response.status_code == 409:
-                raise Conflict
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("POST", url, data=new_location, ok=(201,), errors=(Conflict,))
 
+    @mapped("location")
+    @cached("locations")
     def list(self, organisation_id, **kwargs):
         """Get a list of Locations."""
-        if kwargs:
-            args = {"name": kwargs.get("name", "")}
-            qs = urlencode(args)
-            url = f"{self.url}/{self.version}/organisations/{organisation_id}/locations?{qs}"
-        else:
-            url = f"{self.url}/{self.version}/organisations/{organisation_id}/locations"
-        headers = {"Accept": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/locations", self.list_args(kwargs))
 
-        try:
-            response = requests.get(url, headers=headers, timeout=self.timeout)
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 200:
-                return json.loads(response.text)
-            elif response.status_code == 204:
-                return None
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("GET", url, ok=(200, 204))
+
+    @mapped("location")
+    def list_page(self, organisation_id, page, per_page, **kwargs):
+        """Get a page of a list of Locations."""
+        url = self.endpoint(f"organisations/{organisation_id}/locations")
 
+        return self.get_page(url, self.list_args(kwargs), page, per_page)
+
+    @mapped("location")
+    @cached("locations")
     def get(self, location_id, organisation_id):
         """Get a Location with a specific ID."""
-        url = f"{self.url}/{self.version}/organisations/{organisation_id}/locations/{location_id}"
-        headers = {"Accept": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/locations/{location_id}")
 
-        try:
-            response = requests.get(url, headers=headers, timeout=self.timeout)
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 200:
-                location = json.loads(response.text)
-                location["created_at"] = datetime.strptime(location["created_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                if location["updated_at"]:
-                    location["updated_at"] = datetime.strptime(location["updated_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                return location
-            elif response.status_code == 404:
-                raise NotFound
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("GET", url, errors=(NotFound,))
 
+    @invalidates("people", "locations", "organisation")
     def edit(self, location_id, name, address, organisation_id):
         """Edit a Location with a specific ID."""
-        url = f"{self.url}/{self.version}/organisations/{organisation_id}/locations/{location_id}"
-        headers = {"Accept": "application/json", "Content-Type": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/locations/{location_id}")
         changed_location = {"name": name, "address": address}
 
-        try:
-            response = requests.put(
-                url,
-                data=json.dumps(changed_location),
-                headers=headers,
-                timeout=self.timeout,
-            )
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 200:
-                location = json.loads(response.text)
-                location["created_at"] = datetime.strptime(location["created_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                if location["updated_at"]:
-                    location["updated_at"] = datetime.strptime(location["updated_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
-                return location
-            elif response.status_code == 404:
-                raise NotFound
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("PUT", url, data=changed_location, errors=(NotFound,))
 
+    @invalidates("people", "locations", "organisation")
     def delete(self, location_id, organisation_id):
         """Delete a Location with a specific ID."""
-        url = f"{self.url}/{self.version}/organisations/{organisation_id}/locations/{location_id}"
-        headers = {"Accept": "application/json"}
+        url = self.endpoint(f"organisations/{organisation_id}/locations/{location_id}")
 
-        try:
-            response = requests.delete(url, headers=headers, timeout=self.timeout)
-        except requests.exceptions.Timeout:
-            raise RequestTimeout
-        except requests.exceptions.ConnectionError:
-            raise InternalServerError
-        else:
-            if response.status_code == 204:
-                return None
-            elif response.status_code == 404:
-                raise NotFound
-            elif response.status_code == 429:
-                raise TooManyRequests
-            else:
-                raise InternalServerError
+        return self.call("DELETE", url, ok=(204,), errors=(NotFound,))
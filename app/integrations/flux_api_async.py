@@ -0,0 +1,247 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+import weakref
+from functools import wraps
+from urllib.parse import urlencode
+
+import httpx
+from app.integrations import flux_api
+from app.integrations.cache import get_cache, off_loop
+from app.integrations.circuit_breaker import get_circuit_breaker
+from app.integrations.deadline import get_timeout
+from app.integrations.degraded import UNAVAILABLE_ERRORS
+from app.integrations.flux_api import FluxAPI
+from app.integrations.pagination import page_args, paginate
+from app.integrations.retry import Retry
+from app.integrations.search_index import get_people_indexes
+from app.integrations.single_flight import get_single_flight
+from app.integrations.utils import MISSING
+from flask import current_app
+from werkzeug.exceptions import InternalServerError, RequestTimeout
+
+# The event loop async views run in, kept running in a thread of its own for the life of the worker process
+_loop = None
+_loop_pid = None
+_loop_lock = threading.Lock()
+
+
+def get_loop():
+    """Get the event loop for running async views in this worker process, starting it on first use.
+
+    The loop lasts as long as the process, and so does the pooled client for it, so that connections and the
+    client's SSL context are reused from one request to the next rather than made afresh for each.
+    """
+    global _loop, _loop_pid
+    if _loop is None or _loop_pid != os.getpid():
+        with _loop_lock:
+            if _loop is None or _loop_pid != os.getpid():
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="flux-api-loop", daemon=True).start()
+                _loop, _loop_pid = loop, os.getpid()
+    return _loop
+
+
+def run(coroutine):
+    """Run a coroutine in the worker's event loop, waiting for its result.
+
+    It runs in a copy of the caller's context, so it sees the current app and request. As with asgiref's
+    ``async_to_sync``, which Flask runs async views with otherwise, context variables it sets are copied back once it
+    finishes, such as the request context ``stream_with_context`` pushes to stream a response after the view returns.
+    """
+    context = None
+
+    async def run_in_context():
+        nonlocal context
+        try:
+            return await coroutine
+        finally:
+            context = contextvars.copy_context()
+
+    try:
+        return asyncio.run_coroutine_threadsafe(run_in_context(), get_loop()).result()
+    finally:
+        for variable, value in (context or {}).items():
+            if variable.get(MISSING) is not value:
+                variable.set(value)
+
+
+def create_client(config):
+    """Create a new async HTTP client with a connection pool sized from the app config."""
+    limits = httpx.Limits(
+        max_connections=config["FLUX_API_POOL_SIZE"],
+        max_keepalive_connections=config["FLUX_API_POOL_SIZE"] if config["FLUX_API_KEEP_ALIVE"] else 0,
+    )
+    timeout = httpx.Timeout(config["TIMEOUT"], connect=config["FLUX_API_CONNECT_TIMEOUT"])
+    return httpx.AsyncClient(limits=limits, timeout=timeout)
+
+
+def get_clients():
+    """Get the current app's async HTTP clients, keyed by the event loop each is bound to."""
+    return current_app.extensions.setdefault("flux_api_async_clients", weakref.WeakKeyDictionary())
+
+
+def get_client():
+    """Get the pooled async HTTP client for the running event loop, creating it on first use.
+
+    Async views all run in the worker's event loop, see ``get_loop``, so its client is shared by every call they make.
+    A coroutine run in an event loop of its own should use ``close_client`` before the loop finishes, to release its
+    connections.
+    """
+    loop = asyncio.get_running_loop()
+    clients = get_clients()
+    client = clients.get(loop)
+    if client is None:
+        client = clients[loop] = create_client(current_app.config)
+    return client
+
+
+async def close_client():
+    """Close the async HTTP client for the running event loop, if one was created."""
+    client = get_clients().pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def closing_client(func):
+    """Wrap an async function so the client for its event loop is closed once it returns."""
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            await close_client()
+
+    return wrapper
+
+
+class AsyncFluxAPI(FluxAPI):
+    """Async counterpart of FluxAPI, sharing its request preparation, revalidation and decoding.
+
+    Each async resource is its FluxAPI resource with this mixed in first, so that its methods send their requests
+    through the async ``call`` and ``get_page`` here and return coroutines. Lists can't be streamed.
+    """
+
+    asynchronous = True
+
+    def __init__(self):
+        self.url = current_app.config["FLUX_API_URL"]
+        self.version = current_app.config["FLUX_API_VERSION"]
+        self.timeout = (current_app.config["FLUX_API_CONNECT_TIMEOUT"], current_app.config["TIMEOUT"])
+
+    async def request(self, method, url, data=None):
+        """Send a request to the Flux API, raising RequestTimeout or InternalServerError if it can't be reached.
+
+        Conditional requests, retries, circuit breaking, single flight and falling back to the last known result
+        work as they do for FluxAPI.request.
+        """
+        single_flight = get_single_flight() if method == "GET" else None
+        try:
+            if single_flight:
+                response = await single_flight.do_async(
+                    f"{method} {url}", lambda: self.send_with_retries(method, url, data)
+                )
+            else:
+                response = await self.send_with_retries(method, url, data)
+        except UNAVAILABLE_ERRORS:
+            response = self.fall_back(method, url)
+            if response is None:
+                raise
+            return response
+        return self.check_available(method, url, response)
+
+    async def send_with_retries(self, method, url, data=None):
+        """Send a request, retrying it as ``Retry`` allows."""
+        headers, data, validated = self.prepare(method, url, data)
+        retry = Retry(method)
+
+        while True:
+            try:
+                response = await self.send(method, url, data, headers, validated)
+            except (RequestTimeout, InternalServerError):
+                delay = retry.delay()
+                if delay is None:
+                    raise
+            else:
+                delay = retry.delay(response)
+                if delay is None:
+                    return response
+            await asyncio.sleep(delay)
+
+    async def call(self, method, url, data=None, ok=(200,), errors=(), model=None):
+        """Send a request to the Flux API and get its result, as FluxAPI.call does."""
+        return self.result(await self.request(method, url, data), ok, errors, model)
+
+    async def get_page(self, url, args, page, per_page):
+        """Get a single page of a list of entities, as FluxAPI.get_page does."""
+        qs = urlencode({**args, **page_args(page, per_page)})
+
+        return paginate(await self.call("GET", f"{url}?{qs}", ok=(200, 204)), page, per_page)
+
+    async def send(self, method, url, data, headers, validated):
+        """Make a single attempt at a request, unless the endpoint's circuit breaker is open."""
+        connect, read = get_timeout(*self.timeout)
+        breaker = get_circuit_breaker(method, url)
+        permit = breaker.allow() if breaker else None
+        if breaker and not permit:
+            self.reject()
+
+        start = time.perf_counter()
+        try:
+            try:
+                response = await get_client().request(
+                    method, url, content=data, headers=headers, timeout=httpx.Timeout(read, connect=connect)
+                )
+            except httpx.TimeoutException:
+                self.record(method, url, breaker, permit, start)
+                raise RequestTimeout
+            except httpx.TransportError:
+                self.record(method, url, breaker, permit, start)
+                raise InternalServerError
+
+            self.record(method, url, breaker, permit, start, response, len(response.content))
+        finally:
+            if breaker:
+                breaker.release(permit)
+        return self.received(response, validated)
+
+
+class Organisation(AsyncFluxAPI, flux_api.Organisation):
+    pass
+
+
+class Programme(AsyncFluxAPI, flux_api.Programme):
+    pass
+
+
+class Project(AsyncFluxAPI, flux_api.Project):
+    pass
+
+
+class Grade(AsyncFluxAPI, flux_api.Grade):
+    pass
+
+
+class Practice(AsyncFluxAPI, flux_api.Practice):
+    pass
+
+
+class Role(AsyncFluxAPI, flux_api.Role):
+    pass
+
+
+class Person(AsyncFluxAPI, flux_api.Person):
+    async def search(self, organisation_id, **filters):
+        """Search People as FluxAPI's Person.search does, looking up the organisation's index off the event loop."""
+        indexes = get_people_indexes()
+        index, token = await off_loop(get_cache(), indexes.lookup, organisation_id)
+        if index is None:
+            index = indexes.build(organisation_id, token, await self.list(organisation_id=organisation_id))
+        return index.search(**filters)
+
+
+class Location(AsyncFluxAPI, flux_api.Location):
+    pass
@@ -0,0 +1,119 @@
+import json
+from functools import wraps
+
+from app.integrations.utils import MISSING, bind_arguments
+from flask import current_app, g, has_app_context
+
+
+class IdentityMap:
+    """Flux API results already fetched during the current request.
+
+    Entities are held individually, keyed by resource, organisation and ID, so that a ``get`` can be satisfied by
+    an earlier ``list`` that included the entity. Other results are keyed by method and arguments.
+    """
+
+    def __init__(self):
+        self.entities = {}
+        self.results = {}
+        self.avoided = 0
+
+    def clear(self):
+        self.entities.clear()
+        self.results.clear()
+
+
+def get_identity_map():
+    """Get the identity map for the current request, or None outside of an app context."""
+    if not has_app_context():
+        return None
+    return g.setdefault("identity_map", IdentityMap())
+
+
+def clear_identity_map():
+    """Forget everything fetched so far in the current request, after a write may have changed it."""
+    identity_map = get_identity_map()
+    if identity_map is not None:
+        identity_map.clear()
+
+
+def _lookup(identity_map, resource, method, arguments):
+    """Find an earlier result of a resource method, returning it with the store and key it belongs under."""
+    if method.__name__ == "get":
+        store = identity_map.entities
+        key = (resource, str(arguments.get("organisation_id")), str(arguments[f"{resource}_id"]))
+    else:
+        store = identity_map.results
+        key = (method.__qualname__, json.dumps(arguments, sort_keys=True, default=str))
+
+    result = store.get(key, MISSING)
+    if result is not MISSING:
+        identity_map.avoided += 1
+    return result, store, key
+
+
+def _remember(identity_map, resource, method, arguments, result, store, key):
+    """Store the result of a resource method, adding each item of a list or page as an entity."""
+    store[key] = result
+    if method.__name__ in ("list", "list_page"):
+        organisation_id = str(arguments.get("organisation_id"))
+        for item in result or []:
+            item_organisation_id = item["id"] if resource == "organisation" else organisation_id
+            identity_map.entities.setdefault((resource, item_organisation_id, item["id"]), item)
+
+
+def mapped(resource):
+    """Share the results of a resource method within the current request.
+
+    ``get`` methods look up a single entity. ``list`` and ``list_page`` methods store their results and add each item
+    to the map as an entity. Any other method, such as ``Project.managers``, only stores its results. Methods are
+    mapped for both the plain and async clients, whose resources share them, see ``FluxAPI.asynchronous``.
+    """
+
+    def decorator(method):
+        async def async_wrapper(self, *args, **kwargs):
+            identity_map = get_identity_map()
+            if identity_map is None:
+                return await method(self, *args, **kwargs)
+
+            arguments = bind_arguments(method, self, args, kwargs)
+            result, store, key = _lookup(identity_map, resource, method, arguments)
+            if result is MISSING:
+                result = await method(self, *args, **kwargs)
+                _remember(identity_map, resource, method, arguments, result, store, key)
+            return result
+
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self.asynchronous:
+                return async_wrapper(self, *args, **kwargs)
+
+            identity_map = get_identity_map()
+            if identity_map is None:
+                return method(self, *args, **kwargs)
+
+            arguments = bind_arguments(method, self, args, kwargs)
+            result, store, key = _lookup(identity_map, resource, method, arguments)
+            if result is MISSING:
+                result = method(self, *args, **kwargs)
+                _remember(identity_map, resource, method, arguments, result, store, key)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def init_app(app):
+    """Report calls avoided by the identity map in debug mode, and discard the map at the end of each request."""
+
+    @app.after_request
+    def report_avoided_calls(response):
+        identity_map = g.get("identity_map")
+        if current_app.debug and identity_map is not None:
+            response.headers["X-Flux-API-Calls-Avoided"] = str(identity_map.avoided)
+            current_app.logger.debug(f"Flux API calls avoided: {identity_map.avoided}")
+        return response
+
+    @app.teardown_request
+    def discard_identity_map(exception):
+        g.pop("identity_map", None)
@@ -0,0 +1,295 @@
+import json
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+from app import metrics
+from app.integrations.circuit_breaker import endpoint
+from app.metrics import LATENCY_BUCKETS
+from flask import current_app, g, has_app_context, request
+from jinja2 import Template
+
+
+class Histogram:
+    """Counts of observed values in buckets, each holding the values up to its upper bound, with their sum."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Estimate a quantile by interpolating within the bucket it falls in, as Prometheus does."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, self.counts):
+            if count and seen + count >= rank:
+                return lower + (bound - lower) * (rank - seen) / count
+            seen += count
+            lower = bound
+        return self.buckets[-1]
+
+    def snapshot(self):
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 4),
+            "p50": round(self.quantile(0.5), 4),
+            "p95": round(self.quantile(0.95), 4),
+            "buckets": buckets,
+        }
+
+
+class Call:
+    """A single attempt at a Flux API request. The status is None if no response was received."""
+
+    __slots__ = ("method", "url", "endpoint", "status", "duration", "size", "in_template")
+
+    def __init__(self, method, url, status, duration, size, in_template=False):
+        self.method = method
+        self.url = url
+        self.endpoint = endpoint(method, url)
+        self.status = status
+        self.duration = duration
+        self.size = size
+        self.in_template = in_template
+
+    @property
+    def retryable(self):
+        """Whether the attempt failed in a way that is retried, so that it doesn't count as a round trip made."""
+        return self.status is None or self.status >= 500 or self.status == 429
+
+
+class EndpointStats:
+    """The latency histogram, response statuses and bytes received for calls to one Flux API endpoint."""
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.statuses = {}
+        self.bytes = 0
+
+    def record(self, call):
+        self.latency.observe(call.duration)
+        status = str(call.status or "error")
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.bytes += call.size
+
+    def snapshot(self):
+        return {"latency": self.latency.snapshot(), "statuses": dict(self.statuses), "bytes": self.bytes}
+
+
+class UpstreamStats:
+    """Statistics on the calls made to each Flux API endpoint, such as ``GET /v1/organisations/{id}/grades``."""
+
+    def __init__(self):
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def record(self, call):
+        with self._lock:
+            stats = self._endpoints.get(call.endpoint)
+            if stats is None:
+                stats = self._endpoints[call.endpoint] = EndpointStats()
+            stats.record(call)
+
+    def snapshot(self):
+        with self._lock:
+            return {name: stats.snapshot() for name, stats in sorted(self._endpoints.items())}
+
+
+class RequestTimings:
+    """Where the time handling the current request has gone: Flux API calls, and rendering templates."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.calls = []
+        self.render = 0.0
+        self.rendering = 0
+        self._lock = threading.Lock()
+
+    def add(self, call):
+        with self._lock:
+            self.calls.append(call)
+
+    def round_trips(self):
+        """The calls that got a response, leaving out failed attempts that were retried."""
+        with self._lock:
+            return [call for call in self.calls if not call.retryable]
+
+    @property
+    def upstream(self):
+        """Seconds spent on Flux API calls. Calls made concurrently are each counted in full."""
+        with self._lock:
+            return sum(call.duration for call in self.calls)
+
+    @property
+    def upstream_bytes(self):
+        with self._lock:
+            return sum(call.size for call in self.calls)
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+
+def get_upstream_stats():
+    """Get the Flux API call statistics for the current app."""
+    if "flux_api_upstream" not in current_app.extensions:
+        current_app.extensions["flux_api_upstream"] = UpstreamStats()
+    return current_app.extensions["flux_api_upstream"]
+
+
+def get_request_timings():
+    """Get the timings for the current request, or None outside of an app context.
+
+    Timings normally start with the request, but outside of one they start with the first call that needs them.
+    """
+    if not has_app_context():
+        return None
+    return g.setdefault("flux_api_timings", RequestTimings())
+
+
+def record_call(method, url, status, duration, size=0):
+    """Record an attempt at a Flux API request, for its endpoint's statistics, Prometheus metrics and the current
+    request's timings."""
+    timings = get_request_timings()
+    call = Call(method, url, status, duration, size, in_template=bool(timings and timings.rendering))
+    get_upstream_stats().record(call)
+    metrics.record_call(call)
+    if timings is not None:
+        timings.add(call)
+
+
+class CallBudgetExceeded(Exception):
+    """A view made more Flux API calls than its budget, while FLUX_API_ENFORCE_CALL_BUDGETS is set."""
+
+
+def call_budget(calls):
+    """Declare the most Flux API round trips a view should make to handle a request, with a cold cache.
+
+    Apply it directly to the view function, beneath any other decorators. Requests over budget are warned about in
+    debug mode, and raise ``CallBudgetExceeded`` when FLUX_API_ENFORCE_CALL_BUDGETS is set, as it is in tests.
+    """
+
+    def decorator(view):
+        view.flux_api_call_budget = calls
+        return view
+
+    return decorator
+
+
+def get_call_budget(endpoint):
+    """Get the Flux API call budget declared by the view of an endpoint, or None if it hasn't declared one."""
+    return getattr(current_app.view_functions.get(endpoint), "flux_api_call_budget", None)
+
+
+def wasteful_calls(timings, budget=None):
+    """Describe the ways a request's Flux API calls look wasteful: more round trips than the budget, the same GET
+    made more than once, or an endpoint called repeatedly while rendering templates, such as once per table row."""
+    calls = timings.round_trips()
+    problems = []
+    if budget is not None and len(calls) > budget:
+        problems.append(f"{len(calls)} Flux API calls made, over the budget of {budget}")
+    repeated = Counter(call.url for call in calls if call.method == "GET")
+    problems += [f"GET {url} called {count} times" for url, count in repeated.items() if count > 1]
+    in_templates = Counter(call.endpoint for call in calls if call.in_template)
+    problems += [
+        f"{name} called {count} times while rendering templates" for name, count in in_templates.items() if count > 1
+    ]
+    return problems
+
+
+def server_timing(timings):
+    """Format a request's timings as a Server-Timing header value, with durations in milliseconds."""
+    total = timings.elapsed()
+    upstream = timings.upstream
+    return ", ".join(
+        (
+            f'flux-api;dur={upstream * 1000:.1f};desc="Flux API ({len(timings.calls)} calls)"',
+            f"render;dur={timings.render * 1000:.1f}",
+            f"app;dur={max(total - upstream - timings.render, 0) * 1000:.1f}",
+            f"total;dur={total * 1000:.1f}",
+        )
+    )
+
+
+class TimedTemplate(Template):
+    """A Jinja template that adds the time spent rendering it to the current request's timings."""
+
+    def render(self, *args, **kwargs):
+        timings = get_request_timings()
+        if timings is None:
+            return super().render(*args, **kwargs)
+        start = time.perf_counter()
+        timings.rendering += 1
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            timings.rendering -= 1
+            timings.render += time.perf_counter() - start
+
+
+def check_calls(timings, response):
+    """Check the current request's Flux API calls against its view's budget, raising ``CallBudgetExceeded`` if it's
+    over budget and budgets are enforced. In debug mode, report the calls made and warn of any that look wasteful."""
+    budget = get_call_budget(request.endpoint)
+    if budget is not None and current_app.config["FLUX_API_ENFORCE_CALL_BUDGETS"]:
+        made = len(timings.round_trips())
+        if made > budget:
+            raise CallBudgetExceeded(f"{request.method} {request.path} made {made} Flux API calls, budget {budget}")
+    if current_app.debug:
+        response.headers["X-Flux-API-Calls"] = str(len(timings.round_trips()))
+        for problem in wasteful_calls(timings, budget):
+            current_app.logger.warning(f"{request.method} {request.path}: {problem}")
+
+
+def init_app(app):
+    """Time each request's Flux API calls and template rendering, reporting them in a Server-Timing header and a
+    structured log line per request, and check them against the view's call budget."""
+    app.jinja_env.template_class = TimedTemplate
+
+    @app.before_request
+    def start_timings():
+        g.flux_api_timings = RequestTimings()
+
+    @app.after_request
+    def report_timings(response):
+        timings = g.get("flux_api_timings")
+        if timings is None:
+            return response
+        check_calls(timings, response)
+        if current_app.config["SERVER_TIMING"]:
+            response.headers["Server-Timing"] = server_timing(timings)
+        current_app.logger.info(
+            json.dumps(
+                {
+                    "method": request.method,
+                    "path": request.path,
+                    "endpoint": request.endpoint,
+                    "status": response.status_code,
+                    "duration_ms": round(timings.elapsed() * 1000, 1),
+                    "render_ms": round(timings.render * 1000, 1),
+                    "upstream_calls": len(timings.calls),
+                    "upstream_ms": round(timings.upstream * 1000, 1),
+                    "upstream_bytes": timings.upstream_bytes,
+                }
+            )
+        )
+        return response
+
+    @app.teardown_request
+    def discard_timings(exception):
+        g.pop("flux_api_timings", None)
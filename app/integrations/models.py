@@ -0,0 +1,216 @@
+import threading
+import weakref
+
+# Fields that every entity has
+COMMON_FIELDS = ("id", "organisation", "created_at", "updated_at")
+
+
+class Entity:
+    """A Flux API entity, holding its fields in slots rather than a dict per instance.
+
+    Fields can be read as attributes, as Jinja templates do, or by key, as dicts are, so that existing code keeps
+    working. A field the response didn't include is missing, raising AttributeError or KeyError, rather than None.
+    Fields outside those declared are kept in ``_extra``. Entities are shared between requests and must not be
+    changed once decoded.
+    """
+
+    __slots__ = COMMON_FIELDS + ("_extra", "__weakref__")
+    fields = COMMON_FIELDS
+
+    def __init_subclass__(cls):
+        # Set fields through their slot descriptors directly, which is quicker than going through setattr
+        cls._setters = {name: getattr(cls, name).__set__ for name in cls.fields}
+
+    def __init__(self, **values):
+        extra = None
+        setters = self._setters
+        for name, value in values.items():
+            setter = setters.get(name)
+            if setter is not None:
+                setter(self, value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[name] = value
+        object.__setattr__(self, "_extra", extra)
+
+    def __getattr__(self, name):
+        # Only called for fields that aren't set
+        extra = object.__getattribute__(self, "_extra")
+        if extra is not None and name in extra:
+            return extra[name]
+        raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} entities can't be changed")
+
+    def __getitem__(self, key):
+        if key in self.fields:
+            try:
+                return object.__getattribute__(self, key)
+            except AttributeError:
+                pass
+        elif self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def items(self):
+        for name in self.fields:
+            try:
+                yield name, object.__getattribute__(self, name)
+            except AttributeError:
+                pass
+        if self._extra:
+            yield from self._extra.items()
+
+    def keys(self):
+        return [name for name, _ in self.items()]
+
+    def to_dict(self):
+        """Get the entity's fields as a dict, with nested entities as dicts too."""
+        return {name: value.to_dict() if isinstance(value, Entity) else value for name, value in self.items()}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{name}={value!r}' for name, value in self.items())})"
+
+
+class Organisation(Entity):
+    fields = COMMON_FIELDS + (
+        "name",
+        "domain",
+        "grades",
+        "locations",
+        "people",
+        "practices",
+        "programmes",
+        "projects",
+        "roles",
+    )
+    __slots__ = fields[len(COMMON_FIELDS) :]
+
+
+class Programme(Entity):
+    fields = COMMON_FIELDS + ("name", "manager", "projects")
+    __slots__ = fields[len(COMMON_FIELDS) :]
+
+
+class Project(Entity):
+    fields = COMMON_FIELDS + ("name", "status", "manager", "programme")
+    __slots__ = fields[len(COMMON_FIELDS) :]
+
+
+class Grade(Entity):
+    fields = COMMON_FIELDS + ("name", "roles")
+    __slots__ = fields[len(COMMON_FIELDS) :]
+
+
+class Practice(Entity):
+    fields = COMMON_FIELDS + ("name", "head", "cost_centre", "roles")
+    __slots__ = fields[len(COMMON_FIELDS) :]
+
+
+class Role(Entity):
+    fields = COMMON_FIELDS + ("title", "grade", "practice", "people")
+    __slots__ = fields[len(COMMON_FIELDS) :]
+
+
+class Person(Entity):
+    fields = COMMON_FIELDS + ("name", "email_address", "full_time_equivalent", "employment", "role", "location")
+    __slots__ = fields[len(COMMON_FIELDS) :]
+
+
+class Location(Entity):
+    fields = COMMON_FIELDS + ("name", "address", "people")
+    __slots__ = fields[len(COMMON_FIELDS) :]
+
+
+MODELS = {
+    model.__name__: model for model in (Organisation, Programme, Project, Grade, Practice, Role, Person, Location)
+}
+
+# The model of the entity each nested reference field refers to
+REFERENCES = {
+    "organisation": Organisation,
+    "programme": Programme,
+    "manager": Person,
+    "head": Person,
+    "grade": Grade,
+    "practice": Practice,
+    "role": Role,
+    "location": Location,
+}
+
+
+class Interner:
+    """Shares one instance of each distinct nested reference, so that, for example, the grade of every role in an
+    organisation's list of people is the same object rather than a copy per person.
+
+    References are keyed by their model and all of their values, which include their ID, so references to the same
+    entity from different organisations can never be confused. They are only held while an entity refers to them.
+    """
+
+    def __init__(self):
+        self._references = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def intern(self, key, model, values):
+        with self._lock:
+            reference = self._references.get(key)
+            if reference is None:
+                reference = self._references[key] = model(**values)
+            return reference
+
+
+_interner = Interner()
+
+
+def build(model, values, seen=None):
+    """Build an entity from its decoded JSON object, building and interning its nested references too.
+
+    Within a single response, a reference is the same wherever it appears, so references already built from the same
+    response can be passed in seen, keyed by model, ID and fields, to skip building and interning them again.
+    """
+    return model(**_references(values, {} if seen is None else seen))
+
+
+def _references(values, seen):
+    for name, value in values.items():
+        if type(value) is dict and name in REFERENCES:
+            model = REFERENCES[name]
+            shape = (model, value.get("id"), tuple(value))
+            reference = seen.get(shape)
+            if reference is None:
+                _references(value, seen)
+                try:
+                    key = (model, tuple(value.items()))
+                    hash(key)
+                except TypeError:
+                    reference = model(**value)
+                else:
+                    reference = _interner.intern(key, model, value)
+                seen[shape] = reference
+            values[name] = reference
+    return values
+
+
+def build_all(model, result):
+    """Build an entity, or each entity in a list, from decoded JSON, leaving anything else as it is."""
+    if isinstance(result, dict):
+        return build(model, result)
+    if isinstance(result, list):
+        seen = {}
+        return [build(model, item, seen) if isinstance(item, dict) else item for item in result]
+    return result
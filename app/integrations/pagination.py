@@ -0,0 +1,100 @@
+from app.integrations.deadline import start_deadline
+
+
+class Page:
+    """One page of a list of entities. Iterating over a page iterates over the entities on it.
+
+    Whether there is a next page is known, but not the total number of pages, so that upstream never has to count.
+    A page sliced from a whole list held locally keeps the whole list as ``whole``. A page made from what upstream
+    returned for it keeps that list, with its extra entity, as ``fetched``.
+    """
+
+    def __init__(self, items, page, per_page, has_next, whole=None, fetched=None):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.has_next = has_next
+        self.whole = whole
+        self.fetched = items if fetched is None else fetched
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def has_previous(self):
+        return self.page > 1
+
+    @property
+    def first(self):
+        """The position of the first entity on this page in the whole list, counting from 1."""
+        return (self.page - 1) * self.per_page + 1
+
+    @property
+    def last(self):
+        """The position of the last entity on this page in the whole list."""
+        return self.first + len(self.items) - 1
+
+
+def page_args(page, per_page):
+    """Query string arguments that ask upstream for a page, plus one more entity to show whether there's a next page."""
+    return {"offset": (page - 1) * per_page, "limit": per_page + 1}
+
+
+def paginate(items, page, per_page):
+    """Make a Page from the list upstream returned for ``page_args``.
+
+    If upstream ignored the offset and limit and returned a whole list longer than a page, the page is sliced from it
+    instead. A whole list no longer than a page and its extra entity can't be told apart from a page by its length,
+    so callers that walk every page, as ``iter_pages`` does, check that each page doesn't start like the first.
+    """
+    items = items or []
+    if len(items) > per_page + 1:
+        return slice_page(items, page, per_page)
+    return Page(items[:per_page], page, per_page, len(items) > per_page, fetched=items)
+
+
+def slice_page(items, page, per_page):
+    """Make a Page from a whole list that is already held locally."""
+    whole = items
+    items = items[(page - 1) * per_page : page * per_page + 1]
+    return Page(items[:per_page], page, per_page, len(items) > per_page, whole)
+
+
+def first_id(items):
+    """Get the ID of the first entity in a list, or None if it's empty."""
+    return items[0]["id"] if items else None
+
+
+def iter_pages(list_page, per_page, **kwargs):
+    """Iterate over every entity in a paginated list, fetching each page as the one before it runs out.
+
+    The first page is fetched straight away, so that errors are raised before iteration starts. The pages after it are
+    fetched while a response streams, long after the request's deadline has started, so each gets a deadline of its
+    own. If upstream ignored the offset and limit and returned the whole list, it is iterated over without fetching
+    it again for every page: either it was longer than a page, or a later page starts with the same entity as the
+    first. Iteration also stops at a page that starts with the same entity as the page before it, so that an upstream
+    that repeats itself can't keep a download going for ever.
+    """
+    first = list_page(page=1, per_page=per_page, **kwargs)
+
+    def entities():
+        page = previous = first
+        while True:
+            if page is not first and page.fetched and first_id(page.fetched) == first_id(first.fetched):
+                page = slice_page(page.fetched, page.page, per_page)
+            if page.whole is not None:
+                yield from page.whole[(page.page - 1) * per_page :]
+                return
+            if page is not first and first_id(page.items) in (None, first_id(previous.items)):
+                return
+            yield from page
+            if not page.has_next:
+                return
+            start_deadline()
+            previous = page
+            page = list_page(page=page.page + 1, per_page=per_page, **kwargs)
+
+    return entities()
@@ -0,0 +1,122 @@
+import random
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from app.integrations.deadline import get_deadline
+from app.integrations.degraded import get_degraded_mode
+from flask import current_app, g
+
+# Requests that can safely be sent more than once
+IDEMPOTENT_METHODS = ("GET", "PUT", "DELETE")
+
+# Responses worth retrying, as upstream may well succeed on a later attempt
+RETRYABLE_STATUS_CODES = (429, 502, 503, 504)
+
+
+class RetryStats:
+    """Counts Flux API requests, the retries made for them, and the retries that were wanted but not allowed."""
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.gave_up = 0
+        self._lock = threading.Lock()
+
+    def record(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "gave_up": self.gave_up,
+                "retry_rate": round(self.retries / self.requests, 3) if self.requests else 0.0,
+            }
+
+
+class RetryBudget:
+    """The number of retries left for the current request, shared by all of its Flux API calls."""
+
+    def __init__(self, retries):
+        self.remaining = retries
+        self._lock = threading.Lock()
+
+    def spend(self):
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+
+def get_retry_stats():
+    """Get the retry counters for the current app."""
+    if "flux_api_retries" not in current_app.extensions:
+        current_app.extensions["flux_api_retries"] = RetryStats()
+    return current_app.extensions["flux_api_retries"]
+
+
+def get_retry_budget():
+    """Get the retry budget for the current request, so that retries can't multiply the load on a failing upstream."""
+    return g.setdefault("flux_api_retry_budget", RetryBudget(current_app.config["FLUX_API_RETRY_BUDGET"]))
+
+
+def retry_after(response):
+    """Get the number of seconds a response's Retry-After header asks for, or None if it doesn't have one."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        return max((parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class Retry:
+    """Decides whether, and after how long, each failed attempt at a Flux API request should be retried.
+
+    Only idempotent requests are retried, after connection failures, timeouts and retryable responses. Each retry
+    waits for the time asked for by Retry-After, or otherwise for an exponential backoff with full jitter. A request
+    gives up once it has been retried FLUX_API_RETRIES times, when Retry-After asks for longer than
+    FLUX_API_RETRY_MAX_BACKOFF or would take it past the current request's deadline, when the current request's
+    retry budget is spent, or while the UI is degraded because the Flux API is unavailable.
+    """
+
+    def __init__(self, method):
+        self.method = method
+        self.attempts = 0
+        self.stats = get_retry_stats()
+        self.stats.record("requests")
+
+    def delay(self, response=None):
+        """Get how many seconds to wait before retrying, or None if the request shouldn't be retried.
+
+        Pass the response if one was received, or nothing if the attempt failed to get one.
+        """
+        if self.method not in IDEMPOTENT_METHODS:
+            return None
+        if response is not None and response.status_code not in RETRYABLE_STATUS_CODES:
+            return None
+
+        config = current_app.config
+        delay = retry_after(response) if response is not None else None
+        if delay is None:
+            backoff = min(config["FLUX_API_RETRY_MAX_BACKOFF"], config["FLUX_API_RETRY_BACKOFF"] * 2 ** self.attempts)
+            delay = random.uniform(0, backoff)  # nosec: jitter, not security sensitive
+
+        deadline = get_deadline()
+        allowed = self.attempts < config["FLUX_API_RETRIES"] and delay <= config["FLUX_API_RETRY_MAX_BACKOFF"]
+        if (deadline and delay >= deadline.remaining()) or get_degraded_mode().active:
+            allowed = False
+        if not allowed or not get_retry_budget().spend():
+            self.stats.record("gave_up")
+            return None
+
+        self.attempts += 1
+        self.stats.record("retries")
+        return delay
@@ -0,0 +1,155 @@
+import threading
+import time
+from collections import OrderedDict
+
+from app.integrations.cache import generation, get_cache
+from flask import current_app
+
+# Names are matched fuzzily when no name contains the query, if they share at least this proportion of trigrams
+FUZZY_THRESHOLD = 0.3
+
+
+def trigrams(text, padded=True):
+    """Split text into overlapping three character sequences, padded so that the start and end of words count."""
+    text = f"  {text} " if padded else text
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def _reference_id(person, *path):
+    value = person
+    for field in path:
+        value = value.get(field) if value is not None else None
+    return value
+
+
+class PeopleIndex:
+    """An in-memory index over an organisation's people, answering combined filter and name searches locally.
+
+    Each person is indexed by their role, grade, practice and location, and by the trigrams of their name. Filters
+    are combined by intersecting the matching sets of people. A name matches if it contains the query, ignoring case,
+    or, if no name does, if it shares enough trigrams with the query to be a likely misspelling of it.
+    """
+
+    FILTERS = {
+        "role_id": ("role", "id"),
+        "grade_id": ("role", "grade", "id"),
+        "practice_id": ("role", "practice", "id"),
+        "location_id": ("location", "id"),
+    }
+
+    def __init__(self, people):
+        self.people = people or []
+        self.names = [(person.get("name") or "").lower() for person in self.people]
+        self.postings = {name: {} for name in self.FILTERS}
+        self.trigrams = {}
+
+        for position, person in enumerate(self.people):
+            for name, path in self.FILTERS.items():
+                value = _reference_id(person, *path)
+                if value is not None:
+                    self.postings[name].setdefault(str(value), set()).add(position)
+            for trigram in trigrams(self.names[position]):
+                self.trigrams.setdefault(trigram, set()).add(position)
+
+    def __len__(self):
+        return len(self.people)
+
+    def search(self, name=None, **filters):
+        """Get the people matching every given filter, in their original order unless the name matched fuzzily."""
+        unknown = set(filters) - set(self.FILTERS)
+        if unknown:
+            raise TypeError(f"Unknown filters: {', '.join(sorted(unknown))}")
+
+        positions = None
+        for filter_name, value in filters.items():
+            if value:
+                matches = self.postings[filter_name].get(str(value), set())
+                positions = matches if positions is None else positions & matches
+
+        if name:
+            return [self.people[position] for position in self._match_name(name.lower(), positions)]
+        if positions is None:
+            return list(self.people)
+        return [self.people[position] for position in sorted(positions)]
+
+    def _match_name(self, query, positions):
+        if len(query) >= 3:
+            candidates = set.intersection(*(self.trigrams.get(t, set()) for t in trigrams(query, padded=False)))
+        else:
+            candidates = range(len(self.people))
+        if positions is not None:
+            candidates = positions.intersection(candidates)
+
+        matches = sorted(position for position in candidates if query in self.names[position])
+        if matches or len(query) < 3:
+            return matches
+        return self._fuzzy_match(query, positions)
+
+    def _fuzzy_match(self, query, positions):
+        wanted = trigrams(query)
+        shared = {}
+        for trigram in wanted:
+            for position in self.trigrams.get(trigram, ()):
+                if positions is None or position in positions:
+                    shared[position] = shared.get(position, 0) + 1
+
+        scores = {}
+        for position, count in shared.items():
+            score = count / (len(wanted) + len(trigrams(self.names[position])) - count)
+            if score >= FUZZY_THRESHOLD:
+                scores[position] = score
+        return sorted(scores, key=lambda position: (-scores[position], position))
+
+
+class PeopleIndexes:
+    """The people index for each organisation, kept while the cached list of people it was built from is current.
+
+    Indexes are only kept while caching is enabled, as the generation of the cached "people" namespace is what tells
+    them that people have been created, edited or deleted. At most ``max_indexes`` are kept, evicting the least
+    recently used, and an index is dropped once it outlives the cache TTL.
+    """
+
+    def __init__(self, max_indexes):
+        self.max_indexes = max_indexes
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, organisation_id):
+        """Get an organisation's index, or None if it needs building, and the generation to build it for."""
+        cache = get_cache()
+        if cache is None:
+            return None, None
+        current = generation(cache, "people", organisation_id)
+        key = str(organisation_id)
+        with self._lock:
+            index_generation, expires, index = self._indexes.get(key, (None, 0, None))
+            if index is not None and expires < time.monotonic():
+                del self._indexes[key]
+            elif index is not None:
+                self._indexes.move_to_end(key)
+        if index_generation != current or expires < time.monotonic():
+            return None, current
+        return index, current
+
+    def build(self, organisation_id, token, people):
+        """Build an organisation's index from its whole list of people, fetched after ``lookup`` gave the generation."""
+        index = PeopleIndex(people)
+        if token is not None:
+            with self._lock:
+                expires = time.monotonic() + current_app.config["FLUX_API_CACHE_TTL"]
+                self._indexes[str(organisation_id)] = (token, expires, index)
+                self._indexes.move_to_end(str(organisation_id))
+                while len(self._indexes) > self.max_indexes:
+                    self._indexes.popitem(last=False)
+        return index
+
+    def __len__(self):
+        with self._lock:
+            return len(self._indexes)
+
+
+def get_people_indexes():
+    """Get the people indexes for the current app."""
+    if "flux_api_people_indexes" not in current_app.extensions:
+        current_app.extensions["flux_api_people_indexes"] = PeopleIndexes(current_app.config["FLUX_API_PEOPLE_INDEXES"])
+    return current_app.extensions["flux_api_people_indexes"]
@@ -0,0 +1,259 @@
+import asyncio
+import base64
+import json
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+import redis
+from app.integrations.conditional import Revalidated
+from app.integrations.deadline import get_deadline
+from app.integrations.utils import MISSING
+from flask import current_app, has_app_context
+
+# Seconds between checks for the result of a request another worker is making
+POLL_INTERVAL = 0.02
+
+# Response headers passed on to other workers along with the status and body
+SHARED_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+class SharedResponse:
+    """Stands in for the response to a GET that another worker made, carrying its status, headers and body."""
+
+    def __init__(self, url, status_code, headers, content):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.request = SimpleNamespace(method="GET")
+
+    def close(self):
+        pass
+
+
+class Flight:
+    """A request in progress, which callers wanting the same response wait for rather than repeating."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+    def result(self):
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+
+class SingleFlight:
+    """Shares one in-flight GET, and its response, between every caller that wants the same URL at the same time.
+
+    Within a worker, the first caller makes the request and the rest wait for its response, or its error. With
+    Redis configured, the first worker to claim a URL makes the request, and publishes the response only if other
+    workers have said they are waiting on it. Callers wait for up to ``wait`` seconds, or until their request's
+    deadline if that is sooner. Counts the requests made, and how many calls were coalesced into them within the
+    worker and from other workers.
+    """
+
+    def __init__(self, redis_url, wait):
+        self.wait = wait
+        self.requests = 0
+        self.coalesced = 0
+        self.coalesced_remote = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._redis = redis.Redis.from_url(redis_url) if redis_url else None
+
+    def do(self, key, send):
+        """Get the response for key from the flight in progress, or by calling send if there isn't one."""
+        flight, leader = self._join(key)
+        if not leader:
+            if flight.done.wait(self._wait()):
+                return flight.result()
+            return self._count(send())
+
+        try:
+            flight.response = self._remote(key, send)
+        except Exception as error:
+            flight.error = error
+            raise
+        finally:
+            self._land(key, flight)
+        return flight.response
+
+    async def do_async(self, key, send):
+        """Get the response for key as ``do`` does, awaiting the coroutine send returns if there isn't a flight."""
+        flight, leader = self._join(key)
+        if not leader:
+            if await asyncio.get_running_loop().run_in_executor(None, flight.done.wait, self._wait()):
+                return flight.result()
+            return self._count(await send())
+
+        try:
+            flight.response = await self._remote_async(key, send)
+        except Exception as error:
+            flight.error = error
+            raise
+        finally:
+            self._land(key, flight)
+        return flight.response
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "coalesced": self.coalesced,
+                "coalesced_remote": self.coalesced_remote,
+            }
+
+    def _join(self, key):
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                return flight, False
+            flight = self._flights[key] = Flight()
+            return flight, True
+
+    def _land(self, key, flight):
+        with self._lock:
+            del self._flights[key]
+        flight.done.set()
+
+    def _remote(self, key, send):
+        token, leader = self._claim(key)
+        if leader:
+            response = None
+            try:
+                response = self._count(send())
+                return response
+            finally:
+                self._finish(key, token, response)
+
+        expires = time.monotonic() + self._wait()
+        while time.monotonic() < expires:
+            response = self._shared(key, token)
+            if response is None:
+                break
+            if response is not MISSING:
+                return response
+            time.sleep(POLL_INTERVAL)
+        return self._count(send())
+
+    async def _remote_async(self, key, send):
+        token, leader = await self._off_loop(self._claim, key)
+        if leader:
+            response = None
+            try:
+                response = self._count(await send())
+                return response
+            finally:
+                await self._off_loop(self._finish, key, token, response)
+
+        expires = time.monotonic() + self._wait()
+        while time.monotonic() < expires:
+            response = await self._off_loop(self._shared, key, token)
+            if response is None:
+                break
+            if response is not MISSING:
+                return response
+            await asyncio.sleep(POLL_INTERVAL)
+        return self._count(await send())
+
+    async def _off_loop(self, func, *args):
+        """Call func from a coroutine. With Redis configured, func is called in a thread, in the current context, so
+        that its round trips to Redis don't hold up everything else running in the event loop."""
+        if self._redis is None:
+            return func(*args)
+        return await asyncio.to_thread(func, *args)
+
+    def _wait(self):
+        """Get how many seconds a caller may wait for another's response, within its request's deadline, if any."""
+        deadline = get_deadline() if has_app_context() else None
+        return min(self.wait, max(deadline.remaining(), 0)) if deadline else self.wait
+
+    def _count(self, response):
+        with self._lock:
+            self.requests += 1
+        return response
+
+    def _claim(self, key):
+        """Claim the right to make the request for key across workers, or get the token of the worker that has it and
+        count this worker as waiting for its response."""
+        if self._redis is None:
+            return None, True
+        token = uuid.uuid4().hex
+        try:
+            if self._redis.set(f"flux-api:flight:{key}", token, nx=True, px=int(self.wait * 1000)):
+                return token, True
+            other = self._redis.get(f"flux-api:flight:{key}")
+            if other:
+                waiters = f"flux-api:flight:{key}:{other.decode()}:waiters"
+                self._redis.pipeline().incr(waiters).pexpire(waiters, int(self.wait * 1000)).execute()
+        except redis.exceptions.RedisError as error:
+            current_app.logger.warning(f"Single flight claim failed: {error}")
+            return None, True
+        return (other.decode(), False) if other else (None, True)
+
+    def _finish(self, key, token, response):
+        """Publish the response the claiming worker got if other workers are waiting for it, and release the claim on
+        key, so that waiting workers without a published response stop waiting."""
+        if token is None:
+            return
+        claim = f"flux-api:flight:{key}"
+        try:
+            waiters, claimed = self._redis.pipeline().get(f"{claim}:{token}:waiters").get(claim).execute()
+            pipeline = self._redis.pipeline()
+            if waiters and shareable(response):
+                pipeline.set(f"{claim}:{token}", json.dumps(share(response)), px=int(self.wait * 1000))
+            if claimed == token.encode():
+                pipeline.delete(claim)
+            pipeline.execute()
+        except redis.exceptions.RedisError as error:
+            current_app.logger.warning(f"Single flight release failed: {error}")
+
+    def _shared(self, key, token):
+        """Get the response another worker published, MISSING if it is still in flight, or None if it gave up."""
+        try:
+            data = self._redis.get(f"flux-api:flight:{key}:{token}")
+            if data is None:
+                return MISSING if self._redis.get(f"flux-api:flight:{key}") == token.encode() else None
+        except redis.exceptions.RedisError as error:
+            current_app.logger.warning(f"Single flight poll failed: {error}")
+            return None
+
+        shared = json.loads(data)
+        with self._lock:
+            self.coalesced_remote += 1
+        return SharedResponse(
+            shared["url"], shared["status_code"], shared["headers"], base64.b64decode(shared["content"])
+        )
+
+
+def shareable(response):
+    """Whether a response can be published for other workers: a successful one that was received, not revalidated."""
+    return response is not None and not isinstance(response, Revalidated) and response.status_code in (200, 204)
+
+
+def share(response):
+    """Get the status, headers and body of a response, to publish for other workers as JSON."""
+    return {
+        "url": str(response.url),
+        "status_code": response.status_code,
+        "headers": {name: response.headers[name] for name in SHARED_HEADERS if name in response.headers},
+        "content": base64.b64encode(response.content).decode(),
+    }
+
+
+def get_single_flight():
+    """Get the single flight for the current app, or None if coalescing is disabled."""
+    if not current_app.config["FLUX_API_SINGLE_FLIGHT"]:
+        return None
+    if "flux_api_single_flight" not in current_app.extensions:
+        current_app.extensions["flux_api_single_flight"] = SingleFlight(
+            current_app.config["REDIS_URL"],
+            current_app.config["FLUX_API_DEADLINE"] or current_app.config["TIMEOUT"],
+        )
+    return current_app.extensions["flux_api_single_flight"]
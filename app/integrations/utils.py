@@ -0,0 +1,10 @@
+import inspect
+
+MISSING = object()
+
+
+def bind_arguments(method, instance, args, kwargs):
+    """Get a method's arguments by name, however they were passed."""
+    arguments = inspect.signature(method).bind(instance, *args, **kwargs).arguments
+    arguments.pop("self")
+    return arguments
@@ -2,22 +2,29 @@ import csv
 from io import StringIO
 
 from app import csrf
-from app.integrations.flux_api import Organisation, Location
+from app.integrations import flux_api
+from app.integrations.fan_out import gather
+from app.integrations.flux_api_async import Organisation, Location
+from app.integrations.instrumentation import call_budget
+from app.integrations.pagination import iter_pages
 from app.location import location
 from app.location.forms import LocationForm
-from flask import Response, flash, redirect, render_template, request, url_for
+from app.pagination import EXPORT_PAGE_SIZE, get_page_args
+from flask import Response, flash, redirect, render_template, request, stream_with_context, url_for
 
 
 @location.route("/<uuid:organisation_id>/locations/", methods=["GET", "POST"])
-def list(organisation_id):
+@call_budget(2)
+async def list(organisation_id):
     """Get a list of Locations in an Organisation."""
+    page, per_page = get_page_args()
     name_query = request.args.get("name", type=str)
-    organisation = Organisation().get(organisation_id=organisation_id)
+    filters = {"name": name_query} if name_query else {}
 
-    if name_query:
-        locations = Location().list(organisation_id=organisation_id, name=name_query)
-    else:
-        locations = Location().list(organisation_id=organisation_id)
+    organisation, locations = await gather(
+        Organisation().get(organisation_id=organisation_id),
+        Location().list_page(organisation_id=organisation_id, page=page, per_page=per_page, **filters),
+    )
 
     return render_template(
         "list_locations.html",
@@ -28,13 +35,14 @@ def list(organisation_id):
 
 
 @location.route("/<uuid:organisation_id>/locations/new", methods=["GET", "POST"])
-def create(organisation_id):
+@call_budget(2)
+async def create(organisation_id):
     """Create a new Location in an Organisation."""
     form = LocationForm()
-    organisation = Organisation().get(organisation_id=organisation_id)
+    organisation = await Organisation().get(organisation_id=organisation_id)
 
     if form.validate_on_submit():
-        new_location = Location().create(
+        new_location = await Location().create(
             organisation_id=organisation_id,
             name=form.name.data,
             address=form.address.data,
@@ -61,9 +69,10 @@ def create(organisation_id):
 
 
 @location.route("/<uuid:organisation_id>/locations/<uuid:location_id>", methods=["GET"])
-def view(organisation_id, location_id):
+@call_budget(1)
+async def view(organisation_id, location_id):
     """View a specific Location in an Organisation."""
-    location = Location().get(organisation_id=organisation_id, location_id=location_id)
+    location = await Location().get(organisation_id=organisation_id, location_id=location_id)
 
     return render_template(
         "view_location.html",
@@ -76,13 +85,14 @@ def view(organisation_id, location_id):
     "/<uuid:organisation_id>/locations/<uuid:location_id>/edit",
     methods=["GET", "POST"],
 )
-def edit(organisation_id, location_id):
+@call_budget(2)
+async def edit(organisation_id, location_id):
     """Edit a specific Location in an Organisation."""
-    location = Location().get(organisation_id=organisation_id, location_id=location_id)
+    location = await Location().get(organisation_id=organisation_id, location_id=location_id)
     form = LocationForm()
 
     if form.validate_on_submit():
-        changed_location = Location().edit(
+        changed_location = await Location().edit(
             organisation_id=organisation_id,
             location_id=location_id,
             name=form.name.data,
@@ -117,9 +127,10 @@ def edit(organisation_id, location_id):
     methods=["GET", "POST"],
 )
 @csrf.exempt
-def delete(organisation_id, location_id):
+@call_budget(2)
+async def delete(organisation_id, location_id):
     """Delete a specific Location in an Organisation."""
-    location = Location().get(organisation_id=organisation_id, location_id=location_id)
+    location = await Location().get(organisation_id=organisation_id, location_id=location_id)
 
     if request.method == "GET":
         return render_template(
@@ -128,15 +139,16 @@ def delete(organisation_id, location_id):
             location=location,
         )
     elif request.method == "POST":
-        Location().delete(organisation_id=organisation_id, location_id=location_id)
+        await Location().delete(organisation_id=organisation_id, location_id=location_id)
         flash("{} has been deleted.".format(location["name"]), "success")
         return redirect(url_for("location.list", organisation_id=organisation_id))
 
 
 @location.route("/<uuid:organisation_id>/locations/download", methods=["GET"])
+@call_budget(1)
 def download(organisation_id):
     """Download a list of Locations in an Organisation in CSV format."""
-    locations = Location().list(organisation_id=organisation_id)
+    locations = iter_pages(flux_api.Location().list_page, per_page=EXPORT_PAGE_SIZE, organisation_id=organisation_id)
 
     def generate():
         data = StringIO()
@@ -160,6 +172,6 @@ def download(organisation_id):
             data.seek(0)
             data.truncate(0)
 
-    response = Response(generate(), mimetype="text/csv")
+    response = Response(stream_with_context(generate()), mimetype="text/csv")
     response.headers.set("Content-Disposition", "attachment", filename="locations.csv")
     return response
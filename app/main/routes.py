@@ -1,14 +1,25 @@
+from app import csrf, limiter, metrics, profiling, talisman
+from app.integrations.cache import get_refresher
+from app.integrations.circuit_breaker import get_circuit_breakers
+from app.integrations.degraded import get_degraded_mode
+from app.integrations.instrumentation import get_upstream_stats
+from app.integrations.retry import get_retry_stats
+from app.integrations.single_flight import get_single_flight
 from app.main import main
 from app.main.forms import CookiesForm
 from flask import (
+    Response,
     current_app,
     flash,
     json,
+    jsonify,
     make_response,
     redirect,
     render_template,
     request,
+    send_file,
 )
+from flask_limiter.errors import RateLimitExceeded
 from flask_wtf.csrf import CSRFError
 from werkzeug.exceptions import HTTPException
 
@@ -48,6 +59,60 @@ def cookies():
     return render_template("cookies.html", form=form)
 
 
+@main.route("/metrics/flux-api", methods=["GET"])
+@limiter.exempt
+def flux_api_metrics():
+    breakers = get_circuit_breakers()
+    single_flight = get_single_flight()
+    return jsonify(
+        cache_refreshes=get_refresher().snapshot(),
+        circuit_breakers=breakers.snapshot() if breakers else {},
+        degraded=get_degraded_mode().snapshot(),
+        retries=get_retry_stats().snapshot(),
+        single_flight=single_flight.snapshot() if single_flight else {},
+        upstream=get_upstream_stats().snapshot(),
+    )
+
+
+@main.route("/metrics", methods=["GET"])
+@limiter.exempt
+@csrf.exempt
+@talisman(force_https=False)
+def metrics_exposition():
+    return metrics.exposition()
+
+
+@main.route("/profiles", methods=["GET"])
+@limiter.exempt
+def profiles():
+    return jsonify(profiles=profiling.list_profiles())
+
+
+@main.route("/profiles/<profile_id>", methods=["GET"])
+@limiter.exempt
+def profile(profile_id):
+    path = profiling.profile_path(profile_id, "prof")
+    report = profiling.top_functions(path, request.args.get("sort", "cumulative"))
+    return Response(report, mimetype="text/plain")
+
+
+@main.route("/profiles/<profile_id>/folded", methods=["GET"])
+@limiter.exempt
+def profile_folded(profile_id):
+    return send_file(profiling.profile_path(profile_id, "folded"), mimetype="text/plain")
+
+
+@main.route("/profiles/<profile_id>/pstats", methods=["GET"])
+@limiter.exempt
+def profile_pstats(profile_id):
+    return send_file(
+        profiling.profile_path(profile_id, "prof"),
+        mimetype="application/octet-stream",
+        as_attachment=True,
+        download_name=f"{profile_id}.prof",
+    )
+
+
 @main.app_errorhandler(HTTPException)
 def http_exception(error):
     current_app.logger.error(f"{error.code}: {error.name} - {request.url}")
@@ -59,3 +124,9 @@ def csrf_error(error):
     current_app.logger.error(f"{error.code}: {error.description} - {request.url}")
     flash("The form you were submitting has expired. Please try again.", "info")
     return redirect(request.full_path)
+
+
+@main.app_errorhandler(RateLimitExceeded)
+def rate_limit_exceeded(error):
+    metrics.record_rate_limited()
+    return http_exception(error)
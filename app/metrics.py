@@ -0,0 +1,105 @@
+import os
+import time
+
+from flask import Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Upper bounds, in seconds, of the buckets that request and Flux API call latencies are counted in
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUESTS = Counter("flux_ui_requests_total", "Requests handled, by endpoint.", ["endpoint", "method", "status"])
+REQUEST_LATENCY = Histogram(
+    "flux_ui_request_duration_seconds",
+    "Time taken to handle requests, by endpoint.",
+    ["endpoint"],
+    buckets=LATENCY_BUCKETS,
+)
+IN_PROGRESS = Gauge("flux_ui_requests_in_progress", "Requests being handled.", multiprocess_mode="livesum")
+RATE_LIMITED = Counter(
+    "flux_ui_rate_limited_total", "Requests turned away by the rate limiter, by endpoint.", ["endpoint"]
+)
+UPSTREAM_CALLS = Counter(
+    "flux_api_calls_total", "Calls made to the Flux API, by resource.", ["resource", "method", "status"]
+)
+UPSTREAM_LATENCY = Histogram(
+    "flux_api_call_duration_seconds",
+    "Time taken by calls to the Flux API, by resource.",
+    ["resource", "method"],
+    buckets=LATENCY_BUCKETS,
+)
+CACHE_LOOKUPS = Counter(
+    "flux_api_cache_lookups_total",
+    "Cached Flux API results looked up, by namespace and result.",
+    ["namespace", "result"],
+)
+
+
+def resource(endpoint):
+    """Name the resource a Flux API endpoint is for, such as ``grades`` for ``GET /v1/organisations/{id}/grades``."""
+    segments = [segment for segment in endpoint.split(" ", 1)[-1].split("/") if segment and segment != "{id}"]
+    return segments[-1] if segments else "unknown"
+
+
+def record_call(call):
+    """Count a Flux API call and observe its latency."""
+    name = resource(call.endpoint)
+    UPSTREAM_CALLS.labels(resource=name, method=call.method, status=str(call.status or "error")).inc()
+    UPSTREAM_LATENCY.labels(resource=name, method=call.method).observe(call.duration)
+
+
+def record_cache_lookup(namespace, hit):
+    CACHE_LOOKUPS.labels(namespace=namespace, result="hit" if hit else "miss").inc()
+
+
+def record_rate_limited():
+    RATE_LIMITED.labels(endpoint=request.endpoint or "none").inc()
+
+
+def exposition():
+    """Get every metric in the Prometheus text format, as a response.
+
+    When gunicorn runs more than one worker, each writes its metrics to files in PROMETHEUS_MULTIPROC_DIR, and they
+    are aggregated here, so that whichever worker is scraped reports the totals for all of them.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+def init_app(app):
+    """Count each request, and the requests in progress, and observe how long each took, by endpoint.
+
+    Register this before any extension that can turn requests away in a before request hook, such as the rate
+    limiter, so that the requests it turns away are timed too.
+    """
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_start = time.perf_counter()
+        IN_PROGRESS.inc()
+
+    @app.after_request
+    def record_request_metrics(response):
+        endpoint = request.endpoint or "none"
+        REQUESTS.labels(endpoint=endpoint, method=request.method, status=str(response.status_code)).inc()
+        start = g.get("metrics_start")
+        if start is not None:
+            REQUEST_LATENCY.labels(endpoint=endpoint).observe(time.perf_counter() - start)
+        return response
+
+    @app.teardown_request
+    def end_request_metrics(exception):
+        if g.pop("metrics_start", None) is not None:
+            IN_PROGRESS.dec()
@@ -1,19 +1,23 @@
 from app import csrf
 from app.integrations.flux_api import Organisation
+from app.integrations.instrumentation import call_budget
 from app.organisation import organisation
 from app.organisation.forms import OrganisationForm
+from app.pagination import get_page_args
 from flask import flash, redirect, render_template, request, url_for
 
 
 @organisation.route("/", methods=["GET", "POST"])
+@call_budget(1)
 def list():
     """Get a list of Organisations."""
+    page, per_page = get_page_args()
     name_query = request.args.get("name", type=str)
 
     if name_query:
-        organisations = Organisation().list(name=name_query)
+        organisations = Organisation().list_page(page=page, per_page=per_page, name=name_query)
     else:
-        organisations = Organisation().list()
+        organisations = Organisation().list_page(page=page, per_page=per_page)
 
     return render_template(
         "list_organisations.html",
@@ -23,6 +27,7 @@ def list():
 
 
 @organisation.route("/new", methods=["GET", "POST"])
+@call_budget(1)
 def create():
     """Create a new Organisation."""
     form = OrganisationForm()
@@ -49,6 +54,7 @@ def create():
 
 
 @organisation.route("/<uuid:organisation_id>", methods=["GET"])
+@call_budget(1)
 def view(organisation_id):
     """View a Organisation with a specific ID."""
     organisation = Organisation().get(organisation_id=organisation_id)
@@ -61,6 +67,7 @@ def view(organisation_id):
 
 
 @organisation.route("/<uuid:organisation_id>/edit", methods=["GET", "POST"])
+@call_budget(1)
 def edit(organisation_id):
     """Edit a Organisation with a specific ID."""
     form = OrganisationForm()
@@ -94,6 +101,7 @@ def edit(organisation_id):
 
 @organisation.route("/<uuid:organisation_id>/delete", methods=["GET", "POST"])
 @csrf.exempt
+@call_budget(2)
 def delete(organisation_id):
     """Delete a Organisation with a specific ID."""
     organisation = Organisation().get(organisation_id=organisation_id)
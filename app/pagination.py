@@ -0,0 +1,30 @@
+from flask import request, url_for
+
+# Page sizes offered on list pages
+PAGE_SIZES = (10, 25, 50, 100)
+DEFAULT_PAGE_SIZE = 25
+
+# Page size used to walk a whole list for a CSV download
+EXPORT_PAGE_SIZE = 100
+
+
+def get_page_args():
+    """Get the page number and page size asked for in the query string, defaulting to the first page of 25."""
+    page = request.args.get("page", 1, type=int)
+    per_page = request.args.get("per_page", DEFAULT_PAGE_SIZE, type=int)
+    if per_page not in PAGE_SIZES:
+        per_page = DEFAULT_PAGE_SIZE
+    return max(page, 1), per_page
+
+
+def url_for_page(page):
+    """Get the URL of another page of the current list, keeping its filters and page size. Query string arguments
+    named like the view's arguments, such as ``organisation_id``, are dropped rather than overriding them."""
+    args = request.args.to_dict(flat=False)
+    args["page"] = page
+    return url_for(request.endpoint, **{**args, **request.view_args})
+
+
+def init_app(app):
+    app.add_template_global(url_for_page)
+    app.add_template_global(PAGE_SIZES, "page_sizes")
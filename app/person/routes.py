@@ -2,9 +2,15 @@ import csv
 from io import StringIO
 
 from app import csrf
-from app.integrations.flux_api import Location, Organisation, Person, Role
+from app.integrations import flux_api
+from app.integrations.fan_out import gather
+from app.integrations.flux_api_async import Location, Organisation, Person, Role
+from app.integrations.instrumentation import call_budget
+from app.integrations.pagination import slice_page
+from app.pagination import get_page_args
 from app.person import person
 from app.person.forms import PersonForm
+from app.streaming import stream_template
 from flask import Response, flash, redirect, render_template, request, url_for
 
 
@@ -12,25 +18,23 @@ from flask import Response, flash, redirect, render_template, request, url_for
     "/<uuid:organisation_id>/people/",
     methods=["GET", "POST"],
 )
-def list(organisation_id):
+@call_budget(2)
+async def list(organisation_id):
     """Get a list of People."""
-    name_query = request.args.get("name", type=str)
-    role_filter = request.args.get("role_id", type=str)
-    location_filter = request.args.get("location_id", type=str)
-    organisation = Organisation().get(organisation_id=organisation_id)
-
-    if name_query:
-        people = Person().list(organisation_id=organisation_id, name=name_query)
-    elif role_filter:
-        people = Person().list(organisation_id=organisation_id, role_id=role_filter)
-    elif location_filter:
-        people = Person().list(organisation_id=organisation_id, location_id=location_filter)
-    else:
-        people = Person().list(
-            organisation_id=organisation_id,
-        )
+    page, per_page = get_page_args()
+    filters = {
+        name: request.args.get(name, type=str)
+        for name in ("name", "role_id", "grade_id", "practice_id", "location_id")
+        if request.args.get(name)
+    }
+
+    organisation, people = await gather(
+        Organisation().get(organisation_id=organisation_id),
+        Person().search(organisation_id=organisation_id, **filters),
+    )
+    people = slice_page(people, page, per_page)
 
-    return render_template(
+    return stream_template(
         "list_people.html",
         title="People",
         organisation=organisation,
@@ -42,18 +46,20 @@ def list(organisation_id):
     "/<uuid:organisation_id>/people/new",
     methods=["GET", "POST"],
 )
-def create(organisation_id):
+@call_budget(4)
+async def create(organisation_id):
     """Create a new Person."""
     form = PersonForm()
-    organisation = Organisation().get(organisation_id=organisation_id)
-    roles = Role().list(organisation_id=organisation_id)
+    organisation, roles, locations = await gather(
+        Organisation().get(organisation_id=organisation_id),
+        Role().list(organisation_id=organisation_id, filters={}),
+        Location().list(organisation_id=organisation_id),
+    )
     form.role.choices = [(role["id"], role["title"]) for role in roles if roles]
-
-    locations = Location().list(organisation_id=organisation_id)
     form.location.choices = [(location["id"], location["name"]) for location in locations if locations]
 
     if form.validate_on_submit():
-        new_person = Person().create(
+        new_person = await Person().create(
             name=form.name.data,
             email_address=form.email_address.data,
             role_id=form.role.data,
@@ -89,9 +95,10 @@ def create(organisation_id):
     "/<uuid:organisation_id>/people/<uuid:person_id>",
     methods=["GET"],
 )
-def view(organisation_id, person_id):
+@call_budget(1)
+async def view(organisation_id, person_id):
     """View a specific Person in an Person."""
-    person = Person().get(organisation_id=organisation_id, person_id=person_id)
+    person = await Person().get(organisation_id=organisation_id, person_id=person_id)
 
     return render_template(
         "view_person.html",
@@ -104,18 +111,21 @@ def view(organisation_id, person_id):
     "/<uuid:organisation_id>/people/<uuid:person_id>/edit",
     methods=["GET", "POST"],
 )
-def edit(organisation_id, person_id):
+@call_budget(4)
+async def edit(organisation_id, person_id):
     """Edit a specific Person in an Person."""
-    person = Person().get(organisation_id=organisation_id, person_id=person_id)
-    roles = Role().list(organisation_id=organisation_id)
-    locations = Location().list(organisation_id=organisation_id)
+    person, roles, locations = await gather(
+        Person().get(organisation_id=organisation_id, person_id=person_id),
+        Role().list(organisation_id=organisation_id, filters={}),
+        Location().list(organisation_id=organisation_id),
+    )
 
     form = PersonForm()
     form.role.choices = [(role["id"], role["title"]) for role in roles if roles]
     form.location.choices = [(location["id"], location["name"]) for location in locations if locations]
 
     if form.validate_on_submit():
-        changed_person = Person().edit(
+        changed_person = await Person().edit(
             person_id=person_id,
             name=form.name.data,
             email_address=form.email_address.data,
@@ -158,9 +168,10 @@ def edit(organisation_id, person_id):
     methods=["GET", "POST"],
 )
 @csrf.exempt
-def delete(organisation_id, person_id):
+@call_budget(2)
+async def delete(organisation_id, person_id):
     """Delete a specific Person in an Person."""
-    person = Person().get(organisation_id=organisation_id, person_id=person_id)
+    person = await Person().get(organisation_id=organisation_id, person_id=person_id)
 
     if request.method == "GET":
         return render_template(
@@ -169,15 +180,16 @@ def delete(organisation_id, person_id):
             person=person,
         )
     elif request.method == "POST":
-        Person().delete(organisation_id=organisation_id, person_id=person_id)
+        await Person().delete(organisation_id=organisation_id, person_id=person_id)
         flash("{} has been deleted.".format(person["name"]), "success")
         return redirect(url_for("person.list", organisation_id=organisation_id))
 
 
 @person.route("/<uuid:organisation_id>/people/download", methods=["GET"])
+@call_budget(1)
 def download(organisation_id):
     """Download a list of People in an Organisation in CSV format."""
-    people = Person().list(organisation_id=organisation_id)
+    people = flux_api.Person().stream(organisation_id=organisation_id)
 
     def generate():
         data = StringIO()
@@ -203,7 +215,7 @@ def download(organisation_id):
                     person["name"],
                     person["role"]["title"] if person["role"] else None,
                     person["role"]["grade"]["name"] if person["role"] else None,
-                    person["role"]["practice"]["name"] if person["role"]["practice"] else None,
+                    person["role"]["practice"]["name"] if person["role"] and person["role"]["practice"] else None,
                 )
             )
             yield data.getvalue()
@@ -2,25 +2,32 @@ import csv
 from io import StringIO
 
 from app import csrf
-from app.integrations.flux_api import Organisation, Person, Practice
+from app.integrations import flux_api
+from app.integrations.fan_out import gather
+from app.integrations.flux_api_async import Organisation, Person, Practice
+from app.integrations.instrumentation import call_budget
+from app.integrations.pagination import iter_pages
+from app.pagination import EXPORT_PAGE_SIZE, get_page_args
 from app.practice import practice
 from app.practice.forms import PracticeForm
-from flask import Response, flash, redirect, render_template, request, url_for
+from flask import Response, flash, redirect, render_template, request, stream_with_context, url_for
 
 
 @practice.route(
     "/<uuid:organisation_id>/practices/",
     methods=["GET", "POST"],
 )
-def list(organisation_id):
+@call_budget(2)
+async def list(organisation_id):
     """Get a list of Practices in an Organisation."""
+    page, per_page = get_page_args()
     name_query = request.args.get("name", type=str)
-    organisation = Organisation().get(organisation_id)
+    filters = {"name": name_query} if name_query else {}
 
-    if name_query:
-        practices = Practice().list(organisation_id=organisation_id, name=name_query)
-    else:
-        practices = Practice().list(organisation_id=organisation_id)
+    organisation, practices = await gather(
+        Organisation().get(organisation_id),
+        Practice().list_page(organisation_id=organisation_id, page=page, per_page=per_page, **filters),
+    )
 
     return render_template(
         "list_practices.html",
@@ -34,16 +41,19 @@ def list(organisation_id):
     "/<uuid:organisation_id>/practices/new",
     methods=["GET", "POST"],
 )
-def create(organisation_id):
+@call_budget(3)
+async def create(organisation_id):
     """Create a new Practice in an Organisation."""
     form = PracticeForm()
-    organisation = Organisation().get(organisation_id=organisation_id)
-    people = Person().list(organisation_id=organisation_id)
+    organisation, people = await gather(
+        Organisation().get(organisation_id=organisation_id),
+        Person().list(organisation_id=organisation_id),
+    )
     if people:
         form.head.choices += [(person["id"], person["name"]) for person in people]
 
     if form.validate_on_submit():
-        new_practice = Practice().create(
+        new_practice = await Practice().create(
             organisation_id=organisation_id,
             name=form.name.data,
             head_id=form.head.data,
@@ -74,9 +84,10 @@ def create(organisation_id):
     "/<uuid:organisation_id>/practices/<uuid:practice_id>",
     methods=["GET"],
 )
-def view(organisation_id, practice_id):
+@call_budget(1)
+async def view(organisation_id, practice_id):
     """View a specific Practice in an Organisation."""
-    practice = Practice().get(organisation_id=organisation_id, practice_id=practice_id)
+    practice = await Practice().get(organisation_id=organisation_id, practice_id=practice_id)
 
     return render_template(
         "view_practice.html",
@@ -89,16 +100,19 @@ def view(organisation_id, practice_id):
     "/<uuid:organisation_id>/practices/<uuid:practice_id>/edit",
     methods=["GET", "POST"],
 )
-def edit(organisation_id, practice_id):
+@call_budget(3)
+async def edit(organisation_id, practice_id):
     """Edit a specific Practice in an Organisation."""
-    practice = Practice().get(organisation_id=organisation_id, practice_id=practice_id)
-    people = Person().list(organisation_id=organisation_id)
+    practice, people = await gather(
+        Practice().get(organisation_id=organisation_id, practice_id=practice_id),
+        Person().list(organisation_id=organisation_id),
+    )
     form = PracticeForm()
     if people:
         form.head.choices += [(person["id"], person["name"]) for person in people]
 
     if form.validate_on_submit():
-        changed_practice = Practice().edit(
+        changed_practice = await Practice().edit(
             organisation_id=organisation_id,
             practice_id=practice_id,
             name=form.name.data,
@@ -136,9 +150,10 @@ def edit(organisation_id, practice_id):
     methods=["GET", "POST"],
 )
 @csrf.exempt
-def delete(organisation_id, practice_id):
+@call_budget(2)
+async def delete(organisation_id, practice_id):
     """Delete a specific Practice in an Organisation."""
-    practice = Practice().get(organisation_id=organisation_id, practice_id=practice_id)
+    practice = await Practice().get(organisation_id=organisation_id, practice_id=practice_id)
 
     if request.method == "GET":
         return render_template(
@@ -147,15 +162,16 @@ def delete(organisation_id, practice_id):
             practice=practice,
         )
     elif request.method == "POST":
-        Practice().delete(organisation_id=organisation_id, practice_id=practice_id)
+        await Practice().delete(organisation_id=organisation_id, practice_id=practice_id)
         flash("{} has been deleted.".format(practice["name"]), "success")
         return redirect(url_for("practice.list", organisation_id=organisation_id))
 
 
 @practice.route("/<uuid:organisation_id>/practices/download", methods=["GET"])
+@call_budget(1)
 def download(organisation_id):
     """Download a list of Practices in an Organisation in CSV format."""
-    practices = Practice().list(organisation_id=organisation_id)
+    practices = iter_pages(flux_api.Practice().list_page, per_page=EXPORT_PAGE_SIZE, organisation_id=organisation_id)
 
     def generate():
         data = StringIO()
@@ -180,6 +196,6 @@ def download(organisation_id):
             data.seek(0)
             data.truncate(0)
 
-    response = Response(generate(), mimetype="text/csv")
+    response = Response(stream_with_context(generate()), mimetype="text/csv")
     response.headers.set("Content-Disposition", "attachment", filename="practices.csv")
     return response
@@ -0,0 +1,216 @@
+import cProfile
+import hmac
+import io
+import json
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from flask import abort, current_app, request
+
+# Request header that asks for a request to be profiled, and authorises reading profiles, when set to PROFILING_TOKEN
+PROFILE_HEADER = "X-Profile"
+
+# Response header naming the profile taken of a request
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+# Orders that the top functions of a profile can be listed in
+SORT_ORDERS = ("cumulative", "tottime", "ncalls")
+
+_profile_id_pattern = re.compile(r"^[0-9a-f]{32}$")
+
+
+class Sampler(threading.Thread):
+    """Samples the stacks of the threads doing the app's work every ``interval`` seconds, until stopped.
+
+    The thread handling the request is always sampled. Other threads, such as those running async views or fanned
+    out Flux API calls, are sampled while any frame of their stack is in the app, so idle pool threads are left out.
+    Stacks are counted folded into a single line per stack, outermost frame first, as flame graph tools read them.
+    """
+
+    def __init__(self, interval, root_path, request_thread):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.interval = interval
+        self.root_path = root_path
+        self.request_thread = request_thread
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != self.ident:
+                    self.sample(names.get(ident, str(ident)), ident == self.request_thread, frame)
+
+    def sample(self, thread_name, always, frame):
+        stack = []
+        in_app = always
+        while frame is not None:
+            code = frame.f_code
+            in_app = in_app or code.co_filename.startswith(self.root_path)
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        if in_app:
+            stack.append(thread_name)
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+class RequestProfile:
+    """A deterministic profile of the thread handling a request, with a sampled profile of every thread working on it.
+
+    The deterministic profile counts every call made and the time spent in each function, to list the top functions.
+    The sampled profile records whole stacks, for flame graphs.
+    """
+
+    def __init__(self, interval, root_path):
+        self.id = uuid.uuid4().hex
+        self.profile = cProfile.Profile()
+        self.sampler = Sampler(interval, root_path, threading.get_ident())
+        self.duration = None
+        self._start = None
+
+    def start(self):
+        self.sampler.start()
+        self._start = time.perf_counter()
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+        self.duration = time.perf_counter() - self._start
+        self.sampler.stop()
+
+    def save(self, directory, meta):
+        """Write the profile to directory, as a pstats file, a folded stacks file and a JSON file of meta."""
+        os.makedirs(directory, exist_ok=True)
+        self.profile.dump_stats(os.path.join(directory, f"{self.id}.prof"))
+        with open(os.path.join(directory, f"{self.id}.folded"), "w") as file:
+            file.writelines(f"{stack} {count}\n" for stack, count in self.sampler.stacks.most_common())
+        with open(os.path.join(directory, f"{self.id}.json"), "w") as file:
+            json.dump({"id": self.id, "duration": round(self.duration, 4), "created": time.time(), **meta}, file)
+
+
+def prune(directory, keep):
+    """Delete all but the newest ``keep`` profiles in directory."""
+    metas = sorted(
+        (entry for entry in os.scandir(directory) if entry.name.endswith(".json")),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True,
+    )
+    for entry in metas[keep:]:
+        profile_id = entry.name[: -len(".json")]
+        for extension in ("json", "prof", "folded"):
+            try:
+                os.remove(os.path.join(directory, f"{profile_id}.{extension}"))
+            except FileNotFoundError:
+                pass
+
+
+class ProfilerMiddleware:
+    """Profiles the requests that ask to be, with the PROFILE_HEADER set to PROFILING_TOKEN, and a random sample of
+    PROFILING_SAMPLE_RATE of all requests.
+
+    Each profile covers handling the request and producing the whole of its response body, and is saved to
+    PROFILING_DIR, keeping the newest PROFILING_KEEP. Its ID is returned in the PROFILE_ID_HEADER.
+    """
+
+    def __init__(self, app, wsgi_app):
+        self.app = app
+        self.wsgi_app = wsgi_app
+
+    def wanted(self, environ):
+        if environ.get("PATH_INFO", "").startswith("/profiles"):
+            return False
+        if authorised(self.app.config, environ.get(f"HTTP_{PROFILE_HEADER.upper().replace('-', '_')}")):
+            return True
+        rate = self.app.config["PROFILING_SAMPLE_RATE"]
+        return rate > 0 and random.random() < rate  # nosec: sampling, not security sensitive
+
+    def __call__(self, environ, start_response):
+        if not self.wanted(environ):
+            return self.wsgi_app(environ, start_response)
+
+        config = self.app.config
+        profile = RequestProfile(config["PROFILING_INTERVAL"], self.app.root_path)
+        status = []
+
+        def profiled_start_response(response_status, headers, exc_info=None):
+            status.append(response_status)
+            headers.append((PROFILE_ID_HEADER, profile.id))
+            return start_response(response_status, headers, exc_info)
+
+        profile.start()
+        try:
+            app_iter = self.wsgi_app(environ, profiled_start_response)
+            try:
+                body = list(app_iter)
+            finally:
+                if hasattr(app_iter, "close"):
+                    app_iter.close()
+        finally:
+            profile.stop()
+
+        meta = {"method": environ["REQUEST_METHOD"], "path": environ.get("PATH_INFO", "/"), "status": status[0]}
+        profile.save(config["PROFILING_DIR"], meta)
+        prune(config["PROFILING_DIR"], config["PROFILING_KEEP"])
+        return body
+
+
+def authorised(config, token):
+    """Whether a token from the PROFILE_HEADER matches PROFILING_TOKEN. Without a PROFILING_TOKEN, none does."""
+    return bool(config["PROFILING_TOKEN"] and token) and hmac.compare_digest(config["PROFILING_TOKEN"], token)
+
+
+def profile_path(profile_id, extension):
+    """Get the path of one of a profile's files, aborting with 404 Not Found unless the request is authorised to read
+    profiles and the profile exists."""
+    if not authorised(current_app.config, request.headers.get(PROFILE_HEADER)):
+        abort(404)
+    if not _profile_id_pattern.match(profile_id):
+        abort(404)
+    path = os.path.join(current_app.config["PROFILING_DIR"], f"{profile_id}.{extension}")
+    if not os.path.exists(path):
+        abort(404)
+    return path
+
+
+def list_profiles():
+    """Get the meta of every profile saved, newest first."""
+    if not authorised(current_app.config, request.headers.get(PROFILE_HEADER)):
+        abort(404)
+    directory = current_app.config["PROFILING_DIR"]
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for entry in os.scandir(directory):
+        if entry.name.endswith(".json"):
+            with open(entry.path) as file:
+                profiles.append(json.load(file))
+    return sorted(profiles, key=lambda profile: profile["created"], reverse=True)
+
+
+def top_functions(path, sort="cumulative", limit=40):
+    """Get a report of the functions a profile spent the most time in, as pstats prints it."""
+    stream = io.StringIO()
+    stats = pstats.Stats(path, stream=stream)
+    stats.strip_dirs().sort_stats(sort if sort in SORT_ORDERS else "cumulative").print_stats(limit)
+    return stream.getvalue()
+
+
+def init_app(app):
+    """Profile requests on demand, if PROFILING_TOKEN or PROFILING_SAMPLE_RATE is set.
+
+    Otherwise no profiler is installed, so requests are handled just as they would be without one.
+    """
+    if app.config["PROFILING_TOKEN"] or app.config["PROFILING_SAMPLE_RATE"] > 0:
+        app.wsgi_app = ProfilerMiddleware(app, app.wsgi_app)
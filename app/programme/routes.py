@@ -2,22 +2,29 @@ import csv
 from io import StringIO
 
 from app import csrf
-from app.integrations.flux_api import Organisation, Person, Programme
+from app.integrations import flux_api
+from app.integrations.fan_out import gather
+from app.integrations.flux_api_async import Organisation, Person, Programme
+from app.integrations.instrumentation import call_budget
+from app.integrations.pagination import iter_pages
+from app.pagination import EXPORT_PAGE_SIZE, get_page_args
 from app.programme import programme
 from app.programme.forms import ProgrammeForm
-from flask import Response, flash, redirect, render_template, request, url_for
+from flask import Response, flash, redirect, render_template, request, stream_with_context, url_for
 
 
 @programme.route("/<uuid:organisation_id>/programmes/", methods=["GET", "POST"])
-def list(organisation_id):
+@call_budget(2)
+async def list(organisation_id):
     """Get a list of Programmes in an Organisation."""
+    page, per_page = get_page_args()
     name_query = request.args.get("name", type=str)
-    organisation = Organisation().get(organisation_id=organisation_id)
+    filters = {"name": name_query} if name_query else {}
 
-    if name_query:
-        programmes = Programme().list(organisation_id=organisation_id, name=name_query)
-    else:
-        programmes = Programme().list(organisation_id=organisation_id)
+    organisation, programmes = await gather(
+        Organisation().get(organisation_id=organisation_id),
+        Programme().list_page(organisation_id=organisation_id, page=page, per_page=per_page, **filters),
+    )
 
     return render_template(
         "list_programmes.html",
@@ -28,16 +35,19 @@ def list(organisation_id):
 
 
 @programme.route("/<uuid:organisation_id>/programmes/new", methods=["GET", "POST"])
-def create(organisation_id):
+@call_budget(3)
+async def create(organisation_id):
     """Create a new Programme in an Organisation."""
     form = ProgrammeForm()
-    organisation = Organisation().get(organisation_id=organisation_id)
-    people = Person().list(organisation_id=organisation_id)
+    organisation, people = await gather(
+        Organisation().get(organisation_id=organisation_id),
+        Person().list(organisation_id=organisation_id),
+    )
     if people:
         form.manager.choices += [(manager["id"], manager["name"]) for manager in people]
 
     if form.validate_on_submit():
-        new_programme = Programme().create(
+        new_programme = await Programme().create(
             organisation_id=organisation_id,
             name=form.name.data,
             manager_id=form.manager.data,
@@ -64,9 +74,10 @@ def create(organisation_id):
 
 
 @programme.route("/<uuid:organisation_id>/programmes/<uuid:programme_id>", methods=["GET"])
-def view(organisation_id, programme_id):
+@call_budget(1)
+async def view(organisation_id, programme_id):
     """View a specific Programme in an Organisation."""
-    programme = Programme().get(organisation_id=organisation_id, programme_id=programme_id)
+    programme = await Programme().get(organisation_id=organisation_id, programme_id=programme_id)
 
     return render_template(
         "view_programme.html",
@@ -79,16 +90,19 @@ def view(organisation_id, programme_id):
     "/<uuid:organisation_id>/programmes/<uuid:programme_id>/edit",
     methods=["GET", "POST"],
 )
-def edit(organisation_id, programme_id):
+@call_budget(3)
+async def edit(organisation_id, programme_id):
     """Edit a specific Programme in an Organisation."""
-    programme = Programme().get(organisation_id=organisation_id, programme_id=programme_id)
-    people = Person().list(organisation_id=organisation_id)
+    programme, people = await gather(
+        Programme().get(organisation_id=organisation_id, programme_id=programme_id),
+        Person().list(organisation_id=organisation_id),
+    )
     form = ProgrammeForm()
     if people:
         form.manager.choices += [(manager["id"], manager["name"]) for manager in people]
 
     if form.validate_on_submit():
-        changed_programme = Programme().edit(
+        changed_programme = await Programme().edit(
             organisation_id=organisation_id,
             programme_id=programme_id,
             name=form.name.data,
@@ -124,9 +138,10 @@ def edit(organisation_id, programme_id):
     methods=["GET", "POST"],
 )
 @csrf.exempt
-def delete(organisation_id, programme_id):
+@call_budget(2)
+async def delete(organisation_id, programme_id):
     """Delete a specific Programme in an Organisation."""
-    programme = Programme().get(organisation_id=organisation_id, programme_id=programme_id)
+    programme = await Programme().get(organisation_id=organisation_id, programme_id=programme_id)
 
     if request.method == "GET":
         return render_template(
@@ -135,15 +150,16 @@ def delete(organisation_id, programme_id):
             programme=programme,
         )
     elif request.method == "POST":
-        Programme().delete(organisation_id=organisation_id, programme_id=programme_id)
+        await Programme().delete(organisation_id=organisation_id, programme_id=programme_id)
         flash("{} has been deleted.".format(programme["name"]), "success")
         return redirect(url_for("programme.list", organisation_id=organisation_id))
 
 
 @programme.route("/<uuid:organisation_id>/programmes/download", methods=["GET"])
+@call_budget(1)
 def download(organisation_id):
     """Download a list of Programmes in an Organisation in CSV format."""
-    programmes = Programme().list(organisation_id=organisation_id)
+    programmes = iter_pages(flux_api.Programme().list_page, per_page=EXPORT_PAGE_SIZE, organisation_id=organisation_id)
 
     def generate():
         data = StringIO()
@@ -167,6 +183,6 @@ def download(organisation_id):
             data.seek(0)
             data.truncate(0)
 
-    response = Response(generate(), mimetype="text/csv")
+    response = Response(stream_with_context(generate()), mimetype="text/csv")
     response.headers.set("Content-Disposition", "attachment", filename="programmes.csv")
     return response
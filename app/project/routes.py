@@ -2,23 +2,24 @@ import csv
 from io import StringIO
 
 from app import csrf
-from app.integrations.flux_api import Organisation, Person, Programme, Project
+from app.integrations import flux_api
+from app.integrations.fan_out import gather
+from app.integrations.flux_api_async import Organisation, Person, Programme, Project
+from app.integrations.instrumentation import call_budget
+from app.pagination import get_page_args
 from app.project import project
 from app.project.forms import ProjectFilterForm, ProjectForm
+from app.streaming import stream_template
 from flask import Response, flash, redirect, render_template, request, url_for
 
 
 @project.route("/<uuid:organisation_id>/projects/", methods=["GET", "POST"])
 @csrf.exempt
-def list(organisation_id):
+@call_budget(4)
+async def list(organisation_id):
     """Get a list of Projects in an Organisation."""
-    organisation = Organisation().get(organisation_id=organisation_id)
-    managers = Project().managers(organisation_id=organisation_id)
-    programmes = Programme().list(organisation_id=organisation_id)
-
+    page, per_page = get_page_args()
     form = ProjectFilterForm()
-    form.manager.choices += [(manager["id"], manager["name"]) for manager in managers]
-    form.programme.choices += [(programme["id"], programme["name"]) for programme in programmes]
 
     filters = {}
     if request.args.get("name"):
@@ -37,9 +38,16 @@ def list(organisation_id):
         filters["status"] = request.args.get("status", type=str)
         form.status.data = filters["status"]
 
-    projects = Project().list(organisation_id=organisation_id, filters=filters)
+    organisation, managers, programmes, projects = await gather(
+        Organisation().get(organisation_id=organisation_id),
+        Project().managers(organisation_id=organisation_id),
+        Programme().list(organisation_id=organisation_id),
+        Project().list_page(organisation_id=organisation_id, filters=filters, page=page, per_page=per_page),
+    )
+    form.manager.choices += [(manager["id"], manager["name"]) for manager in managers]
+    form.programme.choices += [(programme["id"], programme["name"]) for programme in programmes]
 
-    return render_template(
+    return stream_template(
         "list_projects.html",
         title="Projects",
         organisation=organisation,
@@ -49,19 +57,22 @@ def list(organisation_id):
 
 
 @project.route("/<uuid:organisation_id>/projects/new", methods=["GET", "POST"])
-def create(organisation_id):
+@call_budget(4)
+async def create(organisation_id):
     """Create a new Project in an Organisation."""
     form = ProjectForm()
-    organisation = Organisation().get(organisation_id=organisation_id)
-    people = Person().list(organisation_id=organisation_id)
+    organisation, people, programmes = await gather(
+        Organisation().get(organisation_id=organisation_id),
+        Person().list(organisation_id=organisation_id),
+        Programme().list(organisation_id=organisation_id),
+    )
     if people:
         form.manager.choices += [(manager["id"], manager["name"]) for manager in people]
-    programmes = Programme().list(organisation_id=organisation_id)
     if people:
         form.programme.choices += [(programme["id"], programme["name"]) for programme in programmes]
 
     if form.validate_on_submit():
-        new_project = Project().create(
+        new_project = await Project().create(
             organisation_id=organisation_id,
             name=form.name.data,
             manager_id=form.manager.data,
@@ -90,9 +101,10 @@ def create(organisation_id):
 
 
 @project.route("/<uuid:organisation_id>/projects/<uuid:project_id>", methods=["GET"])
-def view(organisation_id, project_id):
+@call_budget(1)
+async def view(organisation_id, project_id):
     """View a specific Project in an Organisation."""
-    project = Project().get(organisation_id=organisation_id, project_id=project_id)
+    project = await Project().get(organisation_id=organisation_id, project_id=project_id)
 
     return render_template(
         "view_project.html",
@@ -105,11 +117,14 @@ def view(organisation_id, project_id):
     "/<uuid:organisation_id>/projects/<uuid:project_id>/edit",
     methods=["GET", "POST"],
 )
-def edit(organisation_id, project_id):
+@call_budget(4)
+async def edit(organisation_id, project_id):
     """Edit a specific Project in an Organisation."""
-    project = Project().get(organisation_id=organisation_id, project_id=project_id)
-    people = Person().list(organisation_id=organisation_id)
-    programmes = Programme().list(organisation_id=organisation_id)
+    project, people, programmes = await gather(
+        Project().get(organisation_id=organisation_id, project_id=project_id),
+        Person().list(organisation_id=organisation_id),
+        Programme().list(organisation_id=organisation_id),
+    )
     form = ProjectForm()
     if people:
         form.manager.choices += [(manager["id"], manager["name"]) for manager in people]
@@ -117,7 +132,7 @@ def edit(organisation_id, project_id):
         form.programme.choices += [(programme["id"], programme["name"]) for programme in programmes]
 
     if form.validate_on_submit():
-        changed_project = Project().edit(
+        changed_project = await Project().edit(
             organisation_id=organisation_id,
             project_id=project_id,
             name=form.name.data,
@@ -158,9 +173,10 @@ def edit(organisation_id, project_id):
     methods=["GET", "POST"],
 )
 @csrf.exempt
-def delete(organisation_id, project_id):
+@call_budget(2)
+async def delete(organisation_id, project_id):
     """Delete a specific Project in an Organisation."""
-    project = Project().get(organisation_id=organisation_id, project_id=project_id)
+    project = await Project().get(organisation_id=organisation_id, project_id=project_id)
 
     if request.method == "GET":
         return render_template(
@@ -169,15 +185,16 @@ def delete(organisation_id, project_id):
             project=project,
         )
     elif request.method == "POST":
-        Project().delete(organisation_id=organisation_id, project_id=project_id)
+        await Project().delete(organisation_id=organisation_id, project_id=project_id)
         flash("{} has been deleted.".format(project["name"]), "success")
         return redirect(url_for("project.list", organisation_id=organisation_id))
 
 
 @project.route("/<uuid:organisation_id>/projects/download", methods=["GET"])
+@call_budget(1)
 def download(organisation_id):
     """Download a list of Projects in an Organisation in CSV format."""
-    projects = Project().list(organisation_id=organisation_id)
+    projects = flux_api.Project().stream(organisation_id=organisation_id, filters={})
 
     def generate():
         data = StringIO()
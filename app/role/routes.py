@@ -2,9 +2,14 @@ import csv
 from io import StringIO
 
 from app import csrf
-from app.integrations.flux_api import Grade, Organisation, Practice, Role
+from app.integrations import flux_api
+from app.integrations.fan_out import gather
+from app.integrations.flux_api_async import Grade, Organisation, Practice, Role
+from app.integrations.instrumentation import call_budget
+from app.pagination import get_page_args
 from app.role import role
 from app.role.forms import RoleFilterForm, RoleForm
+from app.streaming import stream_template
 from flask import Response, flash, redirect, render_template, request, url_for
 
 
@@ -12,15 +17,11 @@ from flask import Response, flash, redirect, render_template, request, url_for
     "/<uuid:organisation_id>/roles/",
     methods=["GET", "POST"],
 )
-def list(organisation_id):
+@call_budget(4)
+async def list(organisation_id):
     """Get a list of Roles."""
-    organisation = Organisation().get(organisation_id=organisation_id)
-    grades = Grade().list(organisation_id=organisation_id)
-    practices = Practice().list(organisation_id=organisation_id)
-
+    page, per_page = get_page_args()
     form = RoleFilterForm()
-    form.grade.choices += [(grade["id"], grade["name"]) for grade in grades]
-    form.practice.choices += [(practice["id"], practice["name"]) for practice in practices]
 
     filters = {}
     if request.args.get("title"):
@@ -35,9 +36,16 @@ def list(organisation_id):
         filters["practice_id"] = request.args.get("practice", type=str)
         form.practice.data = filters["practice_id"]
 
-    roles = Role().list(organisation_id=organisation_id, filters=filters)
+    organisation, grades, practices, roles = await gather(
+        Organisation().get(organisation_id=organisation_id),
+        Grade().list(organisation_id=organisation_id),
+        Practice().list(organisation_id=organisation_id),
+        Role().list_page(organisation_id=organisation_id, filters=filters, page=page, per_page=per_page),
+    )
+    form.grade.choices += [(grade["id"], grade["name"]) for grade in grades]
+    form.practice.choices += [(practice["id"], practice["name"]) for practice in practices]
 
-    return render_template(
+    return stream_template(
         "list_roles.html",
         title="Roles",
         organisation=organisation,
@@ -50,21 +58,24 @@ def list(organisation_id):
     "/<uuid:organisation_id>/roles/new",
     methods=["GET", "POST"],
 )
-def create(organisation_id):
+@call_budget(4)
+async def create(organisation_id):
     """Create a new Role."""
     form = RoleForm()
-    organisation = Organisation().get(organisation_id=organisation_id)
+    organisation, grades, practices = await gather(
+        Organisation().get(organisation_id=organisation_id),
+        Grade().list(organisation_id=organisation_id),
+        Practice().list(organisation_id=organisation_id),
+    )
 
-    grades = Grade().list(organisation_id=organisation_id)
     if grades:
         form.grade.choices = [(grade["id"], grade["name"]) for grade in grades]
 
-    practices = Practice().list(organisation_id=organisation_id)
     if practices:
         form.practice.choices += [(practice["id"], practice["name"]) for practice in practices]
 
     if form.validate_on_submit():
-        new_role = Role().create(
+        new_role = await Role().create(
             title=form.title.data,
             grade_id=form.grade.data,
             practice_id=form.practice.data,
@@ -95,9 +106,10 @@ def create(organisation_id):
     "/<uuid:organisation_id>/roles/<uuid:role_id>",
     methods=["GET"],
 )
-def view(organisation_id, role_id):
+@call_budget(1)
+async def view(organisation_id, role_id):
     """View a specific Role in an Role."""
-    role = Role().get(organisation_id=organisation_id, role_id=role_id)
+    role = await Role().get(organisation_id=organisation_id, role_id=role_id)
 
     return render_template(
         "view_role.html",
@@ -110,20 +122,23 @@ def view(organisation_id, role_id):
     "/<uuid:organisation_id>/roles/<uuid:role_id>/edit",
     methods=["GET", "POST"],
 )
-def edit(organisation_id, role_id):
+@call_budget(4)
+async def edit(organisation_id, role_id):
     """Edit a specific Role in an Role."""
-    role = Role().get(organisation_id=organisation_id, role_id=role_id)
+    role, grades, practices = await gather(
+        Role().get(organisation_id=organisation_id, role_id=role_id),
+        Grade().list(organisation_id=organisation_id),
+        Practice().list(organisation_id=organisation_id),
+    )
     form = RoleForm()
-    grades = Grade().list(organisation_id=organisation_id)
     if grades:
         form.grade.choices = [(grade["id"], grade["name"]) for grade in grades]
 
-    practices = Practice().list(organisation_id=organisation_id)
     if practices:
         form.practice.choices += [(practice["id"], practice["name"]) for practice in practices]
 
     if form.validate_on_submit():
-        changed_role = Role().edit(
+        changed_role = await Role().edit(
             role_id=role_id,
             title=form.title.data,
             grade_id=form.grade.data,
@@ -161,9 +176,10 @@ def edit(organisation_id, role_id):
     methods=["GET", "POST"],
 )
 @csrf.exempt
-def delete(organisation_id, role_id):
+@call_budget(2)
+async def delete(organisation_id, role_id):
     """Delete a specific Role in an Role."""
-    role = Role().get(organisation_id=organisation_id, role_id=role_id)
+    role = await Role().get(organisation_id=organisation_id, role_id=role_id)
 
     if request.method == "GET":
         return render_template(
@@ -172,15 +188,16 @@ def delete(organisation_id, role_id):
             role=role,
         )
     elif request.method == "POST":
-        Role().delete(organisation_id=organisation_id, role_id=role_id)
+        await Role().delete(organisation_id=organisation_id, role_id=role_id)
         flash("{} has been deleted.".format(role["title"]), "success")
         return redirect(url_for("role.list", organisation_id=organisation_id))
 
 
 @role.route("/<uuid:organisation_id>/roles/download", methods=["GET"])
+@call_budget(1)
 def download(organisation_id):
     """Download a list of Roles in an Organisation in CSV format."""
-    roles = Role().list(organisation_id=organisation_id)
+    roles = flux_api.Role().stream(organisation_id=organisation_id, filters={})
 
     def generate():
         data = StringIO()
@@ -0,0 +1,111 @@
+import itertools
+import time
+import zlib
+
+import brotli
+from app.integrations.instrumentation import get_request_timings
+from flask import Response, current_app, get_flashed_messages, request, stream_with_context
+
+# Characters of rendered HTML gathered into each chunk sent, so that every chunk is worth compressing and sending
+CHUNK_SIZE = 16 * 1024
+
+
+def buffered(fragments, size=CHUNK_SIZE):
+    """Join the small fragments of text a template generates into chunks of at least size characters."""
+    chunk = []
+    length = 0
+    for fragment in fragments:
+        chunk.append(fragment)
+        length += len(fragment)
+        if length >= size:
+            yield "".join(chunk)
+            chunk = []
+            length = 0
+    if chunk:
+        yield "".join(chunk)
+
+
+def timed(chunks, timings):
+    """Add the time spent generating each chunk to a request's render timings, as ``TimedTemplate.render`` does, so
+    that Flux API calls made meanwhile are counted as made while rendering templates."""
+    while True:
+        start = time.perf_counter()
+        timings.rendering += 1
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            return
+        finally:
+            timings.rendering -= 1
+            timings.render += time.perf_counter() - start
+        yield chunk
+
+
+def choose_algorithm(config):
+    """Choose the compression algorithm to stream HTML with: the one the client prefers of those Flask-Compress is
+    configured with, or None if Flask-Compress wouldn't compress HTML or the client would rather it wasn't."""
+    if not config["COMPRESS_REGISTER"] or "text/html" not in config["COMPRESS_MIMETYPES"]:
+        return None
+    algorithms = config["COMPRESS_ALGORITHM"]
+    if isinstance(algorithms, str):
+        algorithms = [algorithm.strip() for algorithm in algorithms.split(",")]
+    algorithm = request.accept_encodings.best_match([*algorithms, "identity"])
+    return None if algorithm == "identity" else algorithm
+
+
+def compressor(algorithm, config):
+    """Make a function that compresses each chunk of a response in turn, flushing it so that the client can decode
+    it straight away, and a function that finishes the compressed stream. Levels are as Flask-Compress uses them."""
+    if algorithm == "br":
+        encoder = brotli.Compressor(
+            mode=config["COMPRESS_BR_MODE"],
+            quality=config["COMPRESS_BR_LEVEL"],
+            lgwin=config["COMPRESS_BR_WINDOW"],
+            lgblock=config["COMPRESS_BR_BLOCK"],
+        )
+        return (lambda data: encoder.process(data) + encoder.flush()), encoder.finish
+
+    if algorithm == "gzip":
+        encoder = zlib.compressobj(config["COMPRESS_LEVEL"], zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    else:
+        encoder = zlib.compressobj(config["COMPRESS_DEFLATE_LEVEL"])
+    return (lambda data: encoder.compress(data) + encoder.flush(zlib.Z_SYNC_FLUSH)), encoder.flush
+
+
+def encoded(chunks, algorithm, config):
+    """Encode chunks of text as UTF-8, compressing them as they go with algorithm, if any."""
+    if algorithm is None:
+        for chunk in chunks:
+            yield chunk.encode()
+        return
+
+    compress_chunk, finish = compressor(algorithm, config)
+    for chunk in chunks:
+        yield compress_chunk(chunk.encode())
+    yield finish()
+
+
+def stream_template(template_name, **context):
+    """Render a template as a streamed response, sending its HTML a chunk at a time as it is rendered.
+
+    The response starts as soon as the first chunk is ready, and the whole page is never held in memory at once. It is
+    compressed incrementally with the algorithm Flask-Compress would choose, so that Flask-Compress doesn't buffer
+    it to compress it whole. The first chunk is rendered straight away, so that its errors fail the request and its
+    time is in the request's timings. The rest is rendered in the request context, after the request's after request
+    hooks have run, so headers can't be changed from them, and its time is added to the timings too late to report.
+    """
+    app = current_app._get_current_object()
+    app.update_template_context(context)
+    # Take any flashed messages from the session now, so that the session saved with the response no longer has them
+    get_flashed_messages(with_categories=True)
+    template = app.jinja_env.get_template(template_name)
+    algorithm = choose_algorithm(app.config)
+
+    chunks = timed(buffered(template.generate(context)), get_request_timings())
+    first = list(itertools.islice(chunks, 1))
+    body = encoded(itertools.chain(first, chunks), algorithm, app.config)
+    response = Response(stream_with_context(body), mimetype="text/html")
+    response.vary.add("Accept-Encoding")
+    if algorithm is not None:
+        response.headers["Content-Encoding"] = algorithm
+    return response
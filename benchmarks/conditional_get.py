@@ -0,0 +1,54 @@
+"""Compare downloading a large people list every time against revalidating it with a conditional GET.
+
+Run from the repository root with ``python -m benchmarks.conditional_get``.
+"""
+import argparse
+
+from app import create_app
+from app.integrations.flux_api import Person
+from config import Config
+
+from benchmarks.timing import measure, report
+from tests.stub_api import StubFluxAPI
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--people", type=int, default=5000)
+    args = parser.parse_args()
+
+    with StubFluxAPI() as stub:
+        organisation = stub.add_organisation(name="Benchmark", domain="example.com")
+        for number in range(args.people):
+            stub.add(
+                organisation["id"],
+                "people",
+                name=f"Person {number}",
+                email_address=f"person.{number}@example.com",
+                role={"id": "role", "title": "Developer", "grade": {"id": "grade", "name": "Senior"}, "practice": None},
+                location={"id": "location", "name": "Head office"},
+            )
+
+        for label, cache_size in (("download every time", 0), ("conditional GET", 128)):
+
+            class BenchmarkConfig(Config):
+                # Lists of people are cached, which would stop repeated requests from reaching upstream at all
+                FLUX_API_CACHE_TTL = 0
+                FLUX_API_URL = stub.url
+                FLUX_API_VALIDATOR_CACHE_SIZE = cache_size
+
+            app = create_app(BenchmarkConfig)
+
+            def list_people():
+                with app.app_context():
+                    Person().list(organisation_id=organisation["id"])
+
+            list_people()
+            stub.reset_counts()
+            timings = measure(list_people, args.iterations)
+            report(f"{label} ({stub.bytes_sent // args.iterations} B)", timings)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""Generate a synthetic organisation, shaped exactly as the Flux API returns its entities, and save it as JSON.
+
+The same seed and sizes always generate the same organisation, including its IDs and timestamps. Sizes not given
+are scaled from the number of people, in proportion to a large organisation of 50,000 people with 2,000 roles.
+
+Run from the repository root with ``python -m benchmarks.dataset --people 50000 --output organisation.json``.
+"""
+import argparse
+import json
+
+from tests.dataset import RATIOS, generate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--people", type=int, default=50000)
+    for name in RATIOS:
+        parser.add_argument(f"--{name}", type=int, help=f"number of {name}, scaled from the people by default")
+    parser.add_argument("--output", default="-", help="file to save the organisation to, or - for stdout")
+    args = parser.parse_args()
+
+    organisation, collections = generate(args.seed, args.people, **{name: getattr(args, name) for name in RATIOS})
+    data = json.dumps({"organisation": organisation, "collections": collections})
+    if args.output == "-":
+        print(data)
+    else:
+        with open(args.output, "w") as file:
+            file.write(data)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Compare decoding a large list response with json and strptime against the shared decode pipeline.
+
+Run from the repository root with ``python -m benchmarks.decoding``.
+"""
+import argparse
+import json
+from datetime import datetime
+
+from app.integrations import decoding
+
+from benchmarks.timing import measure, report
+from tests.stub_api import timestamp
+
+
+def decode_with_strptime(data):
+    result = json.loads(data.decode("utf-8"))
+    for item in result:
+        item["created_at"] = datetime.strptime(item["created_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
+        if item["updated_at"]:
+            item["updated_at"] = datetime.strptime(item["updated_at"], "%Y-%m-%dT%H:%M:%S.%f%z")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--items", type=int, default=10000)
+    args = parser.parse_args()
+
+    data = json.dumps(
+        [
+            {
+                "id": str(number),
+                "name": f"Person {number}",
+                "email_address": f"person.{number}@example.com",
+                "role": {"id": "role", "title": "Developer", "grade": {"id": "grade", "name": "Senior"}},
+                "location": {"id": "location", "name": "Head office"},
+                "created_at": timestamp(),
+                "updated_at": timestamp(),
+            }
+            for number in range(args.items)
+        ]
+    ).encode()
+
+    print(f"{args.items} items, {len(data)} B, orjson {'installed' if decoding.orjson else 'not installed'}")
+    report("json and strptime", measure(lambda: decode_with_strptime(data), args.iterations))
+    report("decode pipeline", measure(lambda: decoding.decode(data), args.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Compare the cost per row of building a people list page's links with url_for against building them with EntityURLs.
+
+Each row of ``list_people.html`` links to the person, their role, grade, practice and location, and to edit and
+delete the person. This times building those seven links for every row both ways, then reports the render time per
+row of the whole page, which builds its links with EntityURLs.
+
+Run from the repository root with ``python -m benchmarks.entity_urls``.
+"""
+import argparse
+import statistics
+
+import orjson
+from app import create_app
+from app.entity_urls import EntityURLs
+from app.integrations import decoding, models
+from app.integrations.pagination import Page
+from config import Config
+from flask import render_template, url_for
+
+from benchmarks.timing import measure
+from tests.dataset import generate
+
+
+def links_with_url_for(organisation_id, people):
+    for person in people:
+        url_for("person.view", organisation_id=organisation_id, person_id=person.id)
+        url_for("role.view", organisation_id=organisation_id, role_id=person.role.id)
+        url_for("grade.view", organisation_id=organisation_id, grade_id=person.role.grade.id)
+        if person.role.practice:
+            url_for("practice.view", organisation_id=organisation_id, practice_id=person.role.practice.id)
+        url_for("location.view", organisation_id=organisation_id, location_id=person.location.id)
+        url_for("person.edit", organisation_id=organisation_id, person_id=person.id)
+        url_for("person.delete", organisation_id=organisation_id, person_id=person.id)
+
+
+def links_with_entity_urls(organisation_id, people):
+    urls = EntityURLs(organisation_id)
+    for person in people:
+        urls("person.view", person.id)
+        urls("role.view", person.role.id)
+        urls("grade.view", person.role.grade.id)
+        if person.role.practice:
+            urls("practice.view", person.role.practice.id)
+        urls("location.view", person.location.id)
+        urls("person.edit", person.id)
+        urls("person.delete", person.id)
+
+
+def report_per_row(label, timings, rows):
+    """Print timings of whole pages in milliseconds as microseconds per row."""
+    quantiles = statistics.quantiles([timing * 1000 / rows for timing in timings], n=20)
+    print(f"{label:<28} p50 {quantiles[9]:7.2f} us/row   p95 {quantiles[18]:7.2f} us/row")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--people", type=int, default=2000)
+    args = parser.parse_args()
+
+    app = create_app(Config)
+    app.logger.disabled = True
+    organisation, collections = generate(people=args.people)
+    people = decoding.decode(orjson.dumps(collections["people"]), models.Person)
+    organisation_id = organisation["id"]
+    page = Page(people, 1, len(people), False)
+
+    print(f"{args.people} people")
+    with app.test_request_context(f"/organisations/{organisation_id}/people/", base_url="https://localhost"):
+        for label, func in (
+            ("links with url_for", lambda: links_with_url_for(organisation_id, people)),
+            ("links with EntityURLs", lambda: links_with_entity_urls(organisation_id, people)),
+            (
+                "render list_people.html",
+                lambda: render_template("list_people.html", title="People", organisation=organisation, people=page),
+            ),
+        ):
+            report_per_row(label, measure(func, args.iterations), args.people)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Serve a synthetic organisation from a fake Flux API, for running and load testing the app locally.
+
+The fake serves every ``/v1/organisations/...`` endpoint the app uses, with the same filters, and adds nested
+references to the entities it is sent, as the Flux API does. Latency, server errors and 429 Too Many Requests
+responses can be injected into a proportion of requests.
+
+Run from the repository root with, for example,
+``python -m benchmarks.fake_flux_api --people 50000 --latency 0.02 --error-rate 0.01``, then run the app with
+``FLUX_API_URL`` set to the URL it prints.
+"""
+import argparse
+import time
+
+from tests.dataset import RATIOS, generate
+from tests.fake_flux_api import FakeFluxAPI
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=0, help="seed for the organisation and injected failures")
+    parser.add_argument("--people", type=int, default=50000)
+    for name in RATIOS:
+        parser.add_argument(f"--{name}", type=int, help=f"number of {name}, scaled from the people by default")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many seconds added at random")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="proportion of requests failing with 5xx")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="proportion of requests getting a 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with each 429")
+    args = parser.parse_args()
+
+    organisation, collections = generate(args.seed, args.people, **{name: getattr(args, name) for name in RATIOS})
+    fake = FakeFluxAPI(
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        seed=args.seed,
+        latency=args.latency,
+        host=args.host,
+        port=args.port,
+    )
+    fake.load(organisation, collections)
+    with fake:
+        print(f"Serving {organisation['name']} with {args.people} people at FLUX_API_URL={fake.url}")
+        print(f"Organisation: {fake.url}/v1/organisations/{organisation['id']}")
+        try:
+            while True:
+                time.sleep(60)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Compare the memory held by a large list of people decoded as dicts against one decoded as entity models.
+
+Run from the repository root with ``python -m benchmarks.models``.
+"""
+import argparse
+import gc
+import json
+import tracemalloc
+
+from app.integrations import decoding, models
+
+from benchmarks.timing import measure, report
+from tests.stub_api import timestamp
+
+
+def retained(func):
+    """Call func and return the number of bytes still allocated by the result it returns."""
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--items", type=int, default=10000)
+    args = parser.parse_args()
+
+    data = json.dumps(
+        [
+            {
+                "id": str(number),
+                "name": f"Person {number}",
+                "email_address": f"person.{number}@example.com",
+                "full_time_equivalent": 1.0,
+                "employment": "permanent",
+                "role": {
+                    "id": f"role-{number % 20}",
+                    "title": f"Role {number % 20}",
+                    "grade": {"id": f"grade-{number % 5}", "name": f"Grade {number % 5}"},
+                    "practice": {"id": f"practice-{number % 4}", "name": f"Practice {number % 4}"},
+                },
+                "location": {"id": f"location-{number % 3}", "name": f"Location {number % 3}"},
+                "organisation": {"id": "organisation", "name": "Mash"},
+                "created_at": timestamp(),
+                "updated_at": timestamp(),
+            }
+            for number in range(args.items)
+        ]
+    ).encode()
+
+    print(f"{args.items} people, {len(data)} B")
+    print(f"{'dicts':<28} {retained(lambda: decoding.decode(data)) / 1024:8.0f} KiB")
+    print(f"{'models':<28} {retained(lambda: decoding.decode(data, models.Person)) / 1024:8.0f} KiB")
+    report("decode to dicts", measure(lambda: decoding.decode(data), args.iterations))
+    report("decode to models", measure(lambda: decoding.decode(data, models.Person), args.iterations))
+
+
+if __name__ == "__main__":
+    main()
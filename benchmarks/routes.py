@@ -0,0 +1,130 @@
+"""Measure every page of the app against a fake Flux API holding a synthetic organisation of a given size.
+
+Each route is requested repeatedly through the test client, reporting its p50 and p95 latency, the Flux API calls
+it makes per request and the peak memory allocated while handling it. Results can be saved as JSON and compared
+against an earlier run, failing if any route's p95 latency has regressed by more than a threshold.
+
+Forms are posted with valid data, and every route must respond as it would in the tests, with a 302 for forms
+posted and a 200 otherwise. Email addresses are treated as deliverable, without looking them up over DNS.
+
+Run from the repository root with ``python -m benchmarks.routes``, for example
+``python -m benchmarks.routes --people 2000 --latency 0.005 --save before.json``.
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+
+from app import create_app
+from config import Config
+
+from tests.fake_flux_api import FakeFluxAPI
+from tests.routes import deliverable_emails, entities, expected_status, populate, remove_added, routes
+
+
+def measure_route(test_client, stub, method, path, data, iterations):
+    """Request a route iterations times, returning its timings in milliseconds, and the status, Flux API calls made
+    and peak memory allocated by one more request. Entities created along the way are removed afterwards."""
+    held = entities(stub)
+    timings = []
+    for _ in range(iterations):
+        url = path()
+        start = time.perf_counter()
+        response = test_client.open(url, method=method, data=data, base_url="https://localhost")
+        response.get_data()
+        timings.append((time.perf_counter() - start) * 1000)
+        if response.status_code != expected_status(method):
+            raise RuntimeError(f"{method} {url} returned {response.status_code}")
+
+    url = path()
+    stub.reset_counts()
+    tracemalloc.start()
+    response = test_client.open(url, method=method, data=data, base_url="https://localhost")
+    response.get_data()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    remove_added(stub, held)
+    return timings, response.status_code, len(stub.requests), peak
+
+
+def summarise(timings, status, calls, peak):
+    quantiles = statistics.quantiles(timings, n=20) if len(timings) > 1 else timings * 19
+    return {
+        "p50": round(quantiles[9], 2),
+        "p95": round(quantiles[18], 2),
+        "status": status,
+        "calls": calls,
+        "peak_kib": peak // 1024,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Print how each route's p95 latency has changed since a baseline, returning the routes that regressed."""
+    regressed = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        change = (result["p95"] - before["p95"]) / before["p95"] if before["p95"] else 0.0
+        flag = "  REGRESSED" if change > threshold else ""
+        print(f"{name:<28} p95 {before['p95']:8.2f} ms -> {result['p95']:8.2f} ms ({change:+.0%}){flag}")
+        if flag:
+            regressed.append(name)
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument(
+        "--people", type=int, default=1000, help="people in the organisation, with other entities to scale"
+    )
+    parser.add_argument("--latency", type=float, default=0.0, help="artificial Flux API latency in seconds")
+    parser.add_argument("--no-cache", action="store_true", help="disable the Flux API result cache")
+    parser.add_argument("--route", action="append", help="only measure routes whose name contains this")
+    parser.add_argument("--save", help="save the results as JSON to this path")
+    parser.add_argument("--compare", help="compare the results against JSON saved by an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.2, help="p95 increase counted as a regression")
+    args = parser.parse_args()
+
+    with FakeFluxAPI(latency=args.latency) as stub, deliverable_emails():
+        dataset = populate(stub, args.people)
+
+        class BenchmarkConfig(Config):
+            FLUX_API_URL = stub.url
+            FLUX_API_CACHE_TTL = 0 if args.no_cache else Config.FLUX_API_CACHE_TTL
+            RATELIMIT_ENABLED = False
+            WTF_CSRF_ENABLED = False
+
+        app = create_app(BenchmarkConfig)
+        app.logger.disabled = True
+
+        results = {}
+        print(f"{'route':<28} {'p50':>9} {'p95':>9} {'status':>6} {'calls':>6} {'peak':>10}")
+        with app.test_client() as test_client:
+            for name, method, path, data in routes(stub, dataset):
+                label = f"{method} {name}"
+                if args.route and not any(route in label for route in args.route):
+                    continue
+                result = results[label] = summarise(
+                    *measure_route(test_client, stub, method, path, data, args.iterations)
+                )
+                print(
+                    f"{label:<28} {result['p50']:6.2f} ms {result['p95']:6.2f} ms "
+                    f"{result['status']:6} {result['calls']:6} {result['peak_kib']:6} KiB"
+                )
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            regressed = compare(results, json.load(file), args.threshold)
+        if regressed:
+            sys.exit(f"{len(regressed)} routes regressed by more than {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Compare per-request latency of one-off connections against the pooled Flux API session.
+
+Run from the repository root with ``python -m benchmarks.session_pooling``.
+"""
+import argparse
+
+import requests
+from app import create_app
+from app.integrations.flux_api import Organisation
+from config import Config
+
+from benchmarks.timing import measure, report
+from tests.stub_api import StubFluxAPI
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.0, help="artificial stub API latency in seconds")
+    args = parser.parse_args()
+
+    with StubFluxAPI(latency=args.latency) as stub:
+        organisation = stub.add_organisation(name="Benchmark", domain="example.com")
+        url = f"{stub.url}/v1/organisations/{organisation['id']}"
+
+        class BenchmarkConfig(Config):
+            FLUX_API_URL = stub.url
+            FLUX_API_CACHE_TTL = 0
+
+        app = create_app(BenchmarkConfig)
+
+        def one_off_get():
+            requests.get(url, headers={"Accept": "application/json"}, timeout=5)
+
+        def pooled_get():
+            # A new app context per call, as in a real request, so nothing is served from the identity map
+            with app.app_context():
+                Organisation().get(organisation_id=organisation["id"])
+
+        before = measure(one_off_get, args.iterations)
+        connections_before = stub.connections
+        stub.reset_counts()
+
+        after = measure(pooled_get, args.iterations)
+        connections_after = stub.connections
+
+    report(f"new connection per call ({connections_before})", before)
+    report(f"pooled session ({connections_after})", after)
+
+
+if __name__ == "__main__":
+    main()
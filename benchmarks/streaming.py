@@ -0,0 +1,86 @@
+"""Compare rendering a large people list page whole against streaming it, with gzip compression as a browser asks.
+
+Rendered whole, the page's HTML is held in memory and then compressed in one go, as Flask-Compress does, before
+the first byte can be sent. Streamed, it is rendered and compressed a chunk at a time. For each size of list this
+reports the time to the first byte, the total time and the peak memory allocated while rendering.
+
+Run from the repository root with ``python -m benchmarks.streaming``, for example
+``python -m benchmarks.streaming --people 1000 5000 20000``.
+"""
+import argparse
+import gzip
+import statistics
+import time
+import tracemalloc
+
+import orjson
+from app import create_app
+from app.integrations import decoding, models
+from app.integrations.pagination import Page
+from app.streaming import stream_template
+from config import Config
+from flask import render_template
+
+from tests.dataset import generate
+
+
+def render_whole(context):
+    chunks = [gzip.compress(render_template("list_people.html", **context).encode(), 6)]
+    return iter(chunks)
+
+
+def render_streamed(context):
+    response = stream_template("list_people.html", **context)
+    return iter(response.response)
+
+
+def measure(render, context, iterations):
+    """Render a page iterations times, returning the median milliseconds to the first and last chunk, the bytes sent,
+    and the peak memory allocated by one more render."""
+    first, total = [], []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        chunks = render(context)
+        next(chunks)
+        first.append((time.perf_counter() - start) * 1000)
+        for _ in chunks:
+            pass
+        total.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    size = sum(len(chunk) for chunk in render(context))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(first), statistics.median(total), size, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--people", type=int, nargs="+", default=[1000, 5000, 20000])
+    args = parser.parse_args()
+
+    app = create_app(Config)
+    app.logger.disabled = True
+
+    print(f"{'people':>7} {'rendering':<10} {'first byte':>12} {'total':>12} {'sent':>10} {'peak':>10}")
+    for count in args.people:
+        organisation, collections = generate(people=count)
+        people = decoding.decode(orjson.dumps(collections["people"]), models.Person)
+        context = {
+            "title": "People",
+            "organisation": organisation,
+            "people": Page(people, 1, len(people), False),
+        }
+        path = f"/organisations/{organisation['id']}/people/"
+        with app.test_request_context(path, base_url="https://localhost", headers={"Accept-Encoding": "gzip"}):
+            for label, render in (("whole", render_whole), ("streamed", render_streamed)):
+                first, total, size, peak = measure(render, context, args.iterations)
+                print(
+                    f"{count:7} {label:<10} {first:9.2f} ms {total:9.2f} ms "
+                    f"{size // 1024:6} KiB {peak // 1024:6} KiB"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+import statistics
+import time
+
+
+def measure(func, iterations):
+    """Call func repeatedly and return the duration of each call in milliseconds."""
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(label, timings):
+    quantiles = statistics.quantiles(timings, n=20)
+    print(
+        f"{label:<28} mean {statistics.mean(timings):6.2f} ms   "
+        f"p50 {quantiles[9]:6.2f} ms   p95 {quantiles[18]:6.2f} ms"
+    )
@@ -1,12 +1,43 @@
 import os
+import tempfile
 
 
 class Config(object):
     RATELIMIT_HEADERS_ENABLED = True
     RATELIMIT_STORAGE_URL = os.environ.get("REDIS_URL") or "memory://"
+    REDIS_URL = os.environ.get("REDIS_URL")
     SECRET_KEY = os.environ.get("SECRET_KEY") or "your_secret_key_goes_here"
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SECURE = True
     FLUX_API_URL = os.environ.get("FLUX_API_URL") or "http://localhost:3000"
     FLUX_API_VERSION = os.environ.get("FLUX_API_VERSION") or "v1"
-    TIMEOUT = os.environ.get("TIMEOUT") or 5
+    FLUX_API_POOL_SIZE = int(os.environ.get("FLUX_API_POOL_SIZE") or 10)
+    FLUX_API_KEEP_ALIVE = (os.environ.get("FLUX_API_KEEP_ALIVE") or "true").lower() == "true"
+    FLUX_API_CACHE_TTL = int(os.environ.get("FLUX_API_CACHE_TTL") or (300 if os.environ.get("REDIS_URL") else 10))
+    FLUX_API_STALE_WHILE_REVALIDATE = int(os.environ.get("FLUX_API_STALE_WHILE_REVALIDATE") or 60)
+    FLUX_API_CACHE_EARLY_REFRESH = float(os.environ.get("FLUX_API_CACHE_EARLY_REFRESH") or 1.0)
+    FLUX_API_REFRESH_WORKERS = int(os.environ.get("FLUX_API_REFRESH_WORKERS") or 2)
+    FLUX_API_VALIDATOR_CACHE_SIZE = int(os.environ.get("FLUX_API_VALIDATOR_CACHE_SIZE") or 128)
+    FLUX_API_PEOPLE_INDEXES = int(os.environ.get("FLUX_API_PEOPLE_INDEXES") or 50)
+    FLUX_API_CONNECT_TIMEOUT = float(os.environ.get("FLUX_API_CONNECT_TIMEOUT") or 3.05)
+    FLUX_API_BREAKER_WINDOW = int(os.environ.get("FLUX_API_BREAKER_WINDOW") or 20)
+    FLUX_API_BREAKER_MIN_CALLS = int(os.environ.get("FLUX_API_BREAKER_MIN_CALLS") or 5)
+    FLUX_API_BREAKER_FAILURE_RATE = float(os.environ.get("FLUX_API_BREAKER_FAILURE_RATE") or 0.5)
+    FLUX_API_BREAKER_SLOW_CALL = float(os.environ.get("FLUX_API_BREAKER_SLOW_CALL") or 2.0)
+    FLUX_API_BREAKER_RESET_TIMEOUT = float(os.environ.get("FLUX_API_BREAKER_RESET_TIMEOUT") or 30)
+    FLUX_API_RETRIES = int(os.environ.get("FLUX_API_RETRIES") or 2)
+    FLUX_API_RETRY_BACKOFF = float(os.environ.get("FLUX_API_RETRY_BACKOFF") or 0.1)
+    FLUX_API_RETRY_MAX_BACKOFF = float(os.environ.get("FLUX_API_RETRY_MAX_BACKOFF") or 2.0)
+    FLUX_API_RETRY_BUDGET = int(os.environ.get("FLUX_API_RETRY_BUDGET") or 3)
+    FLUX_API_DEGRADED_TIMEOUT = float(os.environ.get("FLUX_API_DEGRADED_TIMEOUT") or 30)
+    FLUX_API_DEGRADED_FAILURES = int(os.environ.get("FLUX_API_DEGRADED_FAILURES") or 3)
+    FLUX_API_SINGLE_FLIGHT = (os.environ.get("FLUX_API_SINGLE_FLIGHT") or "true").lower() == "true"
+    FLUX_API_DEADLINE = float(os.environ.get("FLUX_API_DEADLINE") or 10)
+    FLUX_API_ENFORCE_CALL_BUDGETS = (os.environ.get("FLUX_API_ENFORCE_CALL_BUDGETS") or "false").lower() == "true"
+    PROFILING_TOKEN = os.environ.get("PROFILING_TOKEN")
+    PROFILING_SAMPLE_RATE = float(os.environ.get("PROFILING_SAMPLE_RATE") or 0)
+    PROFILING_INTERVAL = float(os.environ.get("PROFILING_INTERVAL") or 0.005)
+    PROFILING_DIR = os.environ.get("PROFILING_DIR") or os.path.join(tempfile.gettempdir(), "flux-ui-profiles")
+    PROFILING_KEEP = int(os.environ.get("PROFILING_KEEP") or 50)
+    SERVER_TIMING = (os.environ.get("SERVER_TIMING") or "true").lower() == "true"
+    TIMEOUT = float(os.environ.get("TIMEOUT") or 5)
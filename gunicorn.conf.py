@@ -0,0 +1,12 @@
+import os
+
+from prometheus_client import multiprocess
+
+
+def child_exit(server, worker):
+    """Stop counting a worker's in-progress requests once it exits, when metrics are shared between workers.
+
+    Without PROMETHEUS_MULTIPROC_DIR each worker keeps its own metrics, so there is nothing to clean up.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(worker.pid)
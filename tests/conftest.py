@@ -0,0 +1,38 @@
+import pytest
+from app import create_app
+from app.integrations import flux_api_async
+from config import Config
+
+from tests.stub_api import StubFluxAPI
+
+
+@pytest.fixture
+def stub_api():
+    with StubFluxAPI() as stub:
+        yield stub
+
+
+@pytest.fixture
+def app(stub_api):
+    class TestConfig(Config):
+        FLUX_API_ENFORCE_CALL_BUDGETS = True
+        FLUX_API_URL = stub_api.url
+        RATELIMIT_ENABLED = False
+        TESTING = True
+        WTF_CSRF_ENABLED = False
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        yield app
+        flux_api_async.run(flux_api_async.close_client())
+
+
+@pytest.fixture
+def get():
+    """Get a page from an app with a new test client, over HTTPS as the app is served."""
+
+    def get(app, path, **kwargs):
+        with app.test_client() as test_client:
+            return test_client.get(path, base_url="https://localhost", **kwargs)
+
+    return get
@@ -0,0 +1,188 @@
+"""Generate a synthetic organisation, shaped exactly as the Flux API returns its entities.
+
+The same seed and sizes always generate the same organisation, including its IDs and timestamps. Sizes not given
+are scaled from the number of people, in proportion to a large organisation of 50,000 people with 2,000 roles.
+"""
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+# The number of each entity in a large organisation, per person
+RATIOS = {
+    "roles": 2000 / 50000,
+    "grades": 100 / 50000,
+    "practices": 100 / 50000,
+    "locations": 300 / 50000,
+    "programmes": 200 / 50000,
+    "projects": 800 / 50000,
+}
+
+FIRST_NAMES = tuple(
+    "Ada Alan Barbara Charles Dorothy Edsger Frances Grace Hedy Ivan Joan Ken Katherine Linus Margaret Niklaus Radia "
+    "Sophie Tim Whitfield".split()
+)
+LAST_NAMES = tuple(
+    "Allen Babbage Berners-Lee Dijkstra Diffie Goldberg Hamilton Hopper Johnson Kay Lamarr Liskov Lovelace Perlman "
+    "Ritchie Shirley Sutherland Thompson Turing Wirth".split()
+)
+GRADES = ("Apprentice", "Associate", "Junior", "Mid", "Senior", "Lead", "Principal", "Head", "Director")
+ROLES = ("Developer", "Designer", "Analyst", "Architect", "Engineer", "Manager", "Researcher", "Tester", "Writer")
+PRACTICES = ("Engineering", "Design", "Data", "Product", "Delivery", "Research", "Security", "Operations")
+CITIES = ("Leeds", "London", "Manchester", "Bristol", "Cardiff", "Edinburgh", "Belfast", "Newcastle", "Glasgow")
+STATUSES = ("active", "active", "active", "paused", "closed")
+
+# When the generated entities were first created
+EPOCH = datetime(2021, 1, 1, tzinfo=timezone.utc)
+
+
+class Generator:
+    """Generates entities from a seeded random number generator, so that each run generates the same ones."""
+
+    def __init__(self, seed):
+        self.random = random.Random(seed)
+
+    def id(self):
+        return str(uuid.UUID(int=self.random.getrandbits(128), version=4))
+
+    def timestamp(self, after=EPOCH):
+        seconds = self.random.randint(1, 180 * 24 * 60 * 60)
+        moment = after + timedelta(seconds=seconds, microseconds=self.random.randint(0, 999999))
+        return moment.isoformat(timespec="microseconds")
+
+    def entity(self, organisation, **fields):
+        """An entity of the organisation, with an ID, timestamps, and updated for about a third of entities."""
+        created_at = self.timestamp()
+        updated = self.random.random() < 0.3
+        updated_at = self.timestamp(datetime.fromisoformat(created_at)) if updated else None
+        return {
+            "id": self.id(),
+            **fields,
+            "organisation": organisation,
+            "created_at": created_at,
+            "updated_at": updated_at,
+        }
+
+    def choice(self, items, none=0.0):
+        """Choose one of items at random, or None with the given probability."""
+        if not items or self.random.random() < none:
+            return None
+        return self.random.choice(items)
+
+
+def reference(entity, *fields):
+    """A nested reference to an entity, as the Flux API includes in the entities that refer to it."""
+    if entity is None:
+        return None
+    return {"id": entity["id"], **{field: entity[field] for field in fields}}
+
+
+def generate(seed=0, people=50000, **sizes):
+    """Generate an organisation with the given number of people, and of each other entity in sizes, such as roles.
+
+    Returns the organisation and a list of the entities in each of its collections, keyed by the collection's name
+    in the Flux API, such as ``people``.
+    """
+    sizes = {name: max(sizes.get(name) or round(people * ratio), 1) for name, ratio in RATIOS.items()}
+    generator = Generator(seed)
+    organisation = {
+        "id": generator.id(),
+        "name": f"Synthetic {seed}",
+        "domain": f"synthetic-{seed}.example.com",
+        "created_at": generator.timestamp(),
+        "updated_at": None,
+    }
+    owner = reference(organisation, "name")
+
+    grades = [
+        generator.entity(owner, name=f"{GRADES[number % len(GRADES)]} {number // len(GRADES) + 1}")
+        for number in range(sizes["grades"])
+    ]
+    practices = [
+        generator.entity(
+            owner,
+            name=f"{PRACTICES[number % len(PRACTICES)]} {number // len(PRACTICES) + 1}",
+            head=None,
+            cost_centre=f"CC{number:04}",
+        )
+        for number in range(sizes["practices"])
+    ]
+    locations = [
+        generator.entity(
+            owner,
+            name=f"{CITIES[number % len(CITIES)]} {number // len(CITIES) + 1}",
+            address=f"{number + 1} High Street, {CITIES[number % len(CITIES)]}",
+        )
+        for number in range(sizes["locations"])
+    ]
+    roles = [
+        generator.entity(
+            owner,
+            title=f"{ROLES[number % len(ROLES)]} {number // len(ROLES) + 1}",
+            grade=reference(generator.choice(grades), "name"),
+            practice=reference(generator.choice(practices, none=0.1), "name"),
+        )
+        for number in range(sizes["roles"])
+    ]
+    role_references = {role["id"]: reference(role, "title", "grade", "practice") for role in roles}
+    location_references = {location["id"]: reference(location, "name") for location in locations}
+
+    staff = []
+    for number in range(people):
+        first_name = generator.choice(FIRST_NAMES)
+        last_name = generator.choice(LAST_NAMES)
+        staff.append(
+            generator.entity(
+                owner,
+                name=f"{first_name} {last_name}",
+                email_address=f"{first_name}.{last_name}.{number}@{organisation['domain']}".lower(),
+                full_time_equivalent=generator.choice((1.0, 1.0, 1.0, 1.0, 0.8, 0.6, 0.5)),
+                employment=generator.choice(("permanent", "permanent", "permanent", "contract")),
+                role=role_references[generator.choice(roles)["id"]],
+                location=location_references[generator.choice(locations)["id"]],
+            )
+        )
+
+    managers = [reference(person, "name") for person in generator.random.sample(staff, min(len(staff), 50))]
+    for practice in practices:
+        practice["head"] = generator.choice(managers, none=0.2)
+    programmes = [
+        generator.entity(owner, name=f"Programme {number + 1}", manager=generator.choice(managers, none=0.1))
+        for number in range(sizes["programmes"])
+    ]
+    projects = [
+        generator.entity(
+            owner,
+            name=f"Project {number + 1}",
+            status=generator.choice(STATUSES),
+            manager=generator.choice(managers, none=0.1),
+            programme=reference(generator.choice(programmes, none=0.2), "name"),
+        )
+        for number in range(sizes["projects"])
+    ]
+
+    set_counts(grades, "grade", roles, "roles")
+    set_counts(practices, "practice", roles, "roles")
+    set_counts(roles, "role", staff, "people")
+    set_counts(locations, "location", staff, "people")
+    set_counts(programmes, "programme", projects, "projects")
+    collections = {
+        "grades": grades,
+        "practices": practices,
+        "locations": locations,
+        "roles": roles,
+        "people": staff,
+        "programmes": programmes,
+        "projects": projects,
+    }
+    organisation.update({name: len(entities) for name, entities in collections.items()})
+    return organisation, collections
+
+
+def set_counts(entities, field, items, name):
+    """Set the number of items that refer to each entity in field, as the entity's name field."""
+    counts = {}
+    for item in items:
+        if item[field]:
+            counts[item[field]["id"]] = counts.get(item[field]["id"], 0) + 1
+    for entity in entities:
+        entity[name] = counts.get(entity["id"], 0)
@@ -0,0 +1,98 @@
+"""A fake Flux API serving a synthetic organisation, for running the app against locally and in tests.
+
+The fake serves every ``/v1/organisations/...`` endpoint the app uses, with the same filters, and adds nested
+references to the entities it is sent, as the Flux API does. Latency, server errors and 429 Too Many Requests
+responses can be injected into a proportion of requests.
+"""
+import random
+
+from tests.dataset import reference
+from tests.stub_api import StubFluxAPI
+
+# The collection each ID field sent to the Flux API refers to, with the fields of the nested reference it becomes
+REFERENCES = {
+    "grade_id": ("grade", "grades", ("name",)),
+    "practice_id": ("practice", "practices", ("name",)),
+    "location_id": ("location", "locations", ("name",)),
+    "role_id": ("role", "roles", ("title", "grade", "practice")),
+    "manager_id": ("manager", "people", ("name",)),
+    "head_id": ("head", "people", ("name",)),
+    "programme_id": ("programme", "programmes", ("name",)),
+}
+
+# The optional references of each collection's entities, which are null when their ID isn't sent
+OPTIONAL = {
+    "practices": ("head",),
+    "roles": ("practice",),
+    "programmes": ("manager",),
+    "projects": ("manager", "programme"),
+}
+
+
+class FakeFluxAPI(StubFluxAPI):
+    """A stub Flux API that behaves like the real one closely enough to run the app against.
+
+    IDs sent in request bodies, such as ``role_id``, are stored as nested references to the entities they refer to,
+    and lists can be filtered by them. ``jitter`` adds up to that many seconds to the latency of each request at
+    random. Of the requests that would succeed, ``error_rate`` fail with a 500 or 503, and ``rate_limit_rate`` with
+    a 429 asking to retry after ``retry_after`` seconds.
+    """
+
+    def __init__(self, jitter=0.0, error_rate=0.0, rate_limit_rate=0.0, retry_after=1, seed=0, **kwargs):
+        super().__init__(**kwargs)
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+
+    def delay(self):
+        with self.lock:
+            return self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def next_failure(self):
+        failure = super().next_failure()
+        if failure:
+            return failure
+        with self.lock:
+            chance = self.random.random()
+            if chance < self.error_rate:
+                return {"status": self.random.choice((500, 503)), "retry_after": None}
+            if chance < self.error_rate + self.rate_limit_rate:
+                return {"status": 429, "retry_after": self.retry_after}
+        return None
+
+    def handle(self, method, parts, query, body):
+        if body and len(parts) > 3 and parts[2] in self.organisations:
+            body = self._resolve(parts[2], parts[3], body)
+        return super().handle(method, parts, query, body)
+
+    def _resolve(self, organisation_id, collection, body):
+        """Replace the IDs in a request body with nested references to the entities they refer to."""
+        organisation = self.organisations[organisation_id]
+        resolved = {field: None for field in OPTIONAL.get(collection, ())}
+        resolved["organisation"] = reference(organisation, "name")
+        for name, value in body.items():
+            if name in REFERENCES:
+                field, collection, fields = REFERENCES[name]
+                entity = self.collections.get((organisation_id, collection), {}).get(value)
+                resolved[field] = reference(entity, *fields)
+            else:
+                resolved[name] = value
+        return resolved
+
+    def _matches(self, item, query):
+        for key, values in query.items():
+            value = values[0]
+            if not value:
+                continue
+            if key in ("name", "title"):
+                if value.lower() not in str(item.get(key, "")).lower():
+                    return False
+            elif key in REFERENCES:
+                nested = item.get(REFERENCES[key][0])
+                if not nested or nested["id"] != value:
+                    return False
+            elif str(item.get(key)) != value:
+                return False
+        return True
@@ -0,0 +1,127 @@
+"""Every route of the app, for requesting each in turn against a fake Flux API holding a synthetic organisation.
+
+Forms are posted with valid data, so should redirect with a 302. The person form checks that email addresses are
+deliverable over DNS, so ``deliverable_emails`` skips that check, as it would fail without network access.
+"""
+from contextlib import contextmanager
+
+import email_validator
+
+from tests.dataset import generate
+
+# The Flux API collection each blueprint's entities belong to
+COLLECTIONS = {
+    "organisation": "organisations",
+    "grade": "grades",
+    "location": "locations",
+    "practice": "practices",
+    "role": "roles",
+    "person": "people",
+    "programme": "programmes",
+    "project": "projects",
+}
+
+
+def populate(stub, people):
+    """Load a synthetic organisation with the given number of people into the fake Flux API, returning the first
+    entity of each blueprint."""
+    organisation, collections = generate(people=people)
+    stub.load(organisation, collections)
+    return {
+        "organisation": organisation,
+        **{blueprint: collections[name][0] for blueprint, name in COLLECTIONS.items() if blueprint != "organisation"},
+    }
+
+
+def form_data(blueprint, dataset):
+    """Valid form data for creating or editing an entity of a blueprint."""
+    return {
+        "organisation": {"name": "Benchmark", "domain": "example.com"},
+        "grade": {"name": "Grade"},
+        "location": {"name": "Location", "address": "1 High Street"},
+        "practice": {"name": "Practice", "head": "", "cost_centre": "CC"},
+        "role": {"title": "Role", "grade": dataset["grade"]["id"], "practice": ""},
+        "person": {
+            "name": "Person",
+            "email_address": "person@example.com",
+            "role": dataset["role"]["id"],
+            "employment": "permanent",
+            "full_time_equivalent": "1.0",
+            "location": dataset["location"]["id"],
+        },
+        "programme": {"name": "Programme", "manager": ""},
+        "project": {"name": "Project", "manager": "", "programme": "", "status": "active"},
+    }[blueprint]
+
+
+def copy_fields(entity):
+    """Get the fields of an entity that a copy of it would be added with."""
+    return {name: value for name, value in entity.items() if name not in ("id", "created_at", "updated_at")}
+
+
+def routes(stub, dataset):
+    """Describe each route to measure, as its name, method, a function returning the path to request, and any form
+    data. Delete routes add a new entity to delete each time, before the request is timed."""
+    organisation_id = dataset["organisation"]["id"]
+
+    for blueprint, resource in COLLECTIONS.items():
+        if blueprint == "organisation":
+            collection = "/organisations"
+            item = f"{collection}/{organisation_id}"
+
+            def new_item():
+                return f"/organisations/{stub.add_organisation(**copy_fields(dataset['organisation']))['id']}"
+
+        else:
+            collection = f"/organisations/{organisation_id}/{resource}"
+            item = f"{collection}/{dataset[blueprint]['id']}"
+
+            def new_item(collection=collection, resource=resource, fields=copy_fields(dataset[blueprint])):
+                return f"{collection}/{stub.add(organisation_id, resource, **fields)['id']}"
+
+        data = form_data(blueprint, dataset)
+        list_path = collection if blueprint == "grade" else f"{collection}/"
+        yield f"{blueprint}.list", "GET", lambda path=list_path: path, None
+        yield f"{blueprint}.view", "GET", lambda path=item: path, None
+        yield f"{blueprint}.create", "GET", lambda path=f"{collection}/new": path, None
+        yield f"{blueprint}.create", "POST", lambda path=f"{collection}/new": path, data
+        yield f"{blueprint}.edit", "GET", lambda path=f"{item}/edit": path, None
+        yield f"{blueprint}.edit", "POST", lambda path=f"{item}/edit": path, data
+        yield f"{blueprint}.delete", "GET", lambda new_item=new_item: f"{new_item()}/delete", None
+        yield f"{blueprint}.delete", "POST", lambda new_item=new_item: f"{new_item()}/delete", {}
+        if blueprint != "organisation":
+            yield f"{blueprint}.download", "GET", lambda path=f"{collection}/download": path, None
+
+
+def remove_added(stub, entities):
+    """Remove the entities added to the stub since it held the given ones, so that entities created by one route,
+    without the nested references the Flux API would add, aren't shown by the next."""
+    with stub.lock:
+        for key, items in stub.collections.items():
+            for item_id in set(items) - entities.get(key, set()):
+                del items[item_id]
+        for organisation_id in set(stub.organisations) - entities.get("organisations", set()):
+            del stub.organisations[organisation_id]
+
+
+def entities(stub):
+    with stub.lock:
+        held = {key: set(items) for key, items in stub.collections.items()}
+        held["organisations"] = set(stub.organisations)
+    return held
+
+
+def expected_status(method):
+    """The status every route should respond with to a request with method: forms posted redirect."""
+    return 302 if method == "POST" else 200
+
+
+@contextmanager
+def deliverable_emails():
+    """Treat every email address's domain as deliverable, without looking up its MX records over DNS."""
+    check = email_validator.validate_email_deliverability
+    email_validator.validate_email_deliverability = lambda *args, **kwargs: {}
+    try:
+        yield
+    finally:
+        email_validator.validate_email_deliverability = check
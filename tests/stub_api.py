@@ -0,0 +1,228 @@
+import hashlib
+import json
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+def timestamp():
+    return datetime.now(timezone.utc).isoformat(timespec="microseconds")
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self.server.stub.lock:
+            self.server.stub.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def do_PUT(self):
+        self.dispatch("PUT")
+
+    def do_DELETE(self):
+        self.dispatch("DELETE")
+
+    def dispatch(self, method):
+        stub = self.server.stub
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+
+        with stub.lock:
+            stub.requests.append((method, url.path))
+        delay = stub.delay()
+        if delay:
+            time.sleep(delay)
+
+        failure = stub.next_failure()
+        if failure:
+            status, payload = failure["status"], None
+        elif stub.status:
+            status, payload = stub.status, None
+        else:
+            status, payload = stub.handle(method, url.path.strip("/").split("/"), parse_qs(url.query), body)
+        data = json.dumps(payload).encode() if payload is not None else b""
+
+        etag = f'"{hashlib.sha1(data).hexdigest()}"' if stub.etags and method == "GET" and data else None
+        if etag and self.headers.get("If-None-Match") == etag:
+            status, data = 304, b""
+            with stub.lock:
+                stub.not_modified += 1
+
+        self.send_response(status)
+        if failure and failure["retry_after"] is not None:
+            self.send_header("Retry-After", str(failure["retry_after"]))
+        if data:
+            self.send_header("Content-Type", "application/json")
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        with stub.lock:
+            stub.bytes_sent += len(data)
+
+
+class StubFluxAPI:
+    """A local, in-process stand-in for the Flux API, for use in tests and benchmarks.
+
+    Entities are held in memory and served over HTTP on a random local port, with an optional artificial latency
+    added to every request. Setting ``status`` makes every request fail with that status code instead, and
+    ``fail_next`` fails just the next few. Lists can be paged with offset and limit. GET responses carry an ETag, and
+    If-None-Match requests for unchanged data get a 304 Not Modified. Every request, new TCP connection, 304 response
+    and response body byte is counted.
+    """
+
+    def __init__(self, latency=0.0, version="v1", etags=True, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.host = host
+        self.port = port
+        self.version = version
+        self.etags = etags
+        self.status = None
+        self.failures = []
+        self.organisations = {}
+        self.collections = {}
+        self.requests = []
+        self.connections = 0
+        self.not_modified = 0
+        self.bytes_sent = 0
+        self.lock = threading.Lock()
+        self.server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.server = ThreadingHTTPServer((self.host, self.port), StubHandler)
+        self.server.daemon_threads = True
+        self.server.stub = self
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def reset_counts(self):
+        with self.lock:
+            self.requests = []
+            self.connections = 0
+            self.not_modified = 0
+            self.bytes_sent = 0
+
+    def delay(self):
+        """Get the number of seconds to wait before handling a request."""
+        return self.latency
+
+    def next_failure(self):
+        """Get the failure to reply to a request with, if any, as a dict of its status and Retry-After seconds."""
+        with self.lock:
+            return self.failures.pop(0) if self.failures else None
+
+    def fail_next(self, count, status, retry_after=None):
+        """Fail the next count requests with the given status code, and Retry-After header if given."""
+        with self.lock:
+            self.failures += [{"status": status, "retry_after": retry_after}] * count
+
+    def add_organisation(self, **fields):
+        organisation = self._new(fields)
+        self.organisations[organisation["id"]] = organisation
+        return organisation
+
+    def add(self, organisation_id, collection, **fields):
+        item = self._new(fields)
+        self.collections.setdefault((organisation_id, collection), {})[item["id"]] = item
+        return item
+
+    def load(self, organisation, collections):
+        """Serve an organisation and lists of the entities in each of its collections, keyed by collection name, as
+        made by ``tests.dataset.generate``."""
+        with self.lock:
+            self.organisations[organisation["id"]] = organisation
+            for name, entities in collections.items():
+                self.collections[(organisation["id"], name)] = {entity["id"]: entity for entity in entities}
+
+    def handle(self, method, parts, query, body):
+        if parts[:2] != [self.version, "organisations"]:
+            return 404, None
+
+        if len(parts) == 2:
+            return self._collection(method, self.organisations, query, body)
+        if parts[2] not in self.organisations:
+            return 404, None
+        if len(parts) == 3:
+            return self._item(method, self.organisations, parts[2], body)
+
+        items = self.collections.setdefault((parts[2], parts[3]), {})
+        if len(parts) == 4:
+            return self._collection(method, items, query, body)
+        if parts[3:] == ["projects", "managers"]:
+            managers = {p["manager"]["id"]: p["manager"] for p in items.values() if p.get("manager")}
+            return (200, list(managers.values())) if managers else (204, None)
+        return self._item(method, items, parts[4], body)
+
+    def _new(self, fields):
+        return {"id": str(uuid.uuid4()), **fields, "created_at": timestamp(), "updated_at": None}
+
+    def _collection(self, method, items, query, body):
+        if method == "POST":
+            item = self._new(body)
+            items[item["id"]] = item
+            return 201, item
+        if method != "GET":
+            return 405, None
+
+        offset = int(query.pop("offset", ["0"])[0])
+        limit = int(query.pop("limit", ["0"])[0]) or None
+        results = [item for item in items.values() if self._matches(item, query)]
+        results = results[offset : offset + limit if limit else None]
+        return (200, results) if results else (204, None)
+
+    def _item(self, method, items, item_id, body):
+        if item_id not in items:
+            return 404, None
+        if method == "GET":
+            return 200, items[item_id]
+        if method == "PUT":
+            items[item_id].update(body, updated_at=timestamp())
+            return 200, items[item_id]
+        if method == "DELETE":
+            del items[item_id]
+            return 204, None
+        return 405, None
+
+    def _matches(self, item, query):
+        for key, values in query.items():
+            value = values[0]
+            if not value:
+                continue
+            if key in ("name", "title"):
+                if value.lower() not in str(item.get(key, "")).lower():
+                    return False
+            elif str(item.get(key)) != value:
+                return False
+        return True
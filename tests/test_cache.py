@@ -0,0 +1,227 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+
+from app.integrations import flux_api_async
+from app.integrations.cache import MemoryCache, dumps, fresh, get_refresher, loads
+from app.integrations.flux_api import Grade, Organisation, Person, Role
+from app.integrations.flux_api_async import closing_client
+from app.integrations.utils import MISSING
+
+
+def test_list_is_cached(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    stub_api.add(organisation["id"], "grades", name="Senior")
+
+    for _ in range(2):
+        with app.app_context():
+            assert Grade().list(organisation_id=organisation["id"])[0]["name"] == "Senior"
+
+    assert len(stub_api.requests) == 1
+
+
+def test_cache_is_keyed_per_organisation_and_arguments(app, stub_api):
+    first = stub_api.add_organisation(name="First", domain="first.com")
+    second = stub_api.add_organisation(name="Second", domain="second.com")
+    stub_api.add(first["id"], "grades", name="Senior")
+    stub_api.add(second["id"], "grades", name="Junior")
+
+    assert Grade().list(organisation_id=first["id"])[0]["name"] == "Senior"
+    assert Grade().list(organisation_id=second["id"])[0]["name"] == "Junior"
+    assert Grade().list(organisation_id=first["id"], name="Jun") is None
+    assert len(stub_api.requests) == 3
+
+
+def test_writes_invalidate_cached_results(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    grade = stub_api.add(organisation["id"], "grades", name="Senior")
+    Grade().list(organisation_id=organisation["id"])
+    Grade().get(organisation_id=organisation["id"], grade_id=grade["id"])
+
+    Grade().edit(organisation_id=organisation["id"], grade_id=grade["id"], name="Principal")
+
+    assert Grade().list(organisation_id=organisation["id"])[0]["name"] == "Principal"
+    assert Grade().get(organisation_id=organisation["id"], grade_id=grade["id"])["name"] == "Principal"
+
+
+def test_writes_invalidate_dependent_namespaces(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    Organisation().get(organisation_id=organisation["id"])
+    stub_api.organisations[organisation["id"]]["people"] = 1
+
+    Person().create(
+        name="Ada",
+        role_id="role",
+        email_address="ada@example.com",
+        full_time_equivalent=1,
+        location_id="location",
+        employment="permanent",
+        organisation_id=organisation["id"],
+    )
+
+    assert Organisation().get(organisation_id=organisation["id"])["people"] == 1
+
+
+def test_organisation_writes_invalidate_everything_embedding_it(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    stub_api.add(organisation["id"], "grades", name="Senior")
+    Grade().list(organisation_id=organisation["id"])
+    Role().list(organisation_id=organisation["id"], filters={})
+    stub_api.reset_counts()
+
+    Organisation().edit(organisation_id=organisation["id"], name="Mash Inc", domain="example.com")
+    Grade().list(organisation_id=organisation["id"])
+    Role().list(organisation_id=organisation["id"], filters={})
+
+    assert [request[0] for request in stub_api.requests] == ["PUT", "GET", "GET"]
+
+
+def test_uncached_resources_always_go_upstream(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    for _ in range(2):
+        with app.app_context():
+            Role().list_page(organisation_id=organisation["id"], filters={}, page=1, per_page=10)
+
+    assert len(stub_api.requests) == 2
+
+
+def test_cache_can_be_disabled(app, stub_api):
+    app.config["FLUX_API_CACHE_TTL"] = 0
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    for _ in range(2):
+        with app.app_context():
+            Organisation().get(organisation_id=organisation["id"])
+
+    assert len(stub_api.requests) == 2
+
+
+def list_grades(app, organisation_id):
+    with app.app_context():
+        return Grade().list(organisation_id=organisation_id)
+
+
+def wait_for_refreshes():
+    for _ in range(100):
+        if not get_refresher().snapshot()["refreshing"]:
+            return
+        time.sleep(0.02)
+
+
+def test_stale_results_are_served_while_refreshed(app, stub_api):
+    app.config["FLUX_API_CACHE_TTL"] = 0.2
+    app.config["FLUX_API_CACHE_EARLY_REFRESH"] = 0
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    grade = stub_api.add(organisation["id"], "grades", name="Senior")
+    list_grades(app, organisation["id"])
+    grade["name"] = "Principal"
+    time.sleep(0.3)
+
+    assert list_grades(app, organisation["id"])[0]["name"] == "Senior"
+    wait_for_refreshes()
+
+    assert list_grades(app, organisation["id"])[0]["name"] == "Principal"
+    assert len(stub_api.requests) == 2
+    assert get_refresher().snapshot() == {"stale": 1, "early": 0, "failed": 0, "refreshing": 0}
+
+
+def test_async_stale_results_are_refreshed(app, stub_api):
+    app.config["FLUX_API_CACHE_TTL"] = 0.2
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    grade = stub_api.add(organisation["id"], "grades", name="Senior")
+
+    async def get_grades():
+        return await flux_api_async.Grade().list(organisation_id=organisation["id"])
+
+    def list_async_grades():
+        with app.app_context():
+            return asyncio.run(closing_client(get_grades)())
+
+    list_async_grades()
+    grade["name"] = "Principal"
+    time.sleep(0.3)
+
+    assert list_async_grades()[0]["name"] == "Senior"
+    wait_for_refreshes()
+    assert list_async_grades()[0]["name"] == "Principal"
+
+
+class RemoteCache(MemoryCache):
+    """Stands in for a cache in Redis, noting the threads it is used from."""
+
+    remote = True
+
+    def __init__(self):
+        super().__init__()
+        self.threads = set()
+
+    def get(self, key):
+        self.threads.add(threading.get_ident())
+        return super().get(key)
+
+    def set(self, key, value, ttl=None):
+        self.threads.add(threading.get_ident())
+        super().set(key, value, ttl)
+
+
+def test_async_resources_use_remote_caches_off_the_event_loop(app, stub_api):
+    cache = app.extensions["flux_api_cache"] = RemoteCache()
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+
+    async def create_and_list():
+        await flux_api_async.Grade().create(name="Senior", organisation_id=organisation["id"])
+        await flux_api_async.Grade().list(organisation_id=organisation["id"])
+        await flux_api_async.Person().search(organisation_id=organisation["id"])
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(closing_client(create_and_list)())
+
+    assert cache.threads and loop_thread not in cache.threads
+
+
+def test_grace_period_can_be_set_per_resource(app, stub_api, monkeypatch):
+    app.config["FLUX_API_CACHE_TTL"] = 0.2
+    monkeypatch.setattr(Grade, "stale_while_revalidate", 0)
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    grade = stub_api.add(organisation["id"], "grades", name="Senior")
+    list_grades(app, organisation["id"])
+    grade["name"] = "Principal"
+    time.sleep(0.3)
+
+    assert list_grades(app, organisation["id"])[0]["name"] == "Principal"
+    assert get_refresher().snapshot()["stale"] == 0
+
+
+def test_slow_results_are_refreshed_early(app):
+    soon = {"value": 1, "fresh_until": time.time() + 0.5, "delta": 60}
+    later = {"value": 1, "fresh_until": time.time() + 3600, "delta": 0.01}
+
+    assert sum(not fresh(soon) for _ in range(100)) > 90
+    assert all(fresh(later) for _ in range(100))
+
+    app.config["FLUX_API_CACHE_EARLY_REFRESH"] = 0
+    assert all(fresh(soon) for _ in range(100))
+
+
+def test_memory_cache_expires_entries():
+    cache = MemoryCache()
+    cache.set("key", "value", ttl=-1)
+
+    assert cache.get("key") is MISSING
+
+
+def test_memory_cache_evicts_when_full():
+    cache = MemoryCache(max_entries=2)
+    cache.set("generation", "abc")
+    cache.set("first", 1, ttl=60)
+    cache.set("second", 2, ttl=60)
+
+    assert cache.get("generation") == "abc"
+    assert cache.get("first") is MISSING
+    assert cache.get("second") == 2
+
+
+def test_serialisation_preserves_datetimes():
+    value = [{"name": "Senior", "created_at": datetime(2021, 7, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)}]
+
+    assert loads(dumps(value)) == value
@@ -0,0 +1,106 @@
+import logging
+
+import pytest
+from app import create_app
+from app.integrations import flux_api, flux_api_async
+from app.integrations.instrumentation import CallBudgetExceeded, get_call_budget, get_request_timings, wasteful_calls
+from config import Config
+from flask import render_template_string
+
+from tests.fake_flux_api import FakeFluxAPI
+from tests.routes import deliverable_emails, entities, expected_status, populate, remove_added, routes
+
+
+def test_every_page_declares_a_call_budget(app):
+    endpoints = {rule.endpoint for rule in app.url_map.iter_rules() if rule.rule.startswith("/organisations")}
+
+    assert endpoints
+    assert [endpoint for endpoint in sorted(endpoints) if get_call_budget(endpoint) is None] == []
+
+
+def test_every_page_is_within_its_call_budget_with_a_cold_cache():
+    with FakeFluxAPI() as fake, deliverable_emails():
+        dataset = populate(fake, 100)
+
+        class ColdConfig(Config):
+            FLUX_API_CACHE_TTL = 0
+            FLUX_API_ENFORCE_CALL_BUDGETS = True
+            FLUX_API_URL = fake.url
+            RATELIMIT_ENABLED = False
+            TESTING = True
+            WTF_CSRF_ENABLED = False
+
+        app = create_app(ColdConfig)
+        app.debug = True
+        test_client = app.test_client()
+        for name, method, path, data in routes(fake, dataset):
+            held = entities(fake)
+            response = test_client.open(path(), method=method, data=data, base_url="https://localhost")
+            response.close()
+            remove_added(fake, held)
+
+            assert response.status_code == expected_status(method), f"{method} {name}"
+            with app.app_context():
+                assert int(response.headers["X-Flux-API-Calls"]) <= get_call_budget(name), f"{method} {name}"
+
+        with app.app_context():
+            flux_api_async.run(flux_api_async.close_client())
+
+
+def test_pages_over_budget_fail(app, stub_api, monkeypatch):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    stub_api.add(organisation["id"], "grades", name="Senior")
+    monkeypatch.setattr(app.view_functions["grade.list"], "flux_api_call_budget", 1)
+
+    with app.test_client() as test_client:
+        with pytest.raises(CallBudgetExceeded, match="made 2 Flux API calls, budget 1"):
+            test_client.get(f"/organisations/{organisation['id']}/grades", base_url="https://localhost")
+
+
+def test_retried_attempts_are_not_counted(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    stub_api.add(organisation["id"], "grades", name="Senior")
+    stub_api.fail_next(1, 503)
+
+    flux_api.Grade().list(organisation_id=organisation["id"])
+
+    assert len(get_request_timings().calls) == 2
+    assert len(get_request_timings().round_trips()) == 1
+
+
+def test_calls_made_once_per_row_while_rendering_are_flagged(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    grades = [stub_api.add(organisation["id"], "grades", name=name) for name in ("Junior", "Senior")]
+
+    with app.test_request_context():
+        render_template_string(
+            "{% for id in ids %}{{ get(organisation_id=organisation_id, grade_id=id)['name'] }}{% endfor %}",
+            ids=[grade["id"] for grade in grades],
+            get=flux_api.Grade().get,
+            organisation_id=organisation["id"],
+        )
+        problems = wasteful_calls(get_request_timings(), budget=1)
+
+    assert problems == [
+        "2 Flux API calls made, over the budget of 1",
+        "GET /v1/organisations/{id}/grades/{id} called 2 times while rendering templates",
+    ]
+
+
+def test_repeated_calls_are_warned_about_in_debug_mode(app, stub_api, caplog):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    app.debug = True
+    url = f"{stub_api.url}/v1/organisations/{organisation['id']}"
+
+    @app.route("/repeated")
+    def repeated():
+        for _ in range(2):
+            flux_api.Organisation().send_with_retries("GET", url)
+        return ""
+
+    with caplog.at_level(logging.WARNING, logger=app.logger.name):
+        with app.test_client() as test_client:
+            response = test_client.get("/repeated", base_url="https://localhost")
+
+    assert response.headers["X-Flux-API-Calls"] == "2"
+    assert f"GET /repeated: GET {url} called 2 times" in caplog.messages
@@ -0,0 +1,127 @@
+import time
+
+import pytest
+import requests
+from app.integrations.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, endpoint, get_circuit_breaker
+from app.integrations.flux_api import Grade, Organisation
+from werkzeug.exceptions import InternalServerError, ServiceUnavailable
+
+
+def test_endpoint_replaces_ids():
+    url = "http://localhost:3000/v1/organisations/0d5d9c2e-1f5a-4b39-9d0c-a0e4c2b7c9a1/grades?name=Senior"
+
+    assert endpoint("GET", url) == "GET /v1/organisations/{id}/grades"
+
+
+def test_breaker_opens_once_failure_rate_is_reached():
+    breaker = CircuitBreaker(window=10, min_calls=4, failure_rate=0.5, slow_call=1.0, reset_timeout=30)
+
+    breaker.record(200, 0.01, breaker.allow())
+    breaker.record(500, 0.01, breaker.allow())
+    breaker.record(200, 0.01, breaker.allow())
+    assert breaker.state == CLOSED
+
+    breaker.record(200, 1.5, breaker.allow())
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.rejected == 1
+
+
+def test_breaker_half_opens_to_probe_recovery():
+    breaker = CircuitBreaker(window=10, min_calls=1, failure_rate=0.5, slow_call=1.0, reset_timeout=0.05)
+    breaker.record_failure(0.01, breaker.allow())
+    time.sleep(0.05)
+
+    probe = breaker.allow()
+    assert probe
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record_failure(0.01, probe)
+    assert breaker.state == OPEN
+    time.sleep(0.05)
+
+    probe = breaker.allow()
+    assert probe
+    breaker.record(200, 0.01, probe)
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_only_the_probe_ends_the_half_open_state():
+    breaker = CircuitBreaker(window=10, min_calls=1, failure_rate=0.5, slow_call=1.0, reset_timeout=0.05)
+    late = breaker.allow()
+    breaker.record_failure(0.01, breaker.allow())
+    time.sleep(0.05)
+    probe = breaker.allow()
+
+    breaker.record(200, 0.01, late)
+    breaker.release(late)
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.release(probe)
+    assert breaker.allow()
+
+
+def test_probe_failing_unexpectedly_frees_the_breaker_to_probe_again(app, stub_api, monkeypatch):
+    app.config.update(FLUX_API_CACHE_TTL=0, FLUX_API_BREAKER_MIN_CALLS=1, FLUX_API_BREAKER_RESET_TIMEOUT=0)
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    stub_api.status = 500
+    with pytest.raises(InternalServerError):
+        Organisation().get(organisation_id=organisation["id"])
+    breaker = get_circuit_breaker("GET", f"{stub_api.url}/v1/organisations/{organisation['id']}")
+    assert breaker.state == OPEN
+
+    def request(*args, **kwargs):
+        raise requests.exceptions.ChunkedEncodingError
+
+    api = Organisation()
+    monkeypatch.setattr(api.session, "request", request)
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        api.send_with_retries("GET", f"{stub_api.url}/v1/organisations/{organisation['id']}")
+
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+
+
+def test_open_breaker_fails_fast(app, stub_api):
+    app.config.update(FLUX_API_CACHE_TTL=0, FLUX_API_BREAKER_MIN_CALLS=2)
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    stub_api.status = 500
+
+    for _ in range(2):
+        with pytest.raises(InternalServerError):
+            Grade().list(organisation_id=organisation["id"])
+    stub_api.reset_counts()
+
+    with pytest.raises(ServiceUnavailable):
+        Grade().list(organisation_id=organisation["id"])
+    assert stub_api.requests == []
+
+
+def test_open_breaker_serves_last_known_result(app, stub_api):
+    app.config.update(FLUX_API_CACHE_TTL=0, FLUX_API_BREAKER_MIN_CALLS=3)
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    with app.app_context():
+        Organisation().get(organisation_id=organisation["id"])
+    stub_api.status = 500
+
+    for _ in range(4):
+        with app.app_context():
+            assert Organisation().get(organisation_id=organisation["id"])["name"] == "Mash"
+
+    assert len(stub_api.requests) == 3
+
+
+def test_metrics_endpoint_reports_breaker_state(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    Organisation().get(organisation_id=organisation["id"])
+
+    with app.test_client() as test_client:
+        response = test_client.get("/metrics/flux-api", base_url="https://localhost")
+
+    assert response.status_code == 200
+    breaker = response.json["circuit_breakers"]["GET /v1/organisations/{id}"]
+    assert breaker["state"] == CLOSED
+    assert breaker["calls"] == 1
@@ -0,0 +1,58 @@
+from app.integrations.conditional import get_validator_cache
+from app.integrations.flux_api import Person
+
+
+def list_people(app, organisation_id):
+    # Lists of people are cached, which would stop the second request from reaching upstream at all
+    app.config["FLUX_API_CACHE_TTL"] = 0
+    with app.app_context():
+        return Person().list(organisation_id=organisation_id)
+
+
+def test_unchanged_list_is_revalidated_not_downloaded(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    stub_api.add(organisation["id"], "people", name="Ada")
+
+    first = list_people(app, organisation["id"])
+    bytes_sent = stub_api.bytes_sent
+    second = list_people(app, organisation["id"])
+
+    assert second is first
+    assert stub_api.not_modified == 1
+    assert stub_api.bytes_sent == bytes_sent
+    assert get_validator_cache().revalidated == 1
+    assert get_validator_cache().bytes_saved == bytes_sent
+
+
+def test_changed_list_is_downloaded_again(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    stub_api.add(organisation["id"], "people", name="Ada")
+    list_people(app, organisation["id"])
+
+    stub_api.add(organisation["id"], "people", name="Grace")
+
+    assert [person["name"] for person in list_people(app, organisation["id"])] == ["Ada", "Grace"]
+    assert stub_api.not_modified == 0
+
+
+def test_single_entities_are_revalidated_with_parsed_timestamps(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    person = stub_api.add(organisation["id"], "people", name="Ada")
+
+    for _ in range(2):
+        with app.app_context():
+            result = Person().get(organisation_id=organisation["id"], person_id=person["id"])
+            assert result["created_at"].year >= 2021
+
+    assert stub_api.not_modified == 1
+
+
+def test_conditional_requests_can_be_disabled(app, stub_api):
+    app.config["FLUX_API_VALIDATOR_CACHE_SIZE"] = 0
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    stub_api.add(organisation["id"], "people", name="Ada")
+
+    list_people(app, organisation["id"])
+    list_people(app, organisation["id"])
+
+    assert stub_api.not_modified == 0
@@ -0,0 +1,46 @@
+import time
+
+import pytest
+from app.integrations.deadline import Deadline
+from app.integrations.flux_api import Grade, Organisation
+from config import Config
+from werkzeug.exceptions import RequestTimeout
+
+
+def test_timeout_is_read_from_the_environment_as_a_number():
+    assert isinstance(Config.TIMEOUT, float)
+
+
+def test_deadline_caps_timeouts_to_the_time_remaining():
+    deadline = Deadline(1.0)
+
+    connect, read = deadline.timeout(3.05, 5.0)
+
+    assert connect <= 1.0
+    assert read <= 1.0
+    assert deadline.timeout(0.5, 0.5) == (0.5, 0.5)
+
+
+def test_spent_deadline_raises_request_timeout():
+    deadline = Deadline(0)
+
+    with pytest.raises(RequestTimeout):
+        deadline.timeout(3.05, 5.0)
+
+
+def test_calls_share_the_request_deadline(app, stub_api):
+    app.config.update(FLUX_API_CACHE_TTL=0, FLUX_API_DEADLINE=0.3)
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    stub_api.latency = 0.2
+
+    start = time.perf_counter()
+    with app.app_context():
+        Organisation().get(organisation_id=organisation["id"])
+        with pytest.raises(RequestTimeout):
+            Grade().list(organisation_id=organisation["id"])
+        stub_api.reset_counts()
+        with pytest.raises(RequestTimeout):
+            Grade().get(organisation_id=organisation["id"], grade_id="missing")
+
+    assert time.perf_counter() - start < 0.5
+    assert stub_api.requests == []
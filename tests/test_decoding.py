@@ -0,0 +1,32 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from app.integrations.decoding import decode, parse_timestamp
+from app.integrations.flux_api import Grade
+
+
+def test_parse_timestamp_accepts_flux_api_formats():
+    expected = datetime(2021, 6, 30, 9, 15, 0, 123456, tzinfo=timezone.utc)
+
+    assert parse_timestamp("2021-06-30T09:15:00.123456+00:00") == expected
+    assert parse_timestamp("2021-06-30T09:15:00.123456Z") == expected
+    assert parse_timestamp("2021-06-30T09:15:00.123456+0000") == expected
+    assert parse_timestamp("2021-06-30T10:15:00.123456+01:00") == expected
+    assert parse_timestamp("2021-06-30T10:15:00.123456+01:00").utcoffset() == timedelta(hours=1)
+
+
+def test_decode_parses_timestamps_of_entities_and_list_items():
+    entity = {"id": "1", "created_at": "2021-06-30T09:15:00.123456+00:00", "updated_at": None}
+
+    assert isinstance(decode(json.dumps(entity).encode())["created_at"], datetime)
+    assert decode(json.dumps(entity).encode())["updated_at"] is None
+    assert isinstance(decode(json.dumps([entity, entity]).encode())[1]["created_at"], datetime)
+
+
+def test_entities_from_lists_have_timestamps(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    grade = stub_api.add(organisation["id"], "grades", name="Senior")
+
+    Grade().list(organisation_id=organisation["id"])
+
+    assert isinstance(Grade().get(organisation_id=organisation["id"], grade_id=grade["id"])["created_at"], datetime)
@@ -0,0 +1,97 @@
+import pytest
+from app.integrations.degraded import UNAVAILABLE_ERRORS, get_degraded_mode
+from app.integrations.flux_api import Grade
+from werkzeug.exceptions import InternalServerError
+
+
+def test_read_pages_show_last_known_data_with_banner(app, stub_api, get):
+    app.config.update(FLUX_API_CACHE_TTL=0, FLUX_API_DEGRADED_FAILURES=1)
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    stub_api.add(organisation["id"], "grades", name="Senior")
+    assert b"Service unavailable" not in get(app, f"/organisations/{organisation['id']}/grades").data
+
+    stub_api.status = 503
+    response = get(app, f"/organisations/{organisation['id']}/grades")
+
+    assert response.status_code == 200
+    assert b"Senior" in response.data
+    assert b"Service unavailable" in response.data
+    assert b"data last updated at" in response.data
+    assert get_degraded_mode().snapshot() == {"active": True, "served_stale": 2}
+
+
+def test_pages_without_last_known_data_still_fail(app, stub_api, get):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    stub_api.status = 503
+
+    assert get(app, f"/organisations/{organisation['id']}/grades").status_code == 500
+
+
+def test_writes_are_turned_away_while_degraded(app, stub_api, get):
+    app.config["FLUX_API_DEGRADED_FAILURES"] = 1
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    stub_api.status = 503
+    get(app, f"/organisations/{organisation['id']}/grades")
+    stub_api.reset_counts()
+
+    with app.test_client() as test_client:
+        response = test_client.post(
+            f"/organisations/{organisation['id']}/grades/new", data={"name": "Senior"}, base_url="https://localhost"
+        )
+        with test_client.session_transaction() as session:
+            flashes = session["_flashes"]
+
+    assert response.status_code == 302
+    assert "your changes haven't been saved" in flashes[0][1]
+    assert not [request for request in stub_api.requests if request[0] == "POST"]
+
+
+def test_degraded_mode_ends_once_upstream_recovers(app, stub_api, get):
+    app.config.update(FLUX_API_CACHE_TTL=0, FLUX_API_DEGRADED_FAILURES=1)
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    stub_api.status = 503
+    get(app, f"/organisations/{organisation['id']}/grades")
+    assert get_degraded_mode().active
+
+    stub_api.status = None
+    Grade().list(organisation_id=organisation["id"])
+
+    assert not get_degraded_mode().active
+
+
+def test_no_retries_while_degraded(app, stub_api):
+    app.config.update(FLUX_API_CACHE_TTL=0, FLUX_API_DEGRADED_FAILURES=1)
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    get_degraded_mode().failed()
+    stub_api.fail_next(1, 503)
+
+    with pytest.raises(InternalServerError):
+        Grade().list(organisation_id=organisation["id"])
+
+    assert len(stub_api.requests) == 1
+
+
+def test_only_repeated_failures_degrade_the_ui(app, stub_api):
+    app.config["FLUX_API_CACHE_TTL"] = 0
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    stub_api.status = 503
+
+    for _ in range(2):
+        with pytest.raises(UNAVAILABLE_ERRORS):
+            Grade().list(organisation_id=organisation["id"])
+    assert not get_degraded_mode().active
+
+    with pytest.raises(UNAVAILABLE_ERRORS):
+        Grade().list(organisation_id=organisation["id"])
+    assert get_degraded_mode().active
+
+
+def test_failed_writes_dont_degrade_the_ui(app, stub_api):
+    app.config["FLUX_API_DEGRADED_FAILURES"] = 1
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    stub_api.status = 503
+
+    with pytest.raises(InternalServerError):
+        Grade().create(organisation_id=organisation["id"], name="Senior")
+
+    assert not get_degraded_mode().active
@@ -0,0 +1,53 @@
+import uuid
+
+from app.entity_urls import EntityURLs, url_template
+from flask import url_for
+
+
+def test_urls_match_url_for_for_every_entity_page(app):
+    organisation_id = str(uuid.uuid4())
+    urls = EntityURLs(organisation_id)
+    rules = [
+        rule
+        for rule in app.url_map.iter_rules()
+        if len(rule.arguments) == 2 and rule.arguments == {"organisation_id", rule.endpoint.split(".")[0] + "_id"}
+    ]
+
+    with app.test_request_context():
+        for rule in rules:
+            for entity_id in (str(uuid.uuid4()), str(uuid.uuid4())):
+                arguments = {"organisation_id": organisation_id, f"{rule.endpoint.split('.')[0]}_id": entity_id}
+                assert urls(rule.endpoint, entity_id) == url_for(rule.endpoint, **arguments)
+
+    assert {rule.endpoint.split(".")[0] for rule in rules} == {
+        "grade",
+        "location",
+        "person",
+        "practice",
+        "programme",
+        "project",
+        "role",
+    }
+
+
+def test_organisation_urls_need_no_organisation(app):
+    urls = EntityURLs()
+    organisation_id = str(uuid.uuid4())
+
+    with app.test_request_context():
+        for endpoint in ("organisation.view", "organisation.edit", "organisation.delete"):
+            assert urls(endpoint, organisation_id) == url_for(endpoint, organisation_id=organisation_id)
+
+
+def test_templates_are_cached_per_script_root(app):
+    with app.test_request_context(base_url="https://localhost/flux"):
+        mounted = EntityURLs("org")("grade.view", "grade")
+    with app.test_request_context():
+        root = EntityURLs("org")("grade.view", "grade")
+
+    assert mounted == "/flux/organisations/org/grades/grade"
+    assert root == "/organisations/org/grades/grade"
+    with app.test_request_context():
+        assert url_template("grade.view", "organisation_id", "grade_id") == (
+            "/organisations/{organisation_id}/grades/{grade_id}"
+        )
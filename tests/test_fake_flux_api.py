@@ -0,0 +1,97 @@
+import pytest
+import requests
+from app import create_app
+from app.integrations import flux_api_async
+from config import Config
+
+from tests.dataset import generate
+from tests.fake_flux_api import FakeFluxAPI
+
+
+@pytest.fixture
+def fake_api():
+    with FakeFluxAPI() as fake:
+        yield fake
+
+
+@pytest.fixture
+def fake_app(fake_api):
+    class FakeConfig(Config):
+        FLUX_API_URL = fake_api.url
+        RATELIMIT_ENABLED = False
+        TESTING = True
+        WTF_CSRF_ENABLED = False
+
+    app = create_app(FakeConfig)
+    with app.app_context():
+        yield app
+        flux_api_async.run(flux_api_async.close_client())
+
+
+def test_generated_organisations_are_deterministic():
+    organisation, collections = generate(seed=3, people=200)
+
+    assert generate(seed=3, people=200) == (organisation, collections)
+    assert generate(seed=4, people=200)[0]["id"] != organisation["id"]
+    assert organisation["people"] == len(collections["people"]) == 200
+    assert organisation["roles"] == len(collections["roles"]) == 8
+    assert sum(role["people"] for role in collections["roles"]) == 200
+    person = collections["people"][0]
+    assert set(person["role"]) == {"id", "title", "grade", "practice"}
+    assert person["organisation"] == {"id": organisation["id"], "name": organisation["name"]}
+
+
+def test_every_page_of_a_generated_organisation_renders(fake_app, fake_api, get):
+    organisation, collections = generate(people=200)
+    fake_api.load(organisation, collections)
+    base = f"/organisations/{organisation['id']}"
+
+    assert get(fake_app, base).status_code == 200
+    for name in ("grades", "locations", "practices", "roles", "people", "programmes", "projects"):
+        entity = collections[name][0]
+        assert get(fake_app, f"{base}/{name}" if name == "grades" else f"{base}/{name}/").status_code == 200
+        assert get(fake_app, f"{base}/{name}/{entity['id']}").status_code == 200
+
+
+def test_lists_are_filtered_by_nested_references(fake_api):
+    organisation, collections = generate(people=200)
+    fake_api.load(organisation, collections)
+    role = collections["roles"][0]
+    people = [person for person in collections["people"] if person["role"]["id"] == role["id"]]
+
+    response = requests.get(
+        f"{fake_api.url}/v1/organisations/{organisation['id']}/people", params={"role_id": role["id"]}
+    )
+
+    assert [person["id"] for person in response.json()] == [person["id"] for person in people]
+
+
+def test_references_sent_are_stored_nested(fake_app, fake_api):
+    organisation, collections = generate(people=20)
+    fake_api.load(organisation, collections)
+    grade = collections["grades"][0]
+
+    with fake_app.test_client() as test_client:
+        test_client.post(
+            f"/organisations/{organisation['id']}/roles/new",
+            data={"title": "Tester", "grade": grade["id"], "practice": ""},
+            base_url="https://localhost",
+        )
+
+    (role,) = [
+        role for role in fake_api.collections[(organisation["id"], "roles")].values() if role["title"] == "Tester"
+    ]
+    assert role["grade"] == {"id": grade["id"], "name": grade["name"]}
+    assert role["practice"] is None
+    assert role["organisation"]["id"] == organisation["id"]
+
+
+def test_failures_are_injected_at_the_given_rates():
+    fake = FakeFluxAPI(error_rate=0.25, rate_limit_rate=0.25, retry_after=2, seed=1)
+
+    failures = [fake.next_failure() for _ in range(1000)]
+
+    assert 200 < sum(1 for failure in failures if failure and failure["status"] in (500, 503)) < 300
+    rate_limited = [failure for failure in failures if failure and failure["status"] == 429]
+    assert 200 < len(rate_limited) < 300
+    assert all(failure["retry_after"] == 2 for failure in rate_limited)
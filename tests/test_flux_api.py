@@ -0,0 +1,26 @@
+from app.integrations.flux_api import Grade, Organisation, get_session
+
+
+def test_session_is_shared_by_all_resources(app):
+    assert Organisation().session is Grade().session is get_session()
+
+
+def test_session_reuses_connections(app, stub_api):
+    app.config["FLUX_API_CACHE_TTL"] = 0
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    stub_api.add(organisation["id"], "grades", name="Senior")
+
+    for _ in range(5):
+        with app.app_context():
+            assert Organisation().get(organisation_id=organisation["id"])["name"] == "Mash"
+            assert Grade().list(organisation_id=organisation["id"])[0]["name"] == "Senior"
+
+    assert len(stub_api.requests) == 10
+    assert stub_api.connections == 1
+
+
+def test_timeout_has_separate_connect_and_read_values(app):
+    app.config["FLUX_API_CONNECT_TIMEOUT"] = 1.5
+    app.config["TIMEOUT"] = 7
+
+    assert Organisation().timeout == (1.5, 7)
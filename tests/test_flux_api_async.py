@@ -0,0 +1,130 @@
+import asyncio
+import time
+
+import pytest
+from app.integrations import flux_api_async
+from app.integrations.fan_out import gather
+from app.integrations.flux_api_async import Grade, Organisation, Practice, Role, closing_client
+from werkzeug.exceptions import NotFound
+
+
+def run(coroutine_function):
+    """Run an async function the way Flask runs an async view."""
+    return asyncio.run(closing_client(coroutine_function)())
+
+
+def test_async_resources_decode_like_sync_resources(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+
+    async def get():
+        return await Organisation().get(organisation_id=organisation["id"])
+
+    result = run(get)
+
+    assert result["name"] == "Mash"
+    assert result["created_at"].year > 2000
+
+
+def test_async_resources_map_status_codes_to_http_exceptions(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+
+    async def get():
+        return await Grade().get(organisation_id=organisation["id"], grade_id="missing")
+
+    with pytest.raises(NotFound):
+        run(get)
+
+
+def test_async_writes_invalidate_cached_reads(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+
+    async def create_and_list():
+        before = await Grade().list(organisation_id=organisation["id"])
+        await Grade().create(name="Senior", organisation_id=organisation["id"])
+        after = await Grade().list(organisation_id=organisation["id"])
+        return before, after
+
+    before, after = run(create_and_list)
+
+    assert before is None
+    assert [grade["name"] for grade in after] == ["Senior"]
+
+
+def test_gather_runs_calls_concurrently(app, stub_api):
+    app.config["FLUX_API_CACHE_TTL"] = 0
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    stub_api.latency = 0.2
+
+    async def get_all():
+        return await gather(
+            Organisation().get(organisation_id=organisation["id"]),
+            Grade().list(organisation_id=organisation["id"]),
+            Practice().list(organisation_id=organisation["id"]),
+            Role().list(organisation_id=organisation["id"], filters={}),
+        )
+
+    start = time.perf_counter()
+    result, grades, practices, roles = run(get_all)
+
+    assert result["name"] == "Mash"
+    assert time.perf_counter() - start < 0.6
+
+
+def test_gather_reraises_http_exceptions(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+
+    async def get_all():
+        return await gather(
+            Organisation().get(organisation_id=organisation["id"]),
+            Grade().get(organisation_id=organisation["id"], grade_id="missing"),
+        )
+
+    with pytest.raises(NotFound):
+        run(get_all)
+
+
+def test_list_page_gathers_upstream_calls(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    grade = stub_api.add(organisation["id"], "grades", name="Senior")
+    practice = stub_api.add(organisation["id"], "practices", name="Engineering")
+    stub_api.add(organisation["id"], "roles", title="Developer", grade=grade, practice=practice)
+    stub_api.latency = 0.2
+
+    start = time.perf_counter()
+    with app.test_client() as test_client:
+        response = test_client.get(f"/organisations/{organisation['id']}/roles/", base_url="https://localhost")
+
+    assert response.status_code == 200
+    assert b"Developer" in response.data
+    assert time.perf_counter() - start < 0.6
+
+
+def test_async_views_share_a_client_and_its_connections(app, stub_api, get):
+    app.config["FLUX_API_CACHE_TTL"] = 0
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    grade = stub_api.add(organisation["id"], "grades", name="Senior")
+    practice = stub_api.add(organisation["id"], "practices", name="Engineering")
+    stub_api.add(organisation["id"], "roles", title="Developer", grade=grade, practice=practice)
+    path = f"/organisations/{organisation['id']}/roles/"
+    get(app, path)
+    connections = stub_api.connections
+
+    assert get(app, path).status_code == 200
+    assert stub_api.connections == connections
+    assert len(flux_api_async.get_clients()) == 1
+
+
+def test_async_gets_are_revalidated(app, stub_api):
+    app.config["FLUX_API_CACHE_TTL"] = 0
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    stub_api.add(organisation["id"], "grades", name="Senior Engineer")
+
+    async def list_grades():
+        return await Grade().list(organisation_id=organisation["id"], name="Senior Eng")
+
+    for _ in range(2):
+        with app.app_context():
+            grades = run(list_grades)
+
+    assert stub_api.not_modified == 1
+    assert grades[0]["name"] == "Senior Engineer"
@@ -0,0 +1,67 @@
+from app.integrations.flux_api import Organisation, Person, Role
+from app.integrations.identity_map import get_identity_map
+
+
+def test_get_is_only_fetched_once_per_request(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    person = stub_api.add(organisation["id"], "people", name="Ada")
+
+    first = Person().get(organisation_id=organisation["id"], person_id=person["id"])
+    second = Person().get(organisation_id=organisation["id"], person_id=person["id"])
+
+    assert first is second
+    assert len(stub_api.requests) == 1
+    assert get_identity_map().avoided == 1
+
+
+def test_list_satisfies_later_gets(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    role = stub_api.add(organisation["id"], "roles", title="Developer")
+
+    Role().list(organisation_id=organisation["id"], filters={})
+
+    assert Role().get(organisation_id=organisation["id"], role_id=role["id"])["title"] == "Developer"
+    assert len(stub_api.requests) == 1
+
+
+def test_organisation_list_satisfies_later_gets(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    app.config["FLUX_API_CACHE_TTL"] = 0
+
+    Organisation().list()
+    Organisation().get(organisation["id"])
+
+    assert len(stub_api.requests) == 1
+
+
+def test_writes_clear_the_identity_map(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    person = stub_api.add(organisation["id"], "people", name="Ada")
+    Person().get(organisation_id=organisation["id"], person_id=person["id"])
+
+    Person().delete(organisation_id=organisation["id"], person_id=person["id"])
+
+    assert Person().list(organisation_id=organisation["id"]) is None
+    assert len(stub_api.requests) == 3
+
+
+def test_identity_map_is_discarded_after_each_request(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    app.config["FLUX_API_CACHE_TTL"] = 0
+
+    with app.test_client() as test_client:
+        for _ in range(2):
+            response = test_client.get(f"/organisations/{organisation['id']}", base_url="https://localhost")
+            assert response.status_code == 200
+
+    assert len(stub_api.requests) == 2
+
+
+def test_avoided_calls_are_reported_in_debug_mode(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    app.debug = True
+
+    with app.test_client() as test_client:
+        response = test_client.get(f"/organisations/{organisation['id']}/edit", base_url="https://localhost")
+
+    assert response.headers["X-Flux-API-Calls-Avoided"] == "0"
@@ -0,0 +1,61 @@
+import json
+import logging
+
+from app.integrations.flux_api import Grade
+from app.integrations.instrumentation import Histogram, get_request_timings, get_upstream_stats
+
+
+def test_histogram_counts_values_in_cumulative_buckets():
+    histogram = Histogram(buckets=(0.1, 0.5, 1.0))
+    for value in (0.05, 0.1, 0.3, 0.7, 2.0):
+        histogram.observe(value)
+
+    snapshot = histogram.snapshot()
+
+    assert snapshot["buckets"] == {"0.1": 2, "0.5": 3, "1.0": 4, "+Inf": 5}
+    assert snapshot["count"] == 5
+    assert snapshot["sum"] == 3.15
+    assert 0.1 < snapshot["p50"] <= 0.5
+    assert snapshot["p95"] == 1.0
+
+
+def test_calls_are_recorded_per_endpoint(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    stub_api.add(organisation["id"], "grades", name="Senior")
+    stub_api.fail_next(1, 503)
+
+    Grade().list(organisation_id=organisation["id"])
+
+    stats = get_upstream_stats().snapshot()["GET /v1/organisations/{id}/grades"]
+    assert stats["statuses"] == {"503": 1, "200": 1}
+    assert stats["latency"]["count"] == 2
+    assert stats["bytes"] == stub_api.bytes_sent
+    assert [call.status for call in get_request_timings().calls] == [503, 200]
+
+
+def test_responses_have_server_timing_and_a_log_line(app, stub_api, caplog):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    stub_api.add(organisation["id"], "grades", name="Senior")
+
+    with caplog.at_level(logging.INFO, logger=app.logger.name):
+        with app.test_client() as test_client:
+            response = test_client.get(f"/organisations/{organisation['id']}/grades", base_url="https://localhost")
+
+    timings = [metric.split(";")[0] for metric in response.headers["Server-Timing"].split(", ")]
+    assert timings == ["flux-api", "render", "app", "total"]
+    assert 'desc="Flux API (2 calls)"' in response.headers["Server-Timing"]
+
+    (line,) = [json.loads(record.message) for record in caplog.records if record.message.startswith("{")]
+    assert line["endpoint"] == "grade.list"
+    assert line["status"] == 200
+    assert line["upstream_calls"] == 2
+    assert line["render_ms"] > 0
+
+
+def test_server_timing_can_be_turned_off(app, stub_api):
+    app.config["SERVER_TIMING"] = False
+
+    with app.test_client() as test_client:
+        response = test_client.get("/", base_url="https://localhost")
+
+    assert "Server-Timing" not in response.headers
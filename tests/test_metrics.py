@@ -0,0 +1,85 @@
+import os
+import runpy
+import subprocess
+import sys
+from types import SimpleNamespace
+
+from app import create_app
+from app.metrics import resource
+from config import Config
+from prometheus_client import REGISTRY, CollectorRegistry, multiprocess
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_resource_names_the_last_collection():
+    assert resource("GET /v1/organisations") == "organisations"
+    assert resource("GET /v1/organisations/{id}/grades/{id}") == "grades"
+    assert resource("GET /v1/organisations/{id}/projects/{id}/managers") == "managers"
+
+
+def test_metrics_are_exposed_without_a_csrf_token_or_rate_limit(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    stub_api.add(organisation["id"], "grades", name="Senior")
+    requests = sample("flux_ui_requests_total", endpoint="grade.list", method="GET", status="200")
+    calls = sample("flux_api_calls_total", resource="grades", method="GET", status="200")
+    misses = sample("flux_api_cache_lookups_total", namespace="organisation", result="miss")
+
+    with app.test_client() as test_client:
+        test_client.get(f"/organisations/{organisation['id']}/grades", base_url="https://localhost")
+        response = test_client.get("/metrics", base_url="https://localhost")
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    assert b"flux_ui_requests_in_progress" in response.data
+    assert sample("flux_ui_requests_total", endpoint="grade.list", method="GET", status="200") == requests + 1
+    assert sample("flux_api_calls_total", resource="grades", method="GET", status="200") == calls + 1
+    assert sample("flux_api_cache_lookups_total", namespace="organisation", result="miss") == misses + 1
+    assert sample("flux_ui_request_duration_seconds_count", endpoint="grade.list") > 0
+    assert sample("flux_ui_requests_in_progress") == 0
+
+
+def test_rate_limit_rejections_are_counted(stub_api):
+    class RateLimitedConfig(Config):
+        FLUX_API_URL = stub_api.url
+        RATELIMIT_ENABLED = True
+        TESTING = True
+
+    app = create_app(RateLimitedConfig)
+    rejected = sample("flux_ui_rate_limited_total", endpoint="main.index")
+
+    with app.test_client() as test_client:
+        statuses = [test_client.get("/", base_url="https://localhost").status_code for _ in range(3)]
+        metrics = test_client.get("/metrics", base_url="https://localhost")
+
+    assert statuses == [200, 200, 429]
+    assert metrics.status_code == 200
+    assert sample("flux_ui_rate_limited_total", endpoint="main.index") == rejected + 1
+
+
+def test_metrics_are_aggregated_across_workers(tmp_path):
+    worker = (
+        "from app.metrics import REQUESTS; REQUESTS.labels(endpoint='main.index', method='GET', status='200').inc()"
+    )
+    for _ in range(2):
+        subprocess.run(
+            [sys.executable, "-c", worker],
+            env={"PROMETHEUS_MULTIPROC_DIR": str(tmp_path)},
+            check=True,
+            cwd=os.path.dirname(os.path.dirname(__file__)),
+        )
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=str(tmp_path))
+
+    labels = {"endpoint": "main.index", "method": "GET", "status": "200"}
+    assert registry.get_sample_value("flux_ui_requests_total", labels) == 2
+
+
+def test_worker_exit_is_ignored_without_a_multiprocess_directory(monkeypatch):
+    monkeypatch.delenv("PROMETHEUS_MULTIPROC_DIR", raising=False)
+    config = runpy.run_path(os.path.join(os.path.dirname(__file__), "..", "gunicorn.conf.py"))
+
+    config["child_exit"](None, SimpleNamespace(pid=os.getpid()))
@@ -0,0 +1,67 @@
+import pytest
+from app.integrations import decoding, models
+from app.integrations.cache import dumps, loads
+from app.integrations.flux_api import Person
+from flask import render_template_string
+
+PEOPLE = b"""[
+    {"id": "1", "name": "Ada", "role": {"id": "r1", "title": "Developer", "grade": {"id": "g1", "name": "Senior"}},
+     "location": null, "nickname": "Countess", "created_at": "2021-06-30T09:15:00.123456+00:00"},
+    {"id": "2", "name": "Grace", "role": {"id": "r1", "title": "Developer", "grade": {"id": "g1", "name": "Senior"}},
+     "location": null, "created_at": "2021-06-30T09:15:00.123456+00:00"}
+]"""
+
+
+def test_entities_read_like_dicts_and_objects():
+    ada, _ = decoding.decode(PEOPLE, models.Person)
+
+    assert isinstance(ada, models.Person)
+    assert ada.name == ada["name"] == "Ada"
+    assert ada["role"]["grade"]["name"] == ada.role.grade.name == "Senior"
+    assert ada["nickname"] == "Countess"
+    assert ada.created_at.year == 2021
+    assert ada.get("email_address") is None
+    assert "location" in ada and "email_address" not in ada
+    with pytest.raises(KeyError):
+        ada["email_address"]
+    with pytest.raises(AttributeError):
+        ada.name = "Augusta"
+
+
+def test_nested_references_are_shared():
+    ada, grace = decoding.decode(PEOPLE, models.Person)
+    (later,) = decoding.decode(PEOPLE.replace(b'"name": "Ada"', b'"name": "Augusta"'), models.Person)[:1]
+
+    assert ada.role is grace.role
+    assert ada.role.grade is later.role.grade
+    assert models.Person.__slots__ and not hasattr(ada, "__dict__")
+
+
+def test_entities_survive_the_json_cache():
+    people = decoding.decode(PEOPLE, models.Person)
+
+    cached = loads(dumps(people))
+
+    assert cached[0].to_dict() == people[0].to_dict()
+    assert cached[1].role is people[1].role
+
+
+def test_templates_render_entities(app):
+    ada, _ = decoding.decode(PEOPLE, models.Person)
+
+    rendered = render_template_string(
+        "{{ person.role.grade.name }} {% if person.location %}located{% endif %}{{ person.role.practice or 'None' }}",
+        person=ada,
+    )
+
+    assert rendered == "Senior None"
+
+
+def test_resources_return_models(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    stub_api.add(organisation["id"], "people", name="Ada", role={"id": "r1", "grade": {"id": "g1", "name": "Senior"}})
+
+    (person,) = Person().list(organisation_id=organisation["id"])
+
+    assert isinstance(person, models.Person)
+    assert isinstance(person.role.grade, models.Grade)
@@ -0,0 +1,150 @@
+from app.integrations.flux_api import Grade
+from app.integrations.pagination import iter_pages, paginate
+
+
+def add_grades(stub_api, organisation_id, count):
+    for number in range(1, count + 1):
+        stub_api.add(organisation_id, "grades", name=f"Grade {number:02}")
+
+
+def test_paginate_uses_extra_item_to_find_next_page():
+    page = paginate(list(range(11)), page=2, per_page=10)
+
+    assert list(page) == list(range(10))
+    assert page.has_next
+    assert page.has_previous
+    assert (page.first, page.last) == (11, 20)
+    assert not paginate(list(range(5)), page=1, per_page=10).has_next
+
+
+def test_paginate_slices_whole_list_from_upstream_without_paging():
+    page = paginate(list(range(25)), page=3, per_page=10)
+
+    assert list(page) == list(range(20, 25))
+    assert not page.has_next
+
+
+def test_paginate_finds_next_page_from_exactly_one_extra_item():
+    page = paginate(list(range(11)), page=1, per_page=10)
+    last = paginate(list(range(10)), page=1, per_page=10)
+
+    assert list(page) == list(range(10))
+    assert page.has_next
+    assert list(last) == list(range(10))
+    assert not last.has_next
+
+
+def test_list_page_fetches_a_page_with_offset_and_limit(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    add_grades(stub_api, organisation["id"], 25)
+
+    page = Grade().list_page(organisation_id=organisation["id"], page=2, per_page=10)
+
+    assert [grade["name"] for grade in page] == [f"Grade {number}" for number in range(11, 21)]
+    assert page.has_next
+    assert not Grade().list_page(organisation_id=organisation["id"], page=3, per_page=10).has_next
+
+
+def test_iter_pages_walks_every_page_lazily(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    add_grades(stub_api, organisation["id"], 25)
+
+    grades = iter_pages(Grade().list_page, per_page=10, organisation_id=organisation["id"])
+    assert len(stub_api.requests) == 1
+
+    assert len(list(grades)) == 25
+    assert len(stub_api.requests) == 3
+
+
+def test_iter_pages_gives_each_page_its_own_deadline(app, stub_api):
+    app.config.update(FLUX_API_CACHE_TTL=0, FLUX_API_DEADLINE=0.3)
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    add_grades(stub_api, organisation["id"], 3)
+    stub_api.latency = 0.2
+
+    grades = iter_pages(Grade().list_page, per_page=1, organisation_id=organisation["id"])
+
+    assert [grade["name"] for grade in grades] == ["Grade 01", "Grade 02", "Grade 03"]
+
+
+def test_iter_pages_fetches_a_whole_list_from_upstream_once():
+    calls = []
+
+    def list_page(page, per_page):
+        calls.append(page)
+        return paginate(list(range(25)), page, per_page)
+
+    assert list(iter_pages(list_page, per_page=10)) == list(range(25))
+    assert calls == [1]
+
+
+def ignoring_offset(count):
+    """Make a list_page for an upstream that returns the whole list of count entities whatever page is asked for."""
+    calls = []
+
+    def list_page(page, per_page):
+        calls.append(page)
+        return paginate([{"id": number} for number in range(count)], page, per_page)
+
+    return list_page, calls
+
+
+def test_iter_pages_finds_a_whole_list_a_page_and_one_long(app):
+    list_page, calls = ignoring_offset(11)
+
+    assert [grade["id"] for grade in iter_pages(list_page, per_page=10)] == list(range(11))
+    assert calls == [1, 2]
+
+
+def test_iter_pages_stops_at_a_whole_list_a_page_long():
+    list_page, calls = ignoring_offset(10)
+
+    assert [grade["id"] for grade in iter_pages(list_page, per_page=10)] == list(range(10))
+    assert calls == [1]
+
+
+def test_iter_pages_stops_when_a_page_adds_nothing_new(app):
+    def list_page(page, per_page):
+        start = (min(page, 2) - 1) * per_page
+        return paginate([{"id": number} for number in range(start, start + per_page + 1)], page, per_page)
+
+    assert [grade["id"] for grade in iter_pages(list_page, per_page=10)] == list(range(20))
+
+
+def test_list_page_shows_one_page_with_controls(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    add_grades(stub_api, organisation["id"], 25)
+
+    with app.test_client() as test_client:
+        response = test_client.get(
+            f"/organisations/{organisation['id']}/grades?page=2&per_page=10", base_url="https://localhost"
+        )
+        default = test_client.get(
+            f"/organisations/{organisation['id']}/grades?per_page=7", base_url="https://localhost"
+        )
+
+    html = response.data.decode()
+    assert "Grades 11 to 20" in html
+    assert "Grade 10" not in html and "Grade 21" not in html
+    assert "page=3&amp;per_page=10" in html or "per_page=10&amp;page=3" in html
+    assert "25 grades" in default.data.decode()
+
+
+def test_download_walks_every_page(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    add_grades(stub_api, organisation["id"], 150)
+
+    with app.test_client() as test_client:
+        response = test_client.get(f"/organisations/{organisation['id']}/grades/download", base_url="https://localhost")
+
+    assert len(response.data.decode().splitlines()) == 151
+
+
+def test_page_links_keep_view_arguments_over_query_string(app, stub_api, get):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    add_grades(stub_api, organisation["id"], 30)
+
+    response = get(app, f"/organisations/{organisation['id']}/grades?organisation_id=x&per_page=10")
+
+    assert response.status_code == 200
+    assert f"/organisations/{organisation['id']}/grades?" in response.data.decode()
@@ -0,0 +1,84 @@
+import pytest
+from app import create_app
+from app.integrations import flux_api_async
+from app.profiling import PROFILE_ID_HEADER, ProfilerMiddleware
+from config import Config
+
+PROFILE = {"X-Profile": "secret"}
+
+
+@pytest.fixture
+def profiled_app(stub_api, tmp_path):
+    class ProfilingConfig(Config):
+        FLUX_API_URL = stub_api.url
+        PROFILING_DIR = str(tmp_path)
+        PROFILING_INTERVAL = 0.001
+        PROFILING_KEEP = 2
+        PROFILING_TOKEN = "secret"
+        RATELIMIT_ENABLED = False
+        TESTING = True
+
+    app = create_app(ProfilingConfig)
+    with app.app_context():
+        yield app
+        flux_api_async.run(flux_api_async.close_client())
+
+
+def test_requests_are_only_profiled_when_asked(profiled_app, stub_api, get):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    path = f"/organisations/{organisation['id']}/grades"
+
+    assert PROFILE_ID_HEADER not in get(profiled_app, path).headers
+    assert PROFILE_ID_HEADER not in get(profiled_app, path, headers={"X-Profile": "wrong"}).headers
+
+    response = get(profiled_app, path, headers=PROFILE)
+    profile_id = response.headers[PROFILE_ID_HEADER]
+
+    assert response.status_code == 200
+    assert b"Mash" in response.data
+    (profile,) = get(profiled_app, "/profiles", headers=PROFILE).json["profiles"]
+    assert profile["id"] == profile_id
+    assert profile["path"] == path
+    assert profile["status"] == "200 OK"
+
+
+def test_profiles_list_top_functions_and_folded_stacks(profiled_app, stub_api, get):
+    stub_api.latency = 0.02
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    profile_id = get(profiled_app, f"/organisations/{organisation['id']}", headers=PROFILE).headers[PROFILE_ID_HEADER]
+
+    top = get(profiled_app, f"/profiles/{profile_id}?sort=tottime", headers=PROFILE)
+    folded = get(profiled_app, f"/profiles/{profile_id}/folded", headers=PROFILE)
+    pstats = get(profiled_app, f"/profiles/{profile_id}/pstats", headers=PROFILE)
+
+    assert b"function calls" in top.data
+    assert b"Ordered by: internal time" in top.data
+    stacks = folded.data.decode().splitlines()
+    assert stacks and all(line.rsplit(" ", 1)[1].isdigit() for line in stacks)
+    assert any("view (routes.py" in line for line in stacks)
+    assert pstats.headers["Content-Disposition"] == f"attachment; filename={profile_id}.prof"
+
+
+def test_profiles_are_hidden_without_the_token(profiled_app, stub_api, get):
+    profile_id = get(profiled_app, "/", headers=PROFILE).headers[PROFILE_ID_HEADER]
+
+    assert get(profiled_app, f"/profiles/{profile_id}").status_code == 404
+    assert get(profiled_app, "/profiles").status_code == 404
+    assert get(profiled_app, "/profiles/../config", headers=PROFILE).status_code == 404
+
+
+def test_only_the_newest_profiles_are_kept(profiled_app, tmp_path, get):
+    for _ in range(3):
+        get(profiled_app, "/", headers=PROFILE)
+
+    assert len(list(tmp_path.glob("*.prof"))) == 2
+
+
+def test_requests_can_be_sampled(profiled_app, get):
+    profiled_app.config["PROFILING_SAMPLE_RATE"] = 1.0
+
+    assert PROFILE_ID_HEADER in get(profiled_app, "/").headers
+
+
+def test_no_profiler_is_installed_by_default(app):
+    assert not isinstance(app.wsgi_app, ProfilerMiddleware)
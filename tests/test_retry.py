@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+from app.integrations.flux_api import Grade, Organisation
+from app.integrations.retry import get_retry_stats, retry_after
+from werkzeug.exceptions import InternalServerError, TooManyRequests
+
+
+class Response:
+    def __init__(self, **headers):
+        self.headers = headers
+
+
+@pytest.fixture
+def retrying_app(app):
+    app.config.update(FLUX_API_CACHE_TTL=0, FLUX_API_RETRY_BACKOFF=0.01)
+    return app
+
+
+def test_retry_after_accepts_seconds_and_dates():
+    in_a_minute = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=60), usegmt=True)
+
+    assert retry_after(Response(**{"Retry-After": "2"})) == 2.0
+    assert 55 < retry_after(Response(**{"Retry-After": in_a_minute})) <= 60
+    assert retry_after(Response()) is None
+
+
+def test_get_is_retried_after_transient_failure(retrying_app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    stub_api.fail_next(1, 503)
+
+    assert Organisation().get(organisation_id=organisation["id"])["name"] == "Mash"
+    assert len(stub_api.requests) == 2
+    assert get_retry_stats().snapshot()["retries"] == 1
+
+
+def test_retry_honours_retry_after(retrying_app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    stub_api.fail_next(1, 429, retry_after=0)
+    Organisation().get(organisation_id=organisation["id"])
+
+    stub_api.reset_counts()
+    stub_api.fail_next(1, 429, retry_after=60)
+    with retrying_app.app_context(), pytest.raises(TooManyRequests):
+        Grade().list(organisation_id=organisation["id"])
+
+    assert len(stub_api.requests) == 1
+    assert get_retry_stats().snapshot()["gave_up"] == 1
+
+
+def test_post_is_not_retried(retrying_app, stub_api):
+    stub_api.fail_next(1, 503)
+
+    with pytest.raises(InternalServerError):
+        Organisation().create(name="Mash", domain="example.com")
+
+    assert len(stub_api.requests) == 1
+
+
+def test_retries_are_limited_by_request_budget(retrying_app, stub_api):
+    retrying_app.config["FLUX_API_RETRY_BUDGET"] = 1
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    stub_api.fail_next(3, 503)
+
+    with pytest.raises(InternalServerError):
+        Organisation().get(organisation_id=organisation["id"])
+    with pytest.raises(InternalServerError):
+        Grade().list(organisation_id=organisation["id"])
+
+    assert len(stub_api.requests) == 3
+    assert get_retry_stats().snapshot() == {"requests": 2, "retries": 1, "gave_up": 2, "retry_rate": 0.5}
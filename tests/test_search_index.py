@@ -0,0 +1,119 @@
+import time
+
+from app.integrations.flux_api import Person
+from app.integrations.search_index import PeopleIndex, get_people_indexes
+
+DEVELOPER = {"id": "r1", "title": "Developer", "grade": {"id": "g1"}, "practice": {"id": "p1"}}
+TESTER = {"id": "r2", "title": "Tester", "grade": {"id": "g1"}, "practice": None}
+LEEDS = {"id": "l1", "name": "Leeds"}
+LONDON = {"id": "l2", "name": "London"}
+
+PEOPLE = [
+    {"id": "1", "name": "Ada Lovelace", "role": DEVELOPER, "location": LEEDS},
+    {"id": "2", "name": "Grace Hopper", "role": TESTER, "location": LEEDS},
+    {"id": "3", "name": "Alan Turing", "role": DEVELOPER, "location": LONDON},
+    {"id": "4", "name": "Katherine Johnson", "role": TESTER, "location": LONDON},
+]
+
+
+def ids(people):
+    return [person["id"] for person in people]
+
+
+def test_filters_combine():
+    index = PeopleIndex(PEOPLE)
+
+    assert ids(index.search()) == ["1", "2", "3", "4"]
+    assert ids(index.search(role_id="r1", location_id="l2")) == ["3"]
+    assert ids(index.search(grade_id="g1", location_id="l1")) == ["1", "2"]
+    assert ids(index.search(practice_id="p1", name="lovelace")) == ["1"]
+    assert ids(index.search(role_id="r2", name="turing")) == []
+
+
+def test_name_matches_substrings_and_misspellings():
+    index = PeopleIndex(PEOPLE)
+
+    assert ids(index.search(name="OPP")) == ["2"]
+    assert ids(index.search(name="a")) == ["1", "2", "3", "4"]
+    assert ids(index.search(name="Katherin Jonson")) == ["4"]
+    assert ids(index.search(name="zzzz")) == []
+
+
+def test_search_is_fast_on_a_large_organisation():
+    people = [
+        {"id": str(n), "name": f"Person {n}", "role": DEVELOPER if n % 2 else TESTER, "location": LEEDS}
+        for n in range(10000)
+    ]
+    index = PeopleIndex(people)
+
+    started = time.perf_counter()
+    for _ in range(100):
+        index.search(name="person 123", role_id="r1")
+    assert (time.perf_counter() - started) / 100 < 0.001
+
+
+def test_search_reuses_index_until_people_change(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    stub_api.add(organisation["id"], "people", name="Ada Lovelace", role=DEVELOPER, location=LEEDS)
+    stub_api.add(organisation["id"], "people", name="Alan Turing", role=DEVELOPER, location=LONDON)
+
+    assert ids(Person().search(organisation_id=organisation["id"], role_id="r1", location_id="l2")) != []
+    Person().search(organisation_id=organisation["id"], name="ada")
+    assert len(stub_api.requests) == 1
+
+    Person().create(
+        name="Adam Smith",
+        role_id="r1",
+        email_address="adam@example.com",
+        full_time_equivalent=1,
+        location_id="l1",
+        employment="permanent",
+        organisation_id=organisation["id"],
+    )
+    names = [person["name"] for person in Person().search(organisation_id=organisation["id"], name="ada")]
+
+    assert names == ["Ada Lovelace", "Adam Smith"]
+    assert len(stub_api.requests) == 3
+
+
+def test_least_recently_used_indexes_are_evicted(app, stub_api):
+    app.config["FLUX_API_PEOPLE_INDEXES"] = 2
+    organisations = [stub_api.add_organisation(name=name, domain=f"{name}.com") for name in ("a", "b", "c")]
+    for organisation in organisations:
+        stub_api.add(organisation["id"], "people", name="Ada Lovelace", role=DEVELOPER, location=LEEDS)
+
+    for organisation in (*organisations[:2], organisations[0], organisations[2]):
+        Person().search(organisation_id=organisation["id"], name="ada")
+
+    indexes = get_people_indexes()
+    assert len(indexes) == 2
+    assert indexes.lookup(organisations[0]["id"])[0] is not None
+    assert indexes.lookup(organisations[1]["id"])[0] is None
+    assert indexes.lookup(organisations[2]["id"])[0] is not None
+
+
+def test_expired_indexes_are_dropped(app, stub_api):
+    app.config["FLUX_API_CACHE_TTL"] = 0.1
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    Person().search(organisation_id=organisation["id"], name="ada")
+    time.sleep(0.15)
+
+    assert get_people_indexes().lookup(organisation["id"])[0] is None
+    assert len(get_people_indexes()) == 0
+
+
+def test_list_view_combines_filters(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    stub_api.add(organisation["id"], "people", name="Ada Lovelace", role=DEVELOPER, location=LEEDS)
+    stub_api.add(organisation["id"], "people", name="Alan Turing", role=DEVELOPER, location=LONDON)
+    stub_api.add(organisation["id"], "people", name="Grace Hopper", role=TESTER, location=LONDON)
+
+    with app.test_client() as test_client:
+        response = test_client.get(
+            f"/organisations/{organisation['id']}/people/?role_id=r1&location_id=l2", base_url="https://localhost"
+        )
+
+    assert response.status_code == 200
+    assert b"Alan Turing" in response.data
+    assert b"Ada Lovelace" not in response.data
+    assert b"Grace Hopper" not in response.data
@@ -0,0 +1,228 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from app.integrations import flux_api_async
+from app.integrations.deadline import Deadline
+from app.integrations.flux_api import Organisation
+from app.integrations.flux_api_async import closing_client
+from app.integrations.single_flight import SingleFlight, get_single_flight
+from flask import g
+
+
+class FakeRedis:
+    """Just enough of a Redis client, shared between SingleFlight instances standing in for separate workers."""
+
+    def __init__(self):
+        self.values = {}
+
+    def set(self, key, value, nx=False, px=None):
+        if nx and key in self.values:
+            return False
+        self.values[key] = value.encode() if isinstance(value, str) else value
+        return True
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+    def incr(self, key):
+        self.values[key] = str(int(self.values.get(key, 0)) + 1).encode()
+        return int(self.values[key])
+
+    def pexpire(self, key, milliseconds):
+        return key in self.values
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """Queues calls to a FakeRedis, making them all when executed, as a Redis pipeline does."""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.calls.append((getattr(self.redis, name), args, kwargs))
+            return self
+
+        return queue
+
+    def execute(self):
+        return [call(*args, **kwargs) for call, args, kwargs in self.calls]
+
+
+def get_organisation_concurrently(app, organisation_id, count):
+    def get():
+        with app.app_context():
+            return Organisation().get(organisation_id=organisation_id)
+
+    with ThreadPoolExecutor(count) as executor:
+        return list(executor.map(lambda _: get(), range(count)))
+
+
+def test_concurrent_identical_gets_share_one_request(app, stub_api):
+    app.config["FLUX_API_CACHE_TTL"] = 0
+    stub_api.latency = 0.2
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+
+    results = get_organisation_concurrently(app, organisation["id"], 5)
+
+    assert [result["name"] for result in results] == ["Mash"] * 5
+    assert results[0] is not results[1]
+    assert len(stub_api.requests) == 1
+    assert get_single_flight().snapshot() == {"requests": 1, "coalesced": 4, "coalesced_remote": 0}
+
+
+def test_single_flight_can_be_disabled(app, stub_api):
+    app.config["FLUX_API_CACHE_TTL"] = 0
+    app.config["FLUX_API_SINGLE_FLIGHT"] = False
+    stub_api.latency = 0.2
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+
+    get_organisation_concurrently(app, organisation["id"], 3)
+
+    assert len(stub_api.requests) == 3
+
+
+def test_async_identical_gets_share_one_request(app, stub_api):
+    app.config["FLUX_API_CACHE_TTL"] = 0
+    stub_api.latency = 0.2
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+
+    async def get_twice():
+        return await asyncio.gather(
+            flux_api_async.Organisation().request("GET", f"{stub_api.url}/v1/organisations/{organisation['id']}"),
+            flux_api_async.Organisation().request("GET", f"{stub_api.url}/v1/organisations/{organisation['id']}"),
+        )
+
+    first, second = asyncio.run(closing_client(get_twice)())
+
+    assert first is second
+    assert len(stub_api.requests) == 1
+
+
+def test_errors_are_shared_with_waiting_callers(app):
+    single_flight = SingleFlight(None, wait=1)
+    started = threading.Event()
+
+    def fail():
+        started.set()
+        threading.Event().wait(0.1)
+        raise ValueError("upstream failed")
+
+    with ThreadPoolExecutor(2) as executor:
+        leader = executor.submit(single_flight.do, "GET /", fail)
+        started.wait()
+        follower = executor.submit(single_flight.do, "GET /", fail)
+        for future in (leader, follower):
+            with pytest.raises(ValueError):
+                future.result()
+
+    assert single_flight.snapshot()["coalesced"] == 1
+
+
+def test_responses_are_shared_between_workers(app, stub_api):
+    redis = FakeRedis()
+    workers = [SingleFlight(None, wait=1), SingleFlight(None, wait=1)]
+    for worker in workers:
+        worker._redis = redis
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    url = f"{stub_api.url}/v1/organisations/{organisation['id']}"
+    worker_started = threading.Event()
+
+    def send():
+        worker_started.set()
+        threading.Event().wait(0.1)
+        return Organisation().session.get(url)
+
+    def in_app(worker, send):
+        with app.app_context():
+            return worker.do(f"GET {url}", send)
+
+    with ThreadPoolExecutor(2) as executor:
+        leader = executor.submit(in_app, workers[0], send)
+        worker_started.wait()
+        follower = executor.submit(in_app, workers[1], send)
+        responses = [leader.result(), follower.result()]
+
+    assert Organisation().decode(responses[1])["name"] == "Mash"
+    assert len(stub_api.requests) == 1
+    assert workers[1].snapshot() == {"requests": 0, "coalesced": 0, "coalesced_remote": 1}
+    assert redis.values.get(f"flux-api:flight:GET {url}") is None
+
+
+def test_responses_are_only_published_for_waiting_workers(app, stub_api):
+    redis = FakeRedis()
+    worker = SingleFlight(None, wait=1)
+    worker._redis = redis
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    url = f"{stub_api.url}/v1/organisations/{organisation['id']}"
+
+    response = worker.do(f"GET {url}", lambda: Organisation().session.get(url))
+
+    assert Organisation().decode(response)["name"] == "Mash"
+    assert redis.values == {}
+
+
+def test_callers_only_wait_until_their_deadline(app):
+    single_flight = SingleFlight(None, wait=5)
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        threading.Event().wait(0.5)
+        return "leader"
+
+    def follow():
+        with app.app_context():
+            g.flux_api_deadline = Deadline(0.1)
+            return single_flight.do("GET /", lambda: "follower")
+
+    with ThreadPoolExecutor(2) as executor:
+        leader = executor.submit(single_flight.do, "GET /", slow)
+        started.wait()
+        start = time.perf_counter()
+        assert executor.submit(follow).result() == "follower"
+        assert time.perf_counter() - start < 0.3
+        assert leader.result() == "leader"
+
+
+class ThreadNotingRedis(FakeRedis):
+    """A FakeRedis noting the threads it is used from."""
+
+    def __init__(self):
+        super().__init__()
+        self.threads = set()
+
+    def set(self, key, value, nx=False, px=None):
+        self.threads.add(threading.get_ident())
+        return super().set(key, value, nx, px)
+
+    def get(self, key):
+        self.threads.add(threading.get_ident())
+        return super().get(key)
+
+
+def test_async_callers_use_redis_off_the_event_loop(app):
+    redis = ThreadNotingRedis()
+    single_flight = SingleFlight(None, wait=1)
+    single_flight._redis = redis
+
+    async def send():
+        return "response"
+
+    async def get():
+        return await single_flight.do_async("GET /", send), threading.get_ident()
+
+    response, loop_thread = asyncio.run(get())
+
+    assert response == "response"
+    assert redis.threads and loop_thread not in redis.threads
@@ -0,0 +1,157 @@
+import gzip
+import json
+import re
+import zlib
+from datetime import datetime
+
+import brotli
+import pytest
+from app.integrations.decoding import iter_items
+from app.integrations.flux_api import Organisation, Person
+from app.integrations.instrumentation import get_request_timings
+from app.streaming import timed
+
+from tests.dataset import generate
+from tests.stub_api import timestamp
+
+
+def chunked(data, size):
+    return [data[start : start + size] for start in range(0, len(data), size)]
+
+
+def test_iter_items_decodes_array_split_across_chunks():
+    items = [{"id": str(number), "name": f"Zoë {number}", "created_at": timestamp()} for number in range(20)]
+    items.append(12345)
+    data = json.dumps(items, ensure_ascii=False).encode()
+
+    for size in (1, 7, len(data)):
+        decoded = list(iter_items(chunked(data, size)))
+        assert [item["name"] for item in decoded[:-1]] == [item["name"] for item in items[:-1]]
+        assert isinstance(decoded[0]["created_at"], datetime)
+        assert decoded[-1] == 12345
+
+
+def test_iter_items_decodes_empty_array():
+    assert list(iter_items([b" [ ", b"]"])) == []
+
+
+def test_iter_items_rejects_truncated_array():
+    with pytest.raises(ValueError):
+        list(iter_items([b'[{"id": "1"}, {"id"']))
+
+
+def test_stream_yields_list_items(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+
+    assert list(Person().stream(organisation_id=organisation["id"])) == []
+
+    for number in range(3):
+        stub_api.add(organisation["id"], "people", name=f"Person {number}", role=None)
+    people = Person().stream(organisation_id=organisation["id"])
+
+    assert [person["name"] for person in people] == ["Person 0", "Person 1", "Person 2"]
+
+
+def test_download_streams_csv(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+    grade = stub_api.add(organisation["id"], "grades", name="Senior")
+    stub_api.add(organisation["id"], "roles", title="Developer", grade=grade, practice=None)
+
+    with app.test_client() as test_client:
+        response = test_client.get(f"/organisations/{organisation['id']}/roles/download", base_url="https://localhost")
+
+    assert response.status_code == 200
+    assert response.data.decode().splitlines() == ["TITLE,GRADE,PRACTICE", "Developer,Senior,"]
+
+
+@pytest.fixture
+def organisation(stub_api):
+    organisation, collections = generate(people=300)
+    stub_api.load(organisation, collections)
+    return organisation
+
+
+def get_chunks(app, path, **headers):
+    with app.test_client() as test_client:
+        response = test_client.get(path, base_url="https://localhost", headers=headers)
+        return response, list(response.iter_encoded())
+
+
+def test_list_pages_stream_in_chunks(app, organisation):
+    response, chunks = get_chunks(app, f"/organisations/{organisation['id']}/people/?per_page=100")
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert "Content-Length" not in response.headers
+    assert len(chunks) > 1
+    assert chunks[0].startswith(b"<!doctype html>")
+    assert b"".join(chunks).endswith(b"</html>")
+    assert b"".join(chunks).count(b"/edit") == 100
+
+
+@pytest.mark.parametrize(
+    "encoding, decompress",
+    [
+        ("gzip", lambda chunks: [zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(chunks[0])]),
+        ("deflate", lambda chunks: [zlib.decompressobj().decompress(chunks[0])]),
+        ("br", lambda chunks: [brotli.Decompressor().process(chunks[0])]),
+    ],
+)
+def test_list_pages_are_compressed_as_they_stream(app, organisation, encoding, decompress):
+    path = f"/organisations/{organisation['id']}/roles/?per_page=100"
+    _, plain = get_chunks(app, path)
+
+    response, chunks = get_chunks(app, path, **{"Accept-Encoding": encoding})
+
+    assert response.headers["Content-Encoding"] == encoding
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert len(chunks) > 1
+    assert decompress(chunks)[0] == plain[0]
+
+
+def test_whole_compressed_stream_decodes_to_the_page(app, organisation):
+    path = f"/organisations/{organisation['id']}/projects/?per_page=100"
+    _, plain = get_chunks(app, path)
+
+    _, chunks = get_chunks(app, path, **{"Accept-Encoding": "gzip"})
+
+    assert gzip.decompress(b"".join(chunks)) == b"".join(plain)
+
+
+def test_flashed_messages_are_shown_once_on_streamed_pages(app, organisation):
+    path = f"/organisations/{organisation['id']}/roles/"
+
+    with app.test_client() as test_client:
+        with test_client.session_transaction() as session:
+            session["_flashes"] = [("success", "Role saved")]
+        first = test_client.get(path, base_url="https://localhost").data
+        second = test_client.get(path, base_url="https://localhost").data
+
+    assert b"Role saved" in first
+    assert b"Role saved" not in second
+
+
+@pytest.mark.parametrize("accept_encoding", ["", "identity", "identity, gzip;q=0.5"])
+def test_streamed_pages_are_only_compressed_when_the_client_prefers_it(app, organisation, accept_encoding):
+    response, _ = get_chunks(app, f"/organisations/{organisation['id']}/roles/", **{"Accept-Encoding": accept_encoding})
+
+    assert "Content-Encoding" not in response.headers
+
+
+def test_streamed_pages_time_rendering_their_first_chunk(app, organisation):
+    response, _ = get_chunks(app, f"/organisations/{organisation['id']}/people/?per_page=100")
+
+    render = re.search(r"render;dur=([\d.]+)", response.headers["Server-Timing"]).group(1)
+    assert float(render) > 0
+
+
+def test_calls_made_while_streaming_are_made_while_rendering(app, stub_api):
+    organisation = stub_api.add_organisation(name="Mash", domain="example.com")
+
+    def chunks():
+        yield Organisation().get(organisation_id=organisation["id"])["name"]
+
+    timings = get_request_timings()
+    assert list(timed(chunks(), timings)) == ["Mash"]
+    assert [call.in_template for call in timings.calls] == [True]
+    assert timings.render > 0 and not timings.rendering